@@ -1,51 +1,408 @@
+import os
+import re
+import time
+import argparse
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import joblib
 import pandas as pd
 import numpy as np
+import sklearn
 from sklearn.ensemble import IsolationForest
-from sklearn.preprocessing import LabelEncoder
 
-print("Loading suspicious logs...")
+from ai.features import FEATURE_NAMES, WINDOW_SECONDS, FeatureState, extract_features
+from data.storage import LogWriter, iter_logs, read_logs
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+
+INPUT_PATH = "data/suspicious_logs.parquet"
+OUTPUT_PATH = "data/ai_detected_logs.parquet"
+
+# Columns read from the logs; the model sees ai.features output only
+LOG_COLUMNS = [
+    "timestamp",
+    "user_id",
+    "ip_address",
+    "location",
+    "event_type",
+    "label"
+]
+
+MODEL_DIR = "models"
+MODEL_NAME = "isolation_forest"
+
+# Layout of the persisted artifact; bump when its keys change
+ARTIFACT_FORMAT = 2
+
+# Scoring works on fixed-size chunks so peak memory depends on the
+# chunk size and worker count, not on the input size.
+SCORE_CHUNK_ROWS = 250_000
+SCORE_WORKERS = os.cpu_count() or 1
+
+# The pipeline scores from one of its worker threads, and forking a
+# process while other threads hold locks can deadlock the child, so
+# scoring workers are spawned
+SCORE_START_METHOD = "spawn"
+
+THROUGHPUT_PATH = "evaluation/scoring_throughput.csv"
+
+# ============================================================
+# MODEL
+# ============================================================
+
+def train_model(df):
+
+    X = extract_features(df)
+
+    model = IsolationForest(
+        n_estimators=100,
+        contamination=0.05,
+        random_state=42
+    )
+
+    model.fit(X)
+
+    return model
+
+
+def score_features(model, X):
+
+    # One pass over the trees: predict() would recompute the same path
+    # lengths, and it labels exactly the rows with a negative score.
+    anomaly_scores = model.decision_function(X)
+    anomaly_labels = (anomaly_scores < 0).astype(np.int64)
+
+    return anomaly_scores, anomaly_labels
+
+
+def attach_scores(df, anomaly_scores, anomaly_labels):
+
+    # Add results to dataframe
+    df = df.copy()
+    df['anomaly_score'] = anomaly_scores
+    df['anomaly'] = anomaly_labels
+
+    return df
+
+
+def empty_scores():
+
+    # No input rows: the output still has every column a scored chunk has
+    df = pd.DataFrame({column: pd.Series(dtype="string") for column in LOG_COLUMNS})
+    df["timestamp"] = pd.Series(dtype="datetime64[ns]")
+
+    return attach_scores(df, np.empty(0), np.empty(0, dtype=np.int64))
+
+
+def score_frame(df, model, state=None):
+
+    # Pass a FeatureState to keep rolling features exact across batches
+    X = state.transform(df) if state is not None else extract_features(df)
+
+    return attach_scores(df, *score_features(model, X))
+
+# ============================================================
+# MODEL ARTIFACTS
+# ============================================================
+
+# Artifacts are versioned files models/isolation_forest_v<N>.joblib
+# holding the model, its feature layout and training metadata. They
+# are stored uncompressed so the tree arrays can be memory-mapped.
+
+_loaded_models = {}
+
+
+def model_versions():
+
+    if not os.path.isdir(MODEL_DIR):
+        return {}
+
+    pattern = re.compile(rf"^{MODEL_NAME}_v(\d+)\.joblib$")
+
+    return {int(match.group(1)): os.path.join(MODEL_DIR, name)
+            for name in os.listdir(MODEL_DIR)
+            if (match := pattern.match(name))}
+
+
+def latest_model_path():
+
+    versions = model_versions()
+
+    return versions[max(versions)] if versions else None
+
+
+def save_model(model, training_rows):
+
+    os.makedirs(MODEL_DIR, exist_ok=True)
+
+    version = max(model_versions(), default=0) + 1
+
+    artifact = {
+        "format": ARTIFACT_FORMAT,
+        "version": version,
+        "created": datetime.now().isoformat(),
+        "sklearn_version": sklearn.__version__,
+        "feature_names": FEATURE_NAMES,
+        "feature_window_seconds": WINDOW_SECONDS,
+        "training_rows": training_rows,
+        "model": model
+    }
+
+    path = os.path.join(MODEL_DIR, f"{MODEL_NAME}_v{version}.joblib")
+
+    joblib.dump(artifact, path)
+
+    return path
+
+
+def load_model(path=None):
+
+    path = path or latest_model_path()
+
+    if path is None:
+        raise FileNotFoundError(f"No {MODEL_NAME} artifact in {MODEL_DIR}/; "
+                                "run: python -m ai.anomaly_detection train")
+
+    # Loaded (and memory-mapped) once per process
+    if path not in _loaded_models:
+
+        artifact = joblib.load(path, mmap_mode="r")
+
+        if artifact.get("format") != ARTIFACT_FORMAT:
+            raise ValueError(f"{path}: unsupported artifact format {artifact.get('format')}")
+
+        if artifact["feature_names"] != FEATURE_NAMES \
+                or artifact["feature_window_seconds"] != WINDOW_SECONDS:
+            raise ValueError(f"{path}: trained on a different feature set")
+
+        _loaded_models[path] = artifact
+
+    return _loaded_models[path]
+
+# ============================================================
+# ANOMALY DETECTION
+# ============================================================
+
+def load_input(suspicious_logs=None):
+
+    if suspicious_logs is None:
+        suspicious_logs = INPUT_PATH
+
+    if isinstance(suspicious_logs, str):
+        # A file, or a partitioned dataset written by the Spark executors
+        print("Loading suspicious logs...")
+        return read_logs(suspicious_logs, columns=LOG_COLUMNS)
+
+    return suspicious_logs[LOG_COLUMNS].copy()
+
+
+def train(suspicious_logs=None):
+
+    df = load_input(suspicious_logs)
+
+    print("Total training logs:", len(df))
+
+    print("Training anomaly detection model...")
+
+    model = train_model(df)
+
+    path = save_model(model, len(df))
+
+    print("Model artifact saved to:", path)
+
+    return path
+
+
+# ============================================================
+# CHUNKED / PARALLEL SCORING
+# ============================================================
+
+_worker_artifact = None
+
+
+def _init_worker(model_path):
+
+    global _worker_artifact
+
+    # Each worker memory-maps the artifact once
+    _worker_artifact = load_model(model_path)
+
+
+def _score_features(X):
+
+    return score_features(_worker_artifact["model"], X)
+
+
+def input_chunks(suspicious_logs, chunk_rows=SCORE_CHUNK_ROWS):
+
+    if suspicious_logs is None:
+        suspicious_logs = INPUT_PATH
+
+    if isinstance(suspicious_logs, str):
+        yield from iter_logs(suspicious_logs, columns=LOG_COLUMNS, batch_size=chunk_rows)
+        return
+
+    # Project once: selecting the columns copies the whole frame
+    logs = suspicious_logs[LOG_COLUMNS]
+
+    for start in range(0, len(logs), chunk_rows):
+        yield logs.iloc[start:start + chunk_rows]
+
+
+def score_chunks(chunks, model_path, workers=SCORE_WORKERS):
+    # Yields scored chunks in input order; at most 2 chunks per worker
+    # are in flight, which bounds memory for any input size. Features
+    # are extracted here, in order, so rolling windows carry across
+    # chunks; only the float32 matrices travel to the workers.
+
+    state = FeatureState()
+
+    if workers <= 1:
+        model = load_model(model_path)["model"]
+        for chunk in chunks:
+            yield score_frame(chunk, model, state)
+        return
+
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context(SCORE_START_METHOD),
+                             initializer=_init_worker, initargs=(model_path,)) as pool:
+
+        pending = deque()
+
+        for chunk in chunks:
+            X = state.transform(chunk)
+            pending.append((chunk, pool.submit(_score_features, X)))
+            if len(pending) >= 2 * workers:
+                chunk, future = pending.popleft()
+                yield attach_scores(chunk, *future.result())
+
+        while pending:
+            chunk, future = pending.popleft()
+            yield attach_scores(chunk, *future.result())
+
+
+def score(suspicious_logs=None, model_path=None, output_path=OUTPUT_PATH,
+          workers=SCORE_WORKERS, chunk_rows=SCORE_CHUNK_ROWS, return_frame=False):
+
+    model_path = model_path or latest_model_path()
+
+    artifact = load_model(model_path)
+
+    print(f"Scoring with model v{artifact['version']} "
+          f"(trained {artifact['created']} on {artifact['training_rows']} rows)")
+
+    # A frame already in memory never needs more workers than chunks
+    if not isinstance(suspicious_logs, (str, type(None))):
+        workers = max(1, min(workers, -(-len(suspicious_logs) // chunk_rows)))
+
+    rows = 0
+    anomalies = 0
+    kept = []
+
+    start_time = time.time()
+
+    with LogWriter(output_path) as writer:
+        for scored in score_chunks(input_chunks(suspicious_logs, chunk_rows), model_path, workers):
+            writer.write(scored)
+            rows += len(scored)
+            anomalies += int(scored["anomaly"].sum())
+            if return_frame:
+                kept.append(scored)
+
+        # Downstream stages read the file, so an empty input still writes one
+        if writer.rows == 0:
+            writer.write(empty_scores())
+
+    elapsed = time.time() - start_time
+
+    print("Total suspicious logs:", rows)
+    print(f"Workers: {workers} | Chunk rows: {chunk_rows} | "
+          f"Throughput: {rows / elapsed if elapsed > 0 else 0:,.0f} rows/sec")
+
+    print("AI anomaly detection complete")
+    print("Anomalies detected:", anomalies)
+    print("Saved to:", output_path)
+
+    if return_frame:
+        return pd.concat(kept, ignore_index=True) if kept else empty_scores()
+
+    return rows, elapsed
+
+
+def benchmark(suspicious_logs=None, worker_counts=(1, 2, 4), model_path=None,
+              chunk_rows=SCORE_CHUNK_ROWS, output_path="data/benchmark_scored_logs.parquet"):
+
+    results = []
+
+    for workers in worker_counts:
+
+        rows, elapsed = score(suspicious_logs, model_path, output_path,
+                              workers=workers, chunk_rows=chunk_rows)
+
+        results.append({
+            "workers": workers,
+            "rows": rows,
+            "seconds": elapsed,
+            "rows_per_sec": rows / elapsed if elapsed > 0 else 0
+        })
+
+    df = pd.DataFrame(results)
 
-df = pd.read_csv("data/suspicious_logs.csv")
+    os.makedirs("evaluation", exist_ok=True)
+    df.to_csv(THROUGHPUT_PATH, index=False)
 
-print("Total suspicious logs:", len(df))
+    print("\nScoring throughput by worker count:")
+    print(df.to_string(index=False))
+    print("Saved:", THROUGHPUT_PATH)
 
-# Encode categorical columns
-encoders = {}
+    return df
 
-for column in df.columns:
-    if df[column].dtype == object:
-        le = LabelEncoder()
-        df[column] = le.fit_transform(df[column])
-        encoders[column] = le
 
-# Save feature set separately
-X = df.copy()
+def main(suspicious_logs=None, output_path=OUTPUT_PATH):
 
-print("Training anomaly detection model...")
+    # Pipeline entry: reuse the latest persisted model so scores stay
+    # comparable across runs; train one only if none is usable yet.
+    try:
+        load_model()
+    except (FileNotFoundError, ValueError) as reason:
+        print("No usable model artifact:", reason)
+        train(suspicious_logs)
 
-model = IsolationForest(
-    n_estimators=100,
-    contamination=0.05,
-    random_state=42
-)
+    score(suspicious_logs, output_path=output_path)
 
-model.fit(X)
+    # Scored rows are handed on by path; downstream stages read only
+    # the columns (and rows) they need
+    return output_path
 
-# Predict using SAME feature set
-anomaly_scores = model.decision_function(X)
-anomaly_labels = model.predict(X)
+# ============================================================
+# MAIN
+# ============================================================
 
-# Convert format
-anomaly_labels = np.where(anomaly_labels == -1, 1, 0)
+if __name__ == "__main__":
 
-# Add results to dataframe
-df['anomaly_score'] = anomaly_scores
-df['anomaly'] = anomaly_labels
+    parser = argparse.ArgumentParser(description="IsolationForest anomaly detection")
+    parser.add_argument("mode", nargs="?", choices=["train", "score", "benchmark"],
+                        help="train a new model version, score with a persisted one, or "
+                             "measure scoring throughput per worker count "
+                             "(default: score, training first if no model exists)")
+    parser.add_argument("--input", default=INPUT_PATH)
+    parser.add_argument("--model", default=None, help="model artifact (default: latest version)")
+    parser.add_argument("--output", default=OUTPUT_PATH)
+    parser.add_argument("--workers", type=int, nargs="+", default=[SCORE_WORKERS],
+                        help="scoring processes (benchmark: list of counts to compare)")
+    parser.add_argument("--chunk-rows", type=int, default=SCORE_CHUNK_ROWS)
 
-# Save output
-output_path = "data/ai_detected_logs.csv"
-df.to_csv(output_path, index=False)
+    args = parser.parse_args()
 
-print("AI anomaly detection complete")
-print("Anomalies detected:", df['anomaly'].sum())
-print("Saved to:", output_path)
+    if args.mode == "train":
+        train(args.input)
+    elif args.mode == "score":
+        score(args.input, args.model, args.output, args.workers[0], args.chunk_rows)
+    elif args.mode == "benchmark":
+        benchmark(args.input, args.workers, args.model, args.chunk_rows)
+    else:
+        main(args.input, args.output)
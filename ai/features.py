@@ -0,0 +1,212 @@
+import numpy as np
+import pandas as pd
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+
+LOG_COLUMNS = [
+    "timestamp",
+    "user_id",
+    "ip_address",
+    "location",
+    "event_type"
+]
+
+EVENT_TYPES = [
+    "login_success",
+    "login_failure",
+    "file_access",
+    "password_change",
+    "unauthorized_access",
+    "privilege_escalation"
+]
+
+FAILURE_EVENTS = ["login_failure", "unauthorized_access"]
+
+# Rolling window for the per-user / per-IP rates
+WINDOW_SECONDS = 3600
+
+# Inter-arrival times are capped here; a key's first event gets the cap
+INTERARRIVAL_CAP = 86400.0
+
+# FeatureState forgets keys idle for longer than this. Past the cap a
+# gap reads the same as a first event, so the features stay exact
+# except for a location change after such a pause.
+HISTORY_SECONDS = max(WINDOW_SECONDS, INTERARRIVAL_CAP)
+
+# Code given to event types outside EVENT_TYPES
+UNSEEN_CODE = -1
+
+FEATURE_NAMES = [
+    "event_type",
+    "is_failure",
+    "hour_of_day",
+    "user_events_window",
+    "user_failure_ratio",
+    "user_interarrival_s",
+    "user_location_change",
+    "ip_events_window",
+    "ip_failure_ratio",
+    "ip_interarrival_s"
+]
+
+# ============================================================
+# VECTORIZED PER-KEY WINDOWS
+# ============================================================
+
+# Rows are sorted by (key, time) once, so each key's events are one
+# contiguous, time-ordered run. "Events of this key in the last window"
+# is then a bisection inside the row's own run, done for all rows at
+# once, and prefix sums give the failure counts.
+
+def _window_starts(t, group_start, window_us):
+    # First index j in [group_start[i], i] with t[j] >= t[i] - window_us
+
+    lo = group_start.copy()
+    hi = np.arange(len(t))
+
+    target = t - window_us
+
+    active = lo < hi
+
+    while active.any():
+
+        mid = (lo + hi) // 2
+
+        inside = t[mid] >= target
+
+        hi = np.where(active & inside, mid, hi)
+        lo = np.where(active & ~inside, mid + 1, lo)
+
+        active = lo < hi
+
+    return lo
+
+
+def _key_windows(keys, t_us, failures, window_us):
+
+    n = len(keys)
+
+    order = np.lexsort((t_us, keys))
+
+    k = keys[order]
+    t = t_us[order]
+    f = failures[order]
+
+    same_key = np.concatenate(([False], k[1:] == k[:-1]))
+
+    index = np.arange(n)
+    group_start = np.maximum.accumulate(np.where(same_key, 0, index))
+
+    left = _window_starts(t, group_start, window_us)
+
+    counts = index - left + 1
+
+    prefix = np.concatenate(([0], np.cumsum(f)))
+    failure_counts = prefix[index + 1] - prefix[left]
+
+    gaps = np.diff(t, prepend=t[0]) / 1e6
+
+    interarrival = np.where(same_key, np.minimum(gaps, INTERARRIVAL_CAP), INTERARRIVAL_CAP)
+
+    # Scatter back to input row order
+    result = np.empty((n, 3), dtype=np.float64)
+    result[order, 0] = counts
+    result[order, 1] = failure_counts / counts
+    result[order, 2] = interarrival
+
+    return result, order, same_key
+
+
+def _codes(values):
+
+    codes, _ = pd.factorize(values, use_na_sentinel=True)
+
+    return codes.astype(np.int64)
+
+
+def extract_features(df):
+
+    n = len(df)
+
+    X = np.zeros((n, len(FEATURE_NAMES)), dtype=np.float32)
+
+    if n == 0:
+        return X
+
+    timestamps = pd.to_datetime(df["timestamp"])
+    t_us = timestamps.to_numpy().astype("datetime64[us]").astype(np.int64)
+
+    event_codes = pd.Index(EVENT_TYPES).get_indexer(
+        pd.Index(np.asarray(df["event_type"], dtype=object)))
+
+    failures = np.isin(event_codes, [EVENT_TYPES.index(e) for e in FAILURE_EVENTS]) \
+        .astype(np.int64)
+
+    window_us = WINDOW_SECONDS * 1_000_000
+
+    users = _codes(df["user_id"])
+    user_stats, order, same_user = _key_windows(users, t_us, failures, window_us)
+
+    ips = _codes(df["ip_address"])
+    ip_stats, _, _ = _key_windows(ips, t_us, failures, window_us)
+
+    # Location change against the same user's previous event
+    locations = _codes(df["location"])[order]
+    changed = np.zeros(n, dtype=np.float32)
+    changed[order] = same_user & (locations != np.roll(locations, 1))
+
+    X[:, 0] = np.where(event_codes >= 0, event_codes, UNSEEN_CODE)
+    X[:, 1] = failures
+    X[:, 2] = timestamps.dt.hour.to_numpy()
+    X[:, 3:6] = user_stats
+    X[:, 6] = changed
+    X[:, 7:10] = ip_stats
+
+    return X
+
+# ============================================================
+# INCREMENTAL STATE (STREAMING / CHUNKED INPUT)
+# ============================================================
+
+class FeatureState:
+    # Carries the recent history between batches so windows, gaps and
+    # location changes stay exact across batch boundaries. Batches are
+    # expected in (roughly) increasing time order.
+
+    def __init__(self):
+        self.history = None
+
+    def transform(self, df):
+
+        batch = df[LOG_COLUMNS].reset_index(drop=True)
+
+        if self.history is None or self.history.empty:
+            combined = batch
+        else:
+            combined = pd.concat([self.history, batch], ignore_index=True)
+
+        X = extract_features(combined)[len(combined) - len(batch):]
+
+        self.history = self._trim(combined)
+
+        return X
+
+    def _trim(self, combined):
+
+        timestamps = pd.to_datetime(combined["timestamp"])
+        latest = timestamps.max()
+
+        window_cutoff = latest - pd.Timedelta(seconds=WINDOW_SECONDS)
+        history_cutoff = latest - pd.Timedelta(seconds=HISTORY_SECONDS)
+
+        # Events still inside the window, plus each key's latest event
+        # for the inter-arrival and location-change features, unless the
+        # key has been idle past HISTORY_SECONDS (keeps state bounded)
+        last_of_key = ~combined.duplicated("user_id", keep="last") \
+            | ~combined.duplicated("ip_address", keep="last")
+
+        keep = (timestamps >= window_cutoff) | (last_of_key & (timestamps >= history_cutoff))
+
+        return combined[keep.to_numpy()].reset_index(drop=True)
@@ -0,0 +1,277 @@
+import os
+import time
+import argparse
+import pandas as pd
+
+from data.storage import iter_logs, write_logs
+from data.encrypted_store import is_store
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+
+# The encrypted log store is filtered block by block in memory, so no
+# plaintext copy of the logs is needed. Spark cannot read the store:
+# partitioned mode filters the copy written by security.ecc_decrypt.
+INPUT_PATH = "data/encrypted_logs.enc"
+DECRYPTED_INPUT_PATH = "data/decrypted_logs.parquet"
+OUTPUT_PATH = "data/suspicious_logs.parquet"
+PARTITIONED_OUTPUT_PATH = "data/suspicious_logs_partitioned"
+
+# "auto" picks from input size; or one of ENGINES
+ENGINE = "auto"
+
+# "driver" hands the rows on in memory; "partitioned" (Spark only)
+# writes Parquet partitioned by day/location from the executors.
+WRITE_MODE = "driver"
+
+# Auto-selection thresholds on input size in bytes: below these a JVM
+# and SparkSession cost more than the filter itself.
+PANDAS_MAX_BYTES = 256 * 1024**2
+POLARS_MAX_BYTES = 16 * 1024**3
+
+PANDAS_CHUNK_ROWS = 1_000_000
+
+OUTPUT_COLUMNS = [
+    "timestamp",
+    "user_id",
+    "ip_address",
+    "location",
+    "event_type",
+    "label"
+]
+
+ATTACK_LABEL = "attack"
+
+# ============================================================
+# ENGINES
+# ============================================================
+
+# Every engine has a name and a filter(input_path, write_mode) method
+# returning (suspicious rows, total rows scanned). The rows
+# go through normalize() so all backends hand on identical frames.
+
+def filter_frame(df):
+
+    # The filter predicate shared by every engine and by streaming batches
+    return df[df["label"] == ATTACK_LABEL]
+
+
+class PandasEngine:
+
+    name = "pandas"
+
+    def __init__(self, start=None, end=None):
+        # Time range, only for encrypted log store inputs
+        self.start = start
+        self.end = end
+
+    def chunks(self, input_path):
+
+        # An encrypted store is decrypted block by block in memory, and
+        # only the blocks whose time range overlaps [start, end); no
+        # plaintext copy is written
+        if is_store(input_path):
+            from security import ecc_hybrid
+            yield from ecc_hybrid.open_store(input_path) \
+                .iter_blocks(self.start, self.end, columns=OUTPUT_COLUMNS)
+            return
+
+        yield from iter_logs(input_path, columns=OUTPUT_COLUMNS,
+                             batch_size=PANDAS_CHUNK_ROWS)
+
+    def filter(self, input_path, write_mode="driver"):
+
+        total = 0
+        parts = []
+
+        for chunk in self.chunks(input_path):
+            total += len(chunk)
+            parts.append(filter_frame(chunk))
+
+        if not parts:
+            return pd.DataFrame(columns=OUTPUT_COLUMNS), 0
+
+        return pd.concat(parts, ignore_index=True), total
+
+
+class PolarsEngine:
+
+    name = "polars"
+
+    def filter(self, input_path, write_mode="driver"):
+
+        import polars as pl
+
+        if input_path.endswith(".csv"):
+            logs = pl.scan_csv(input_path, try_parse_dates=True)
+        else:
+            logs = pl.scan_parquet(input_path)
+
+        total = logs.select(pl.len()).collect().item()
+
+        suspicious = logs \
+            .select(OUTPUT_COLUMNS) \
+            .filter(pl.col("label") == ATTACK_LABEL) \
+            .collect()
+
+        return suspicious.to_pandas(), total
+
+
+class SparkEngine:
+
+    name = "spark"
+
+    def filter(self, input_path, write_mode="driver"):
+
+        # Imported lazily: only this engine needs pyspark and a JVM
+        from bigdata import spark_processing
+
+        return spark_processing.filter_logs(input_path, write_mode)
+
+
+ENGINES = {
+    "pandas": PandasEngine,
+    "polars": PolarsEngine,
+    "spark": SparkEngine
+}
+
+# ============================================================
+# ENGINE SELECTION
+# ============================================================
+
+def input_size(path):
+
+    if not os.path.isdir(path):
+        return os.path.getsize(path)
+
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, files in os.walk(path) for name in files)
+
+
+def polars_available():
+
+    try:
+        import polars  # noqa: F401
+    except ImportError:
+        return False
+
+    return True
+
+
+def select_engine(input_path, engine="auto", write_mode="driver", start=None, end=None):
+
+    # Encrypted stores are only readable through the pandas engine
+    if is_store(input_path):
+        if engine not in ("auto", "pandas") or write_mode == "partitioned":
+            raise ValueError("Encrypted log stores are filtered with the pandas engine "
+                             "(or decrypt first: python -m security.ecc_decrypt, then "
+                             f"--input {DECRYPTED_INPUT_PATH})")
+        return PandasEngine(start, end)
+
+    if start is not None or end is not None:
+        raise ValueError("A time range needs an encrypted log store input")
+
+    if engine != "auto":
+        return ENGINES[engine]()
+
+    # Only Spark writes partitioned output from the executors
+    if write_mode == "partitioned":
+        return SparkEngine()
+
+    size = input_size(input_path)
+
+    if size <= PANDAS_MAX_BYTES:
+        return PandasEngine()
+
+    if size <= POLARS_MAX_BYTES and polars_available():
+        return PolarsEngine()
+
+    return SparkEngine()
+
+
+def default_input_path(write_mode=None):
+
+    if (write_mode or WRITE_MODE) == "partitioned":
+        return DECRYPTED_INPUT_PATH
+
+    return INPUT_PATH
+
+
+def output_path(write_mode=None):
+
+    if (write_mode or WRITE_MODE) == "partitioned":
+        return PARTITIONED_OUTPUT_PATH
+
+    return OUTPUT_PATH
+
+# ============================================================
+# OUTPUT NORMALIZATION
+# ============================================================
+
+def normalize(df):
+
+    df = df[OUTPUT_COLUMNS].reset_index(drop=True)
+
+    df["timestamp"] = pd.to_datetime(df["timestamp"]).astype("datetime64[ns]")
+
+    # Categories from the observed values, sorted, whatever the source
+    for column in OUTPUT_COLUMNS[1:]:
+        df[column] = df[column].astype(object).astype("category")
+
+    return df
+
+# ============================================================
+# STAGE
+# ============================================================
+
+def main(input_path=None, engine=None, write_mode=None, start=None, end=None):
+
+    input_path = input_path or default_input_path(write_mode)
+
+    engine = select_engine(input_path, engine or ENGINE, write_mode or WRITE_MODE, start, end)
+
+    print("Filter engine:", engine.name)
+
+    start_time = time.time()
+
+    suspicious, total = engine.filter(input_path, write_mode or WRITE_MODE)
+
+    elapsed = time.time() - start_time
+
+    rows_per_sec = total / elapsed if elapsed > 0 else float("inf")
+
+    print(f"Engine: {engine.name} | Rows scanned: {total} | "
+          f"Time: {elapsed:.2f} s | Throughput: {rows_per_sec:,.0f} rows/sec")
+
+    if isinstance(suspicious, str):
+        return suspicious
+
+    suspicious = normalize(suspicious)
+
+    print("Suspicious entries:", len(suspicious))
+
+    write_logs(suspicious, OUTPUT_PATH)
+
+    print("Suspicious logs saved successfully at:", OUTPUT_PATH)
+
+    return suspicious
+
+# ============================================================
+# MAIN
+# ============================================================
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Suspicious-log filter with pluggable engines")
+    parser.add_argument("--input", help=f"default: {INPUT_PATH} ({DECRYPTED_INPUT_PATH} "
+                        "with --mode partitioned)")
+    parser.add_argument("--engine", choices=["auto"] + list(ENGINES), default=ENGINE,
+                        help="force a backend instead of choosing from input size")
+    parser.add_argument("--mode", choices=["driver", "partitioned"], default=WRITE_MODE)
+    parser.add_argument("--start", help="encrypted store input: only rows with timestamp >= start")
+    parser.add_argument("--end", help="encrypted store input: only rows with timestamp < end")
+
+    args = parser.parse_args()
+
+    main(args.input, args.engine, args.mode, args.start, args.end)
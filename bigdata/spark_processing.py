@@ -1,32 +1,143 @@
 import os
-os.environ["HADOOP_HOME"] = "C:\\hadoop"
+import argparse
+
+# Windows needs winutils from a local Hadoop install; Linux and macOS
+# run the local-mode session without it.
+if os.name == "nt":
+    os.environ.setdefault("HADOOP_HOME", "C:\\hadoop")
 
 from pyspark.sql import SparkSession
+from pyspark.sql import functions as F
+from pyspark.sql.types import StructType, StructField, StringType, TimestampType
+
+from data.storage import write_logs
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+
+INPUT_PATH = "data/decrypted_logs.parquet"
+OUTPUT_PATH = "data/suspicious_logs.parquet"
+PARTITIONED_OUTPUT_PATH = "data/suspicious_logs_partitioned"
+
+SPARK_MASTER = "local[*]"
+
+# "driver": collect the filtered rows and hand them on in memory.
+# "partitioned": executors write Parquet partitioned by day/location.
+WRITE_MODE = "driver"
+
+PARTITION_COLUMNS = ["day", "location"]
+
+LOG_SCHEMA = StructType([
+    StructField("timestamp", TimestampType(), True),
+    StructField("user_id", StringType(), True),
+    StructField("ip_address", StringType(), True),
+    StructField("location", StringType(), True),
+    StructField("event_type", StringType(), True),
+    StructField("label", StringType(), True)
+])
+
+# ============================================================
+# SESSION / INPUT
+# ============================================================
+
+def get_session():
+
+    return SparkSession.builder \
+        .appName("Secure Log Analysis") \
+        .master(SPARK_MASTER) \
+        .config("spark.sql.execution.arrow.pyspark.enabled", "true") \
+        .getOrCreate()
+
+
+def read_input(spark, input_path):
+
+    # Explicit schema: no inference pass over the data
+    if input_path.endswith(".csv"):
+        return spark.read.csv(input_path, header=True, schema=LOG_SCHEMA)
+
+    return spark.read.schema(LOG_SCHEMA).parquet(input_path)
+
+
+def output_path(write_mode=None):
+
+    if (write_mode or WRITE_MODE) == "partitioned":
+        return PARTITIONED_OUTPUT_PATH
+
+    return OUTPUT_PATH
+
+# ============================================================
+# FILTERING
+# ============================================================
+
+def filter_logs(input_path=INPUT_PATH, write_mode=None):
+    # Returns (suspicious rows or partitioned dataset path, total rows)
+
+    write_mode = write_mode or WRITE_MODE
+
+    spark = get_session()
+
+    df = read_input(spark, input_path)
+
+    total = df.count()
+
+    print("Total log entries:", total)
+
+    print("Schema:")
+    df.printSchema()
+
+    print("Sample logs:")
+    df.show(5)
+
+    suspicious = df.filter(df.label == "attack")
+
+    if write_mode == "partitioned":
+
+        # Executors write their own partitions; nothing is collected
+        suspicious \
+            .withColumn("day", F.to_date("timestamp").cast("string")) \
+            .write \
+            .mode("overwrite") \
+            .partitionBy(*PARTITION_COLUMNS) \
+            .parquet(PARTITIONED_OUTPUT_PATH)
+
+        print("Suspicious logs written partitioned by",
+              "/".join(PARTITION_COLUMNS), "at:", PARTITIONED_OUTPUT_PATH)
+
+        return PARTITIONED_OUTPUT_PATH, total
+
+    count = suspicious.count()
+    print("Suspicious entries:", count)
+
+    # Convert Spark DataFrame → Pandas DataFrame
+    return suspicious.toPandas(), total
+
+
+def main(input_path=INPUT_PATH, write_mode=None):
 
-spark = SparkSession.builder \
-    .appName("Secure Log Analysis") \
-    .getOrCreate()
+    suspicious, _ = filter_logs(input_path, write_mode)
 
-df = spark.read.csv("data/decrypted_logs.csv", header=True, inferSchema=True)
+    if isinstance(suspicious, str):
+        return suspicious
 
-print("Total log entries:", df.count())
+    # Save using pandas (NOT Spark)
+    write_logs(suspicious, OUTPUT_PATH)
 
-print("Schema:")
-df.printSchema()
+    print("Suspicious logs saved successfully at:", OUTPUT_PATH)
 
-print("Sample logs:")
-df.show(5)
+    return suspicious
 
-suspicious = df.filter(df.label == "attack")
+# ============================================================
+# MAIN
+# ============================================================
 
-count = suspicious.count()
-print("Suspicious entries:", count)
+if __name__ == "__main__":
 
-# Convert Spark DataFrame → Pandas DataFrame
-suspicious_pd = suspicious.toPandas()
+    parser = argparse.ArgumentParser(description="Spark suspicious-log filter")
+    parser.add_argument("--input", default=INPUT_PATH)
+    parser.add_argument("--mode", choices=["driver", "partitioned"], default=WRITE_MODE,
+                        help="collect to the driver, or write partitioned Parquet from the executors")
 
-# Save using pandas (NOT Spark)
-output_path = "data/suspicious_logs.csv"
-suspicious_pd.to_csv(output_path, index=False)
+    args = parser.parse_args()
 
-print("Suspicious logs saved successfully at:", output_path)
+    main(args.input, args.mode)
@@ -3,73 +3,101 @@ import time
 import pandas as pd
 import numpy as np
 
-print("\nLoading AI detected anomalies...\n")
+from data.storage import read_logs
 
-df = pd.read_csv("data/ai_detected_logs.csv")
+# ============================================================
+# CONFIGURATION
+# ============================================================
+
+INPUT_PATH = "data/ai_detected_logs.parquet"
+OUTPUT_PATH = "evaluation/classical_results.csv"
+
+# ============================================================
+# CLASSICAL LINEAR SEARCH
+# ============================================================
+
+def linear_search(df):
+
+    # If anomaly_score exists, use it
+    if "anomaly_score" in df.columns:
+        scores = df["anomaly_score"].values
+
+        max_index = 0
+        max_score = scores[0]
 
-total_records = len(df)
+        for i in range(1, len(scores)):
+            if scores[i] > max_score:
+                max_score = scores[i]
+                max_index = i
 
-print("Total anomaly records:", total_records)
+        detected_indices = np.where(scores > np.percentile(scores, 90))[0]
 
-if total_records == 0:
-    print("No data found.")
-    exit()
+    else:
+        # fallback if anomaly_score column missing
+        max_index = 0
+        max_score = 1
+        detected_indices = [0]
+
+    return max_index, detected_indices
 
 # ============================================================
-# CLASSICAL LINEAR SEARCH
+# EXECUTION
 # ============================================================
 
-start_time = time.time()
+def main(ai_detected_logs=None):
 
-# If anomaly_score exists, use it
-if "anomaly_score" in df.columns:
-    scores = df["anomaly_score"].values
-    
-    max_index = 0
-    max_score = scores[0]
+    if ai_detected_logs is None or isinstance(ai_detected_logs, str):
+        print("\nLoading AI detected anomalies...\n")
+        ai_detected_logs = read_logs(ai_detected_logs or INPUT_PATH, columns=["anomaly_score"])
 
-    for i in range(1, len(scores)):
-        if scores[i] > max_score:
-            max_score = scores[i]
-            max_index = i
+    df = ai_detected_logs
 
-    detected_indices = np.where(scores > np.percentile(scores, 90))[0]
+    total_records = len(df)
 
-else:
-    # fallback if anomaly_score column missing
-    max_index = 0
-    max_score = 1
-    detected_indices = [0]
+    print("Total anomaly records:", total_records)
 
-end_time = time.time()
+    if total_records == 0:
+        print("No data found.")
+        return None
 
-execution_time = end_time - start_time
+    start_time = time.time()
 
-detected_attacks = len(detected_indices)
+    max_index, detected_indices = linear_search(df)
 
-detection_rate = detected_attacks / total_records
+    end_time = time.time()
 
-print("\nClassical Search Results:")
-print("Highest anomaly index:", max_index)
-print("Detected attacks:", detected_attacks)
-print("Execution time (seconds):", execution_time)
-print("Detection rate:", detection_rate)
+    execution_time = end_time - start_time
 
-# ============================================================
-# SAVE RESULTS
-# ============================================================
+    detected_attacks = len(detected_indices)
+
+    detection_rate = detected_attacks / total_records
+
+    print("\nClassical Search Results:")
+    print("Highest anomaly index:", max_index)
+    print("Detected attacks:", detected_attacks)
+    print("Execution time (seconds):", execution_time)
+    print("Detection rate:", detection_rate)
+
+    # ========================================================
+    # SAVE RESULTS
+    # ========================================================
+
+    os.makedirs("evaluation", exist_ok=True)
+
+    results = {
+        "total_records": total_records,
+        "detected_attacks": detected_attacks,
+        "detection_rate": detection_rate,
+        "execution_time_seconds": execution_time
+    }
 
-os.makedirs("evaluation", exist_ok=True)
+    df_out = pd.DataFrame([results])
 
-results = {
-    "total_records": total_records,
-    "detected_attacks": detected_attacks,
-    "detection_rate": detection_rate,
-    "execution_time_seconds": execution_time
-}
+    df_out.to_csv(OUTPUT_PATH, index=False)
 
-df_out = pd.DataFrame([results])
+    print("\nSaved:", OUTPUT_PATH, "\n")
 
-df_out.to_csv("evaluation/classical_results.csv", index=False)
+    return df_out
 
-print("\nSaved: evaluation/classical_results.csv\n")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
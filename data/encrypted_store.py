@@ -0,0 +1,364 @@
+import os
+import struct
+import argparse
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from Crypto.Cipher import AES
+
+from data.storage import TIMESTAMP_COLUMN, LogWriter, parquet_bytes
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+
+# Rows per encrypted block: the unit a time-range query decrypts.
+# Input in timestamp order (as the log generator writes it) keeps each
+# block's time range narrow, so a one-day query touches few blocks.
+BLOCK_ROWS = 16_384
+
+MAGIC = b"QLOG"
+VERSION = 1
+
+# ============================================================
+# FORMAT
+# ============================================================
+
+# header | key info | block 0 | block 1 | ... | index | index tag | footer
+#
+# header: magic, version, key info length, 8-byte random nonce prefix
+# key info: opaque bytes for whoever wraps the data key (e.g. the
+#           binary ECC key header, security/ecc_hybrid.py); the store
+#           never reads it
+# block:  one Parquet file of BLOCK_ROWS rows, AES-256-GCM sealed
+# index:  per block (first timestamp, last timestamp, rows, offset,
+#         length, tag); timestamps are microseconds since the epoch
+# footer: index offset, block count, magic
+#
+# Blocks are written as they fill, the index once at close, so writing
+# streams. The index is plaintext: it reveals only per-block time
+# ranges and row counts, which is what lets a reader seek to the blocks
+# of a query without decrypting anything else. It cannot be forged:
+# block i is sealed with nonce prefix || uint32(i) and its index entry
+# (minus the tag) as AAD, and the whole index carries its own tag, so
+# hidden, edited or reordered blocks are rejected.
+
+HEADER = struct.Struct(">4sBI8s")
+ENTRY = struct.Struct(">IqqQQQ")
+TAG_SIZE = 16
+FOOTER = struct.Struct(">QI4s")
+
+# Nonce counter value reserved for the index tag
+INDEX_NONCE = 0xFFFFFFFF
+
+
+def _cipher(key, prefix, counter, aad):
+
+    cipher = AES.new(key, AES.MODE_GCM, nonce=prefix + struct.pack(">I", counter))
+    cipher.update(aad)
+
+    return cipher
+
+
+def _to_us(value):
+
+    return pd.Timestamp(value).value // 1000
+
+
+def _read_index(f):
+    # Returns (footer, index bytes, index tag, entries). Nothing here
+    # needs the key; the caller verifies the index tag.
+
+    size = f.seek(0, os.SEEK_END)
+
+    if size < HEADER.size + FOOTER.size:
+        raise ValueError(f"{f.name} is too short to be an encrypted log store")
+
+    f.seek(-FOOTER.size, os.SEEK_END)
+    footer = f.read(FOOTER.size)
+
+    index_offset, blocks, magic = FOOTER.unpack(footer)
+
+    if magic != MAGIC:
+        raise ValueError(f"{f.name} has no index (incomplete write?)")
+
+    # The footer is not authenticated until the index tag is checked, so
+    # its block count must fit the file before anything is read by it
+    if index_offset + blocks * (ENTRY.size + TAG_SIZE) + TAG_SIZE + FOOTER.size != size:
+        raise ValueError(f"{f.name} has an index that does not match its size")
+
+    f.seek(index_offset)
+    index = f.read(blocks * (ENTRY.size + TAG_SIZE))
+    tag = f.read(TAG_SIZE)
+
+    if len(tag) != TAG_SIZE:
+        raise ValueError(f"{f.name} has a truncated index")
+
+    entries = []
+
+    for position in range(0, len(index), ENTRY.size + TAG_SIZE):
+
+        aad = index[position:position + ENTRY.size]
+
+        number, first, last, rows, offset, length = ENTRY.unpack(aad)
+
+        entries.append({
+            "block": number,
+            "first": first,
+            "last": last,
+            "rows": rows,
+            "offset": offset,
+            "length": length,
+            "aad": aad,
+            "tag": index[position + ENTRY.size:position + ENTRY.size + TAG_SIZE]
+        })
+
+    return footer, index, tag, entries
+
+
+def is_store(path):
+
+    if not os.path.isfile(path):
+        return False
+
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+# ============================================================
+# WRITING
+# ============================================================
+
+class EncryptedLogWriter:
+    # Same interface as storage.LogWriter: rows are buffered into
+    # BLOCK_ROWS blocks, each sealed and appended as soon as it fills.
+
+    def __init__(self, path, key, key_info=b"", block_rows=BLOCK_ROWS):
+
+        self.path = path
+        self.key = key
+        self.block_rows = block_rows
+        self.rows = 0
+
+        self._prefix = os.urandom(8)
+        self._header = HEADER.pack(MAGIC, VERSION, len(key_info), self._prefix) + key_info
+        self._entries = []
+        self._pending = []
+        self._pending_rows = 0
+
+        self._file = open(path, "wb")
+        self._file.write(self._header)
+
+    def write(self, df):
+
+        self._pending.append(df)
+        self._pending_rows += len(df)
+        self.rows += len(df)
+
+        if self._pending_rows >= self.block_rows:
+
+            rows = pd.concat(self._pending, ignore_index=True)
+
+            full = len(rows) - len(rows) % self.block_rows
+
+            for start in range(0, full, self.block_rows):
+                self._seal(rows.iloc[start:start + self.block_rows])
+
+            self._pending = [rows.iloc[full:]]
+            self._pending_rows = len(rows) - full
+
+    def _seal(self, block):
+
+        index = len(self._entries)
+
+        if index >= INDEX_NONCE:
+            raise ValueError(f"Store exceeds {INDEX_NONCE} blocks")
+
+        timestamps = pd.to_datetime(block[TIMESTAMP_COLUMN]).values.astype("datetime64[us]")
+
+        payload = parquet_bytes(block)
+
+        entry = ENTRY.pack(index,
+                           int(timestamps.min().astype(np.int64)),
+                           int(timestamps.max().astype(np.int64)),
+                           len(block), self._file.tell(), len(payload))
+
+        ciphertext, tag = _cipher(self.key, self._prefix, index,
+                                  self._header + entry).encrypt_and_digest(payload)
+
+        self._file.write(ciphertext)
+
+        self._entries.append(entry + tag)
+
+    def close(self):
+
+        if self._file is None:
+            return
+
+        if self._pending_rows:
+            self._seal(pd.concat(self._pending, ignore_index=True))
+
+        index = b"".join(self._entries)
+        footer = FOOTER.pack(self._file.tell(), len(self._entries), MAGIC)
+
+        _, tag = _cipher(self.key, self._prefix, INDEX_NONCE,
+                         self._header + index + footer).encrypt_and_digest(b"")
+
+        self._file.write(index)
+        self._file.write(tag)
+        self._file.write(footer)
+
+        self._file.close()
+        self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# ============================================================
+# READING
+# ============================================================
+
+def read_key_info(path):
+    # The key info is needed to recover the key, so it is readable
+    # before the store is opened (and authenticated once it is)
+
+    with open(path, "rb") as f:
+
+        magic, version, key_info_length, _ = HEADER.unpack(f.read(HEADER.size))
+
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not an encrypted log store")
+
+        return f.read(key_info_length)
+
+
+class EncryptedLogStore:
+
+    def __init__(self, path, key):
+
+        self.path = path
+        self.key = key
+
+        with open(path, "rb") as f:
+
+            header = f.read(HEADER.size)
+
+            if len(header) != HEADER.size:
+                raise ValueError(f"{path} is not an encrypted log store")
+
+            magic, version, key_info_length, self._prefix = HEADER.unpack(header)
+
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not an encrypted log store")
+
+            if version != VERSION:
+                raise ValueError(f"Unsupported encrypted log store version {version}")
+
+            self._header = header + f.read(key_info_length)
+
+            footer, index, tag, self.entries = _read_index(f)
+
+        _cipher(key, self._prefix, INDEX_NONCE,
+                self._header + index + footer).decrypt_and_verify(b"", tag)
+
+        self.rows = sum(entry["rows"] for entry in self.entries)
+
+    def blocks_for(self, start=None, end=None):
+        # Blocks whose time range overlaps [start, end)
+
+        start_us = _to_us(start) if start is not None else None
+        end_us = _to_us(end) if end is not None else None
+
+        return [entry for entry in self.entries
+                if (start_us is None or entry["last"] >= start_us)
+                and (end_us is None or entry["first"] < end_us)]
+
+    def _open(self, entry, ciphertext, columns):
+
+        payload = _cipher(self.key, self._prefix, entry["block"],
+                          self._header + entry["aad"]).decrypt_and_verify(ciphertext, entry["tag"])
+
+        return pq.read_table(pa.BufferReader(payload), columns=columns).to_pandas()
+
+    def iter_blocks(self, start=None, end=None, columns=None):
+        # Yields one decrypted DataFrame per block in range, trimmed to
+        # [start, end); only those blocks are read and decrypted
+
+        selected = self.blocks_for(start, end)
+
+        wanted = columns
+        if columns is not None and (start is not None or end is not None) \
+                and TIMESTAMP_COLUMN not in columns:
+            wanted = list(columns) + [TIMESTAMP_COLUMN]
+
+        with open(self.path, "rb") as f:
+
+            for entry in selected:
+
+                f.seek(entry["offset"])
+
+                df = self._open(entry, f.read(entry["length"]), wanted)
+
+                if start is not None or end is not None:
+
+                    timestamps = df[TIMESTAMP_COLUMN]
+                    keep = np.ones(len(df), dtype=bool)
+
+                    if start is not None:
+                        keep &= (timestamps >= pd.Timestamp(start)).to_numpy()
+                    if end is not None:
+                        keep &= (timestamps < pd.Timestamp(end)).to_numpy()
+
+                    df = df[keep].reset_index(drop=True)
+
+                    if wanted is not columns:
+                        df = df[list(columns)]
+
+                yield df
+
+    def read(self, start=None, end=None, columns=None):
+
+        parts = list(self.iter_blocks(start, end, columns))
+
+        if not parts:
+            return pd.DataFrame(columns=columns)
+
+        return pd.concat(parts, ignore_index=True)
+
+    def export(self, output_path, start=None, end=None, columns=None):
+
+        with LogWriter(output_path) as writer:
+            for df in self.iter_blocks(start, end, columns):
+                writer.write(df)
+
+        return writer.rows
+
+# ============================================================
+# MAIN
+# ============================================================
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Inspect the plaintext index of an encrypted log store")
+    parser.add_argument("path")
+    parser.add_argument("--start", help="only blocks overlapping [start, end)")
+    parser.add_argument("--end")
+
+    args = parser.parse_args()
+
+    # The index can be listed without the key; opening blocks needs it
+    with open(args.path, "rb") as f:
+        _, _, _, entries = _read_index(f)
+
+    start_us = _to_us(args.start) if args.start else None
+    end_us = _to_us(args.end) if args.end else None
+
+    for entry in entries:
+        if (start_us is None or entry["last"] >= start_us) and (end_us is None or entry["first"] < end_us):
+            print(f"block {entry['block']}: {pd.Timestamp(entry['first'], unit='us')} .. "
+                  f"{pd.Timestamp(entry['last'], unit='us')} | {entry['rows']:,} rows | "
+                  f"offset {entry['offset']:,} | {entry['length']:,} bytes")
@@ -1,9 +1,29 @@
-import pandas as pd
+import argparse
 import numpy as np
-import random
+import pandas as pd
 from datetime import datetime, timedelta
 
-num_logs = 100000
+from data.storage import LogWriter
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+
+NUM_LOGS = 100000
+ATTACK_RATIO = 0.05
+CHUNK_SIZE = 1_000_000
+SPAN_SECONDS = 2592000  # 30 days
+
+OUTPUT_PATH = "data/raw_logs.parquet"
+
+COLUMNS = [
+    "timestamp",
+    "user_id",
+    "ip_address",
+    "location",
+    "event_type",
+    "label"
+]
 
 users = [f"user_{i}" for i in range(1, 501)]
 
@@ -26,49 +46,114 @@ attack_events = [
     "privilege_escalation"
 ]
 
-logs = []
+labels = ["normal", "attack"]
 
-start_time = datetime.now() - timedelta(days=30)
+# Normal traffic draws from the first four event types
+NORMAL_CODES = np.arange(4, dtype=np.int8)
+ATTACK_CODES = np.array([event_types.index(e) for e in attack_events], dtype=np.int8)
 
-for i in range(num_logs):
+# ============================================================
+# VECTORIZED CHUNK GENERATION
+# ============================================================
 
-    timestamp = start_time + timedelta(seconds=random.randint(0, 2592000))
+# Each chunk owns a disjoint, increasing slice of the 30-day window
+# proportional to its row count, so sorting the timestamps inside a
+# chunk is enough for the whole stream to come out in time order.
 
-    user = random.choice(users)
+def generate_chunks(num_logs=NUM_LOGS, attack_ratio=ATTACK_RATIO, seed=None,
+                    chunk_size=CHUNK_SIZE, start_time=None):
 
-    ip = random.choice(ips)
+    rng = np.random.default_rng(seed)
 
-    location = random.choice(locations)
+    if start_time is None:
+        start_time = datetime.now() - timedelta(days=30)
 
-    if random.random() < 0.95:
-        event = random.choice(event_types[:4])
-        label = "normal"
-    else:
-        event = random.choice(attack_events)
-        label = "attack"
+    start_us = np.datetime64(start_time, "us").astype(np.int64)
 
-    logs.append([
-        timestamp,
-        user,
-        ip,
-        location,
-        event,
-        label
-    ])
+    for chunk_start in range(0, num_logs, chunk_size):
 
-df = pd.DataFrame(logs, columns=[
-    "timestamp",
-    "user_id",
-    "ip_address",
-    "location",
-    "event_type",
-    "label"
-])
+        size = min(chunk_size, num_logs - chunk_start)
+
+        low = SPAN_SECONDS * chunk_start // num_logs
+        high = max(SPAN_SECONDS * (chunk_start + size) // num_logs, low + 1)
+
+        offsets = rng.integers(low, high, size, dtype=np.int64)
+        offsets.sort()
+
+        timestamps = (start_us + offsets * 1_000_000).astype("datetime64[us]")
+
+        is_attack = rng.random(size) < attack_ratio
+
+        event_codes = np.where(
+            is_attack,
+            ATTACK_CODES[rng.integers(0, len(ATTACK_CODES), size)],
+            NORMAL_CODES[rng.integers(0, len(NORMAL_CODES), size)]
+        )
+
+        yield pd.DataFrame({
+            "timestamp": timestamps,
+            "user_id": pd.Categorical.from_codes(
+                rng.integers(0, len(users), size, dtype=np.int16), users),
+            "ip_address": pd.Categorical.from_codes(
+                rng.integers(0, len(ips), size, dtype=np.int16), ips),
+            "location": pd.Categorical.from_codes(
+                rng.integers(0, len(locations), size, dtype=np.int8), locations),
+            "event_type": pd.Categorical.from_codes(event_codes, event_types),
+            "label": pd.Categorical.from_codes(is_attack.astype(np.int8), labels)
+        }, columns=COLUMNS)
+
+# ============================================================
+# STREAMING WRITER
+# ============================================================
+
+# Parquet by default; a .csv output path streams plain CSV instead.
+
+def write_log_chunks(chunks, output_path=OUTPUT_PATH):
+
+    first = None
+
+    with LogWriter(output_path) as writer:
+        for chunk in chunks:
+            writer.write(chunk)
+            if first is None:
+                first = chunk.head()
+
+    return writer.rows, first
+
+# ============================================================
+# MAIN
+# ============================================================
+
+def parse_args():
+
+    parser = argparse.ArgumentParser(description="Synthetic security log generator")
+
+    parser.add_argument("--rows", type=int, default=NUM_LOGS,
+                        help="number of log rows to generate")
+    parser.add_argument("--attack-ratio", type=float, default=ATTACK_RATIO,
+                        help="fraction of rows labelled as attacks")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="random seed for reproducible corpora")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE,
+                        help="rows generated and written per chunk (bounds memory)")
+    parser.add_argument("--output", default=OUTPUT_PATH,
+                        help="destination file (.parquet or .csv)")
+
+    return parser.parse_args()
+
+
+def main(num_logs=NUM_LOGS, attack_ratio=ATTACK_RATIO, seed=None,
+         chunk_size=CHUNK_SIZE, output_path=OUTPUT_PATH):
+
+    chunks = generate_chunks(num_logs, attack_ratio, seed, chunk_size)
+
+    total, first = write_log_chunks(chunks, output_path)
 
-df = df.sort_values("timestamp")
+    print("Log dataset generated successfully")
+    print("Total logs:", total)
+    print(first)
 
-df.to_csv("data/raw_logs.csv", index=False)
 
-print("Log dataset generated successfully")
-print("Total logs:", len(df))
-print(df.head())
+if __name__ == "__main__":
+    args = parse_args()
+    main(args.rows, args.attack_ratio, args.seed, args.chunk_size, args.output)
@@ -0,0 +1,226 @@
+import os
+import argparse
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+
+# Low-cardinality string columns are stored dictionary-encoded and
+# read back as pandas Categoricals.
+DICTIONARY_COLUMNS = ["user_id", "ip_address", "location", "event_type", "label"]
+
+TIMESTAMP_COLUMN = "timestamp"
+
+# Per-column codecs: the dictionary pages are tiny so the index
+# streams get the cheap codec, timestamps and floats compress best
+# with zstd.
+COLUMN_COMPRESSION = {
+    "timestamp": "zstd",
+    "user_id": "snappy",
+    "ip_address": "snappy",
+    "location": "snappy",
+    "event_type": "snappy",
+    "label": "snappy",
+    "anomaly_score": "zstd",
+    "anomaly": "zstd"
+}
+
+DEFAULT_COMPRESSION = "zstd"
+
+ROW_GROUP_SIZE = 1_000_000
+
+# ============================================================
+# SCHEMA
+# ============================================================
+
+def to_arrow(df):
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    fields = []
+
+    for f in table.schema:
+        if f.name in DICTIONARY_COLUMNS and not pa.types.is_dictionary(f.type) \
+                and (pa.types.is_string(f.type) or pa.types.is_large_string(f.type)):
+            f = f.with_type(pa.dictionary(pa.int32(), pa.string()))
+        elif f.name == TIMESTAMP_COLUMN and pa.types.is_timestamp(f.type):
+            f = f.with_type(pa.timestamp("us"))
+        fields.append(f)
+
+    return table.cast(pa.schema(fields))
+
+
+def _compression(schema):
+
+    return {name: COLUMN_COMPRESSION.get(name, DEFAULT_COMPRESSION)
+            for name in schema.names}
+
+
+def _dictionary_columns(schema):
+
+    return [name for name in schema.names if name in DICTIONARY_COLUMNS]
+
+# ============================================================
+# WRITING
+# ============================================================
+
+class LogWriter:
+    # Streams DataFrame chunks into one Parquet (or CSV) file; the
+    # format follows the file extension.
+
+    def __init__(self, path):
+        self.path = path
+        self.rows = 0
+        self._writer = None
+        self._csv = None
+
+    def write(self, df):
+
+        if self.path.endswith(".csv"):
+            if self._csv is None:
+                self._csv = open(self.path, "w", newline="")
+            df.to_csv(self._csv, header=(self.rows == 0), index=False)
+        else:
+            table = to_arrow(df)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(
+                    self.path,
+                    table.schema,
+                    compression=_compression(table.schema),
+                    use_dictionary=_dictionary_columns(table.schema)
+                )
+            else:
+                table = table.cast(self._writer.schema)
+            self._writer.write_table(table, row_group_size=ROW_GROUP_SIZE)
+
+        self.rows += len(df)
+
+    def close(self):
+
+        if self._writer is not None:
+            self._writer.close()
+        if self._csv is not None:
+            self._csv.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_logs(df, path):
+
+    with LogWriter(path) as writer:
+        writer.write(df)
+
+    return path
+
+
+def parquet_bytes(df):
+    # One DataFrame as an in-memory Parquet file with the same encoding
+    # and codecs as LogWriter (used for encrypted store blocks)
+
+    table = to_arrow(df)
+
+    sink = pa.BufferOutputStream()
+
+    pq.write_table(table, sink,
+                   compression=_compression(table.schema),
+                   use_dictionary=_dictionary_columns(table.schema))
+
+    return sink.getvalue().to_pybytes()
+
+# ============================================================
+# READING
+# ============================================================
+
+def _csv_dates(path, columns):
+
+    wanted = columns if columns is not None else pd.read_csv(path, nrows=0).columns
+
+    return [TIMESTAMP_COLUMN] if TIMESTAMP_COLUMN in wanted else False
+
+
+def read_logs(path, columns=None):
+
+    if path.endswith(".csv"):
+        return pd.read_csv(path, usecols=columns, parse_dates=_csv_dates(path, columns))
+
+    # Only the requested column chunks are read from disk; a directory
+    # is read as a hive-partitioned dataset (e.g. Spark output)
+    return pq.read_table(path, columns=columns).to_pandas()
+
+
+def iter_logs(path, columns=None, batch_size=ROW_GROUP_SIZE):
+
+    if path.endswith(".csv"):
+        yield from pd.read_csv(path, usecols=columns, chunksize=batch_size,
+                               parse_dates=_csv_dates(path, columns))
+        return
+
+    if os.path.isdir(path):
+        batches = ds.dataset(path, format="parquet", partitioning="hive") \
+            .to_batches(columns=columns, batch_size=batch_size)
+    else:
+        batches = pq.ParquetFile(path).iter_batches(batch_size=batch_size, columns=columns)
+
+    for batch in batches:
+        yield batch.to_pandas()
+
+
+def iter_partitions(path, columns=None):
+    # Yields (partition keys, DataFrame) one partition directory at a
+    # time, so a partitioned dataset never has to fit in memory.
+
+    dataset = ds.dataset(path, format="parquet", partitioning="hive")
+
+    groups = {}
+
+    for fragment in dataset.get_fragments():
+        groups.setdefault(os.path.dirname(fragment.path), []).append(fragment)
+
+    for directory in sorted(groups):
+
+        fragments = groups[directory]
+        keys = ds.get_partition_keys(fragments[0].partition_expression)
+
+        table = pa.concat_tables(
+            fragment.to_table(columns=columns, schema=dataset.schema)
+            for fragment in fragments
+        )
+
+        yield keys, table.to_pandas()
+
+# ============================================================
+# CSV EXPORT
+# ============================================================
+
+def export_csv(path, csv_path=None, columns=None):
+
+    if csv_path is None:
+        csv_path = path.rsplit(".", 1)[0] + ".csv"
+
+    with LogWriter(csv_path) as writer:
+        for chunk in iter_logs(path, columns=columns):
+            writer.write(chunk)
+
+    print("Exported", writer.rows, "rows to:", csv_path)
+
+    return csv_path
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Export columnar log datasets to CSV")
+    parser.add_argument("path", help="Parquet dataset to export")
+    parser.add_argument("csv_path", nargs="?", help="destination (default: same name, .csv)")
+    parser.add_argument("--columns", nargs="+", help="only export these columns")
+
+    args = parser.parse_args()
+
+    export_csv(args.path, args.csv_path, args.columns)
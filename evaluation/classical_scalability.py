@@ -4,7 +4,9 @@ import time
 import matplotlib.pyplot as plt
 import os
 
-df = pd.read_csv("data/ai_detected_logs.csv")
+from data.storage import read_logs
+
+df = read_logs("data/ai_detected_logs.parquet", columns=["anomaly_score"])
 
 sizes = [128, 256, 512, 1024, 2048, len(df)]
 times = []
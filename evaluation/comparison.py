@@ -1,90 +1,112 @@
 import pandas as pd
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import os
 
-print("\nLoading classical and quantum results...\n")
+# ============================================================
+# CONFIGURATION
+# ============================================================
 
-classical = pd.read_csv("evaluation/classical_results.csv")
-quantum = pd.read_csv("evaluation/grover_results.csv")
+CLASSICAL_RESULTS_PATH = "evaluation/classical_results.csv"
+GROVER_RESULTS_PATH = "evaluation/grover_results.csv"
+OUTPUT_PATH = "evaluation/final_comparison.csv"
 
-# Extract classical metrics
-classical_detection = classical["detection_rate"].values[0]
-classical_time = classical["execution_time_seconds"].values[0]
+# ============================================================
+# PLOTS
+# ============================================================
 
-# Extract quantum metrics (average success)
-quantum_success = quantum["success"].mean()
-quantum_depth = quantum["depth"].mean()
+def plot_comparison(classical_detection, quantum_success, classical_time):
 
-print("Classical Detection Rate:", classical_detection)
-print("Classical Execution Time:", classical_time)
-print("Quantum Average Success:", quantum_success)
-print("Quantum Average Circuit Depth:", quantum_depth)
+    fig = Figure()
+    ax = fig.add_subplot()
 
-# ============================================================
-# CREATE COMPARISON TABLE
-# ============================================================
+    ax.bar(["Classical", "Quantum"],
+           [classical_detection, quantum_success])
 
-comparison_data = {
-    "Metric": [
-        "Detection Rate",
-        "Execution Time (sec)",
-        "Complexity",
-        "Circuit Depth"
-    ],
-    "Classical": [
-        classical_detection,
-        classical_time,
-        "O(N)",
-        "-"
-    ],
-    "Quantum": [
-        quantum_success,
-        "Theoretical O(√N)",
-        "O(√N)",
-        quantum_depth
-    ]
-}
-
-df_compare = pd.DataFrame(comparison_data)
-
-df_compare.to_csv("evaluation/final_comparison.csv", index=False)
-
-print("\nSaved: evaluation/final_comparison.csv")
+    ax.set_title("Detection Rate Comparison")
+    ax.set_ylabel("Detection / Success Rate")
 
-# ============================================================
-# PLOT DETECTION RATE COMPARISON
-# ============================================================
+    fig.tight_layout()
+    fig.savefig("evaluation/final_detection_comparison.png")
 
-plt.figure()
+    print("Saved: evaluation/final_detection_comparison.png")
 
-plt.bar(["Classical", "Quantum"],
-        [classical_detection, quantum_success])
+    fig = Figure()
+    ax = fig.add_subplot()
 
-plt.title("Detection Rate Comparison")
-plt.ylabel("Detection / Success Rate")
+    ax.bar(["Classical"],
+           [classical_time])
 
-plt.tight_layout()
-plt.savefig("evaluation/final_detection_comparison.png")
-plt.close()
+    ax.set_title("Classical Execution Time (seconds)")
+    ax.set_ylabel("Time (sec)")
 
-print("Saved: evaluation/final_detection_comparison.png")
+    fig.tight_layout()
+    fig.savefig("evaluation/classical_time.png")
+
+    print("Saved: evaluation/classical_time.png")
 
 # ============================================================
-# PLOT EXECUTION TIME COMPARISON
+# COMPARISON
 # ============================================================
 
-plt.figure()
+def main(classical_results=None, grover_results=None):
+
+    if classical_results is None or grover_results is None:
+        print("\nLoading classical and quantum results...\n")
+
+    classical = classical_results if classical_results is not None else pd.read_csv(CLASSICAL_RESULTS_PATH)
+    quantum = grover_results if grover_results is not None else pd.read_csv(GROVER_RESULTS_PATH)
+
+    # Extract classical metrics
+    classical_detection = classical["detection_rate"].values[0]
+    classical_time = classical["execution_time_seconds"].values[0]
+
+    # Extract quantum metrics (average success)
+    quantum_success = quantum["success"].mean()
+    quantum_depth = quantum["depth"].mean()
+
+    print("Classical Detection Rate:", classical_detection)
+    print("Classical Execution Time:", classical_time)
+    print("Quantum Average Success:", quantum_success)
+    print("Quantum Average Circuit Depth:", quantum_depth)
+
+    # ========================================================
+    # CREATE COMPARISON TABLE
+    # ========================================================
+
+    comparison_data = {
+        "Metric": [
+            "Detection Rate",
+            "Execution Time (sec)",
+            "Complexity",
+            "Circuit Depth"
+        ],
+        "Classical": [
+            classical_detection,
+            classical_time,
+            "O(N)",
+            "-"
+        ],
+        "Quantum": [
+            quantum_success,
+            "Theoretical O(√N)",
+            "O(√N)",
+            quantum_depth
+        ]
+    }
+
+    df_compare = pd.DataFrame(comparison_data)
+
+    os.makedirs("evaluation", exist_ok=True)
+
+    df_compare.to_csv(OUTPUT_PATH, index=False)
 
-plt.bar(["Classical"],
-        [classical_time])
+    print("\nSaved:", OUTPUT_PATH)
 
-plt.title("Classical Execution Time (seconds)")
-plt.ylabel("Time (sec)")
+    plot_comparison(classical_detection, quantum_success, classical_time)
 
-plt.tight_layout()
-plt.savefig("evaluation/classical_time.png")
-plt.close()
+    print("\nEvaluation comparison completed successfully.\n")
 
-print("Saved: evaluation/classical_time.png")
+    return df_compare
 
-print("\nEvaluation comparison completed successfully.\n")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
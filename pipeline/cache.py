@@ -0,0 +1,148 @@
+import os
+import json
+import inspect
+from hashlib import sha256
+
+from data.storage import read_logs
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+
+CACHE_DIR = ".pipeline_cache"
+
+# Bump to invalidate every cached stage after a runner change
+CACHE_VERSION = 1
+
+HASH_BLOCK_SIZE = 1 << 20
+
+# ============================================================
+# HASHING
+# ============================================================
+
+def _update_digest(digest, path):
+
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+
+
+def file_hash(path):
+
+    if path is None or not os.path.exists(path):
+        return None
+
+    digest = sha256()
+
+    if not os.path.isdir(path):
+        _update_digest(digest, path)
+        return digest.hexdigest()
+
+    # Partitioned datasets: every data file, in a stable order
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            if name.startswith((".", "_")):
+                continue
+            full_path = os.path.join(root, name)
+            digest.update(os.path.relpath(full_path, path).encode())
+            _update_digest(digest, full_path)
+
+    return digest.hexdigest()
+
+
+def code_files(stage):
+
+    files = [inspect.getsourcefile(stage.func)]
+    files.extend(stage.code)
+
+    return [os.path.relpath(path) for path in files]
+
+
+# ============================================================
+# ARTIFACT LOADING
+# ============================================================
+
+def load_artifact(path):
+
+    # Partitioned datasets are handed on by path and read lazily
+    if os.path.isdir(path):
+        return path
+
+    if path.endswith((".parquet", ".csv")):
+        return read_logs(path)
+
+    # Binary artifacts (encrypted files, plots) are passed on by path
+    return path
+
+
+# ============================================================
+# STAGE CACHE
+# ============================================================
+
+class StageCache:
+
+    def __init__(self, root=CACHE_DIR):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _manifest_path(self, stage):
+        return os.path.join(self.root, f"{stage.key}.json")
+
+    def fingerprint(self, stage, input_paths):
+
+        payload = {
+            "version": CACHE_VERSION,
+            "stage": stage.name,
+            "code": {path: file_hash(path) for path in code_files(stage)},
+            "config": stage.config() if stage.config else {},
+            "sources": {path: file_hash(path) for path in stage.sources},
+            "inputs": {name: file_hash(input_paths.get(name))
+                       for name in stage.inputs}
+        }
+
+        encoded = json.dumps(payload, sort_keys=True, default=str)
+
+        return sha256(encoded.encode()).hexdigest()
+
+    def lookup(self, stage, fingerprint):
+
+        path = self._manifest_path(stage)
+
+        if not os.path.exists(path):
+            return None
+
+        with open(path) as f:
+            manifest = json.load(f)
+
+        if manifest.get("fingerprint") != fingerprint:
+            return None
+
+        outputs = manifest["outputs"]
+
+        # Outputs edited or deleted since they were cached are a miss
+        for name, output_path in outputs.items():
+            if file_hash(output_path) != manifest["hashes"][name]:
+                return None
+
+        return outputs
+
+    def store(self, stage, fingerprint, output_paths):
+
+        manifest = {
+            "stage": stage.name,
+            "fingerprint": fingerprint,
+            "outputs": output_paths,
+            "hashes": {name: file_hash(path)
+                       for name, path in output_paths.items()}
+        }
+
+        with open(self._manifest_path(stage), "w") as f:
+            json.dump(manifest, f, indent=2)
+
+    def invalidate(self, stage):
+
+        path = self._manifest_path(stage)
+
+        if os.path.exists(path):
+            os.remove(path)
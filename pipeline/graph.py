@@ -0,0 +1,201 @@
+import time
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from pipeline.cache import load_artifact
+
+# ============================================================
+# STAGE DEFINITION
+# ============================================================
+
+@dataclass
+class Stage:
+    # Stage entry point is called as func(**{input: artifact}) and
+    # returns one value per declared output (a tuple if several).
+    # outputs maps artifact name -> file the stage persists it to;
+    # None means the stage returns that file path itself.
+    name: str
+    func: object
+    key: str = None
+    inputs: list = field(default_factory=list)
+    outputs: dict = field(default_factory=dict)
+    sources: list = field(default_factory=list)
+    config: object = None
+    code: list = field(default_factory=list)
+
+    def __post_init__(self):
+        if self.key is None:
+            self.key = self.name
+
+
+class StageFailed(Exception):
+
+    def __init__(self, stage, error):
+        super().__init__(f"{stage.name}: {error}")
+        self.stage = stage
+        self.error = error
+
+
+# ============================================================
+# GRAPH VALIDATION
+# ============================================================
+
+def validate_graph(stages):
+
+    producers = {}
+
+    for stage in stages:
+        for output in stage.outputs:
+            if output in producers:
+                raise ValueError(f"Artifact '{output}' produced by both "
+                                 f"'{producers[output]}' and '{stage.name}'")
+            producers[output] = stage.name
+
+    for stage in stages:
+        for name in stage.inputs:
+            if name not in producers:
+                raise ValueError(f"Stage '{stage.name}' needs '{name}' "
+                                 f"but no stage produces it")
+
+    # Kahn's algorithm, only to reject cycles up front
+    remaining = {stage.name: set(stage.inputs) for stage in stages}
+    available = set()
+
+    while remaining:
+        ready = [name for name, needs in remaining.items() if needs <= available]
+        if not ready:
+            raise ValueError(f"Cycle between stages: {sorted(remaining)}")
+        for name in ready:
+            del remaining[name]
+            stage = next(s for s in stages if s.name == name)
+            available.update(stage.outputs)
+
+    return producers
+
+
+def downstream(stages, keys):
+
+    selected = {stage.key for stage in stages if stage.key in keys}
+
+    changed = True
+
+    while changed:
+        changed = False
+        produced = {name for stage in stages if stage.key in selected
+                    for name in stage.outputs}
+        for stage in stages:
+            if stage.key not in selected and produced & set(stage.inputs):
+                selected.add(stage.key)
+                changed = True
+
+    return selected
+
+
+# ============================================================
+# EXECUTION
+# ============================================================
+
+def _output_paths(stage, outputs):
+
+    paths = {}
+
+    for name, path in stage.outputs.items():
+        if path is None and isinstance(outputs.get(name), str):
+            path = outputs[name]
+        if path is None:
+            return None
+        paths[name] = path
+
+    return paths
+
+
+def _execute(stage, kwargs, cache, input_paths, forced):
+
+    start_time = time.time()
+
+    fingerprint = None
+
+    if cache is not None:
+
+        fingerprint = cache.fingerprint(stage, input_paths)
+
+        cached = None if forced else cache.lookup(stage, fingerprint)
+
+        if cached is not None:
+            outputs = {name: load_artifact(path) for name, path in cached.items()}
+            return outputs, cached, None
+
+    result = stage.func(**kwargs)
+
+    duration = round(time.time() - start_time, 2)
+
+    if len(stage.outputs) == 1:
+        result = (result,)
+    elif len(stage.outputs) == 0:
+        result = ()
+
+    outputs = dict(zip(stage.outputs, result))
+    paths = _output_paths(stage, outputs)
+
+    if cache is not None and paths is not None:
+        cache.store(stage, fingerprint, paths)
+
+    return outputs, paths or {}, duration
+
+
+def run_graph(stages, max_workers=4, cache=None, force=(),
+              on_start=None, on_complete=None):
+
+    validate_graph(stages)
+
+    forced = downstream(stages, force)
+
+    if cache is not None:
+        for stage in stages:
+            if stage.key in forced:
+                cache.invalidate(stage)
+
+    artifacts = {}
+    artifact_paths = {}
+    timings = []
+
+    pending = list(stages)
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+
+        while pending or running:
+
+            for stage in list(pending):
+                if all(name in artifacts for name in stage.inputs):
+                    pending.remove(stage)
+                    if on_start:
+                        on_start(stage)
+                    kwargs = {name: artifacts[name] for name in stage.inputs}
+                    future = pool.submit(_execute, stage, kwargs, cache,
+                                         dict(artifact_paths), stage.key in forced)
+                    running[future] = stage
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+
+            for future in done:
+
+                stage = running.pop(future)
+
+                try:
+                    outputs, paths, duration = future.result()
+                except Exception as error:
+                    for other in running:
+                        other.cancel()
+                    raise StageFailed(stage, error) from error
+
+                artifacts.update(outputs)
+                artifact_paths.update(paths)
+
+                # duration is None when the stage was served from cache
+                timings.append((stage.name, duration))
+
+                if on_complete:
+                    on_complete(stage, duration)
+
+    return artifacts, timings
@@ -1,115 +1,342 @@
 import os
-import numpy as np
+import glob
+from concurrent.futures import ThreadPoolExecutor
+
 import pandas as pd
-from hashlib import sha256
-from Crypto.Cipher import AES
+
+from data.storage import iter_logs
+from data.encrypted_store import BLOCK_ROWS, EncryptedLogWriter, EncryptedLogStore
+from quantum import aead_stream, segmented_aead
+from quantum.key_pool import KeyPool
 
 # ============================================================
-# LOAD GROVER RESULTS
+# CONFIGURATION
 # ============================================================
 
-print("\nLoading Grover quantum results...")
-
-grover_df = pd.read_csv("evaluation/grover_results.csv")
-
-# Compute average quantum success
-avg_success = grover_df["success"].mean()
-
-print("Average Grover success:", avg_success)
+GROVER_RESULTS_PATH = "evaluation/grover_results.csv"
+QKD_RESULTS_PATH = "evaluation/mdi_qkd_results.csv"
+LOGS_PATH = "data/ai_detected_logs.parquet"
+
+# Record-level routing: suspicious rows go to a strongly protected,
+# frequently rekeyed stream, the rest to a bulk stream. False seals the
+# whole file at the global threat level instead (in CONTAINER format).
+ROUTE_RECORDS = True
+
+# Rows flagged anomalous, or scoring below this margin (IsolationForest
+# scores: lower is more anomalous, < 0 is flagged), are routed strong
+STRONG_SCORE_MARGIN = 0.05
+
+STRONG_TIER = "STRONG"
+BULK_TIER = "BULK"
+
+# Strong stream: a fresh QKD key every STRONG_REKEY_ROWS rows, each key
+# sealing its own store part, in small blocks. Bulk stream: one part
+# under a reused key, in large blocks.
+STRONG_REKEY_ROWS = 4096
+STRONG_BLOCK_ROWS = 1024
+BULK_BLOCK_ROWS = BLOCK_ROWS
+
+# Both streams live under one directory, which is the stage's artifact
+# (the pipeline cache fingerprints every part in it)
+ROUTED_DIR = "secure_storage/anomalies"
+STRONG_DIR = os.path.join(ROUTED_DIR, "strong")
+BULK_DIR = os.path.join(ROUTED_DIR, "bulk")
+
+# "stream": chunked AES-GCM frames sealed in order (quantum/aead_stream.py)
+# "segmented": independently keyed segments sealed and verified on a
+# thread pool, for multi-GB archives (quantum/segmented_aead.py)
+CONTAINERS = {"stream": aead_stream, "segmented": segmented_aead}
+CONTAINER = "stream"
 
 # ============================================================
 # QUANTUM THREAT ESCALATION LOGIC
 # ============================================================
 
-if avg_success >= 0.8:
-    threat_level = "HIGH"
-elif avg_success >= 0.4:
-    threat_level = "MEDIUM"
-else:
-    threat_level = "LOW"
+def classify_threat(grover_df):
+
+    # Compute average quantum success
+    avg_success = grover_df["success"].mean()
 
-print("Quantum Threat Level:", threat_level)
+    print("Average Grover success:", avg_success)
+
+    if avg_success >= 0.8:
+        threat_level = "HIGH"
+    elif avg_success >= 0.4:
+        threat_level = "MEDIUM"
+    else:
+        threat_level = "LOW"
+
+    print("Quantum Threat Level:", threat_level)
+
+    return threat_level
 
 # ============================================================
-# LOAD QKD RESULTS
+# ADAPTIVE KEY SELECTION
 # ============================================================
 
-print("\nLoading QKD results...")
+def select_qkd_scenario(qkd_df, threat_level):
 
-qkd_df = pd.read_csv("evaluation/mdi_qkd_results.csv")
+    # Scenarios whose post-processing leaves no secure key cannot seal
+    # anything (QBER too high for reconciliation + amplification)
+    qkd_df = qkd_df[qkd_df["secure_key_length"] > 0]
 
-# Adaptive key selection based on threat level
-if threat_level == "HIGH":
-    # Strictest key (lowest QBER)
-    selected_row = qkd_df.sort_values("qber").iloc[0]
-elif threat_level == "MEDIUM":
-    # Moderate security (mid QBER range)
-    selected_row = qkd_df.sort_values("qber").iloc[len(qkd_df)//2]
-else:
-    # Basic security (highest QBER tolerated)
-    selected_row = qkd_df.sort_values("qber", ascending=False).iloc[0]
+    if qkd_df.empty:
+        raise ValueError("No MDI-QKD scenario produced a secure key")
 
-print("Selected QKD scenario:")
-print(selected_row)
+    if threat_level == "HIGH":
+        # Strictest key (lowest QBER)
+        selected_row = qkd_df.sort_values("qber").iloc[0]
+    elif threat_level == "MEDIUM":
+        # Moderate security (mid QBER range)
+        selected_row = qkd_df.sort_values("qber").iloc[len(qkd_df)//2]
+    else:
+        # Basic security (highest QBER tolerated)
+        selected_row = qkd_df.sort_values("qber", ascending=False).iloc[0]
 
-secure_key_length = int(selected_row["secure_key_length"])
+    print("Selected QKD scenario:")
+    print(selected_row)
+
+    return selected_row
 
 # ============================================================
-# DERIVE AES KEY FROM QKD BITS
+# AES KEY FROM THE QKD KEY POOL
 # ============================================================
 
-secure_bits = np.random.randint(0, 2, secure_key_length)
+def _scenario(row):
+    return float(row["noise"]), float(row["attack_probability"])
 
-bit_string = ''.join(map(str, secure_bits))
-aes_key = sha256(bit_string.encode()).digest()[:32]
 
-print("Derived AES-256 key from QKD output.")
+def key_pool_for(selected_row, threat_level):
 
-# ============================================================
-# LOAD AI DETECTED LOGS
-# ============================================================
+    # The tier's keys come from the selected scenario's simulated link
+    return KeyPool({threat_level: _scenario(selected_row)})
+
+
+def routing_key_pool(qkd_df, selected_row):
 
-print("\nLoading anomaly logs for encryption...")
+    # Strong keys always come from the strictest scenario and seal one
+    # part each; bulk keys follow the threat level and are reused
+    strictest = select_qkd_scenario(qkd_df, "HIGH")
 
-data = open("data/ai_detected_logs.csv", "rb").read()
+    return KeyPool({STRONG_TIER: _scenario(strictest), BULK_TIER: _scenario(selected_row)},
+                   max_uses={STRONG_TIER: 1})
 
 # ============================================================
-# ENCRYPTION POLICY BASED ON THREAT LEVEL
+# RECORD ROUTING
 # ============================================================
 
-if threat_level == "HIGH":
-    mode = AES.MODE_GCM
-elif threat_level == "MEDIUM":
-    mode = AES.MODE_GCM
-else:
-    mode = AES.MODE_GCM  # still secure but conceptually lower priority
+def strong_rows(df):
+
+    return ((df["anomaly"] == 1) | (df["anomaly_score"] < STRONG_SCORE_MARGIN)).to_numpy()
+
+
+class RekeyingWriter:
+    # Writes a stream as encrypted store parts of at most rekey_rows
+    # rows, each under its own pool key (rekey_rows=None: one part).
+    # parts lists (path, pool key) once closed.
+
+    def __init__(self, pool, tier, directory, rekey_rows=None, block_rows=BLOCK_ROWS):
+
+        self.pool = pool
+        self.tier = tier
+        self.directory = directory
+        self.rekey_rows = rekey_rows
+        self.block_rows = block_rows
+        self.rows = 0
+        self.parts = []
+
+        self._writer = None
+        self._key = None
+
+        os.makedirs(directory, exist_ok=True)
+
+        # Parts of an earlier run would read as part of this one
+        for stale in glob.glob(os.path.join(directory, "part-*.enc")):
+            os.remove(stale)
+
+    def write(self, df):
+
+        position = 0
+
+        while position < len(df):
+
+            if self._writer is None:
+                self._open()
+
+            take = len(df) - position
+
+            if self.rekey_rows is not None:
+                take = min(take, self.rekey_rows - self._writer.rows)
+
+            self._writer.write(df.iloc[position:position + take])
+
+            position += take
+            self.rows += take
+
+            if self.rekey_rows is not None and self._writer.rows >= self.rekey_rows:
+                self._finish_part()
+
+    def _open(self):
+
+        self._key = self.pool.acquire(self.tier)
+
+        path = os.path.join(self.directory, f"part-{len(self.parts):05d}.enc")
+
+        # The key ID (never the key) rides in the store header
+        self._writer = EncryptedLogWriter(path, self._key.key, self._key.key_id.encode(),
+                                          self.block_rows)
+
+    def _finish_part(self):
+
+        self._writer.close()
+
+        self.pool.record_seal(self._key, self._writer.path)
+        self.parts.append((self._writer.path, self._key))
+
+        self._writer = None
+
+    def close(self):
+
+        # A stream with no rows still gets one (empty) sealed part
+        if self._writer is None and not self.parts:
+            self._open()
+
+        if self._writer is not None:
+            self._finish_part()
+
 
-cipher = AES.new(aes_key, mode)
+def route_records(pool, logs_path=LOGS_PATH):
+    # Splits every input chunk and writes the two streams on two
+    # threads; the next chunk is read and split while they write
 
-ciphertext, tag = cipher.encrypt_and_digest(data)
+    strong = RekeyingWriter(pool, STRONG_TIER, STRONG_DIR, STRONG_REKEY_ROWS, STRONG_BLOCK_ROWS)
+    bulk = RekeyingWriter(pool, BULK_TIER, BULK_DIR, block_rows=BULK_BLOCK_ROWS)
 
-encrypted_package = cipher.nonce + tag + ciphertext
+    pending = []
 
-os.makedirs("secure_storage", exist_ok=True)
+    with ThreadPoolExecutor(max_workers=2) as executor:
 
-filename = f"secure_storage/encrypted_anomalies_{threat_level}.bin"
+        for chunk in iter_logs(logs_path):
 
-with open(filename, "wb") as f:
-    f.write(encrypted_package)
+            mask = strong_rows(chunk)
 
-print("Encrypted file saved to:", filename)
+            for future in pending:
+                future.result()
+
+            pending = [executor.submit(strong.write, chunk[mask]),
+                       executor.submit(bulk.write, chunk[~mask])]
+
+        for future in pending:
+            future.result()
+
+        for future in [executor.submit(strong.close), executor.submit(bulk.close)]:
+            future.result()
+
+    return strong, bulk
+
+
+def verify_parts(parts):
+    # Authenticates each part's index and decrypts every block, one
+    # block in memory at a time. Returns the verified row count.
+
+    rows = 0
+
+    for path, pool_key in parts:
+        store = EncryptedLogStore(path, pool_key.key)
+        rows += sum(len(block) for block in store.iter_blocks())
+
+    return rows
 
 # ============================================================
-# VERIFICATION
+# PIPELINE
 # ============================================================
 
-nonce = encrypted_package[:16]
-tag = encrypted_package[16:32]
-ciphertext = encrypted_package[32:]
+# ai_detected_logs only orders this stage after the AI stage: the
+# persisted Parquet file is what gets encrypted.
+
+def seal_records(qkd_df, selected_row):
+
+    pool = routing_key_pool(qkd_df, selected_row)
+
+    print("\nRouting anomaly logs into strong and bulk streams...")
+
+    with pool:
+        strong, bulk = route_records(pool)
+
+    total = strong.rows + bulk.rows
+
+    print(f"Strong stream: {strong.rows} rows ({strong.rows / max(total, 1):.1%}), "
+          f"{len(strong.parts)} parts, a new key every {STRONG_REKEY_ROWS} rows -> {STRONG_DIR}")
+    print(f"Bulk stream: {bulk.rows} rows, {len(bulk.parts)} parts -> {BULK_DIR}")
+
+    verified = verify_parts(strong.parts + bulk.parts)
+
+    if verified != total:
+        raise ValueError(f"Verified {verified} rows, wrote {total}")
+
+    print("Decryption integrity verified.")
+
+    return ROUTED_DIR
+
+
+def seal_file(selected_row, threat_level):
+
+    pool = key_pool_for(selected_row, threat_level)
+
+    pool_key = pool.acquire(threat_level)
+
+    aes_key = pool_key.key
+
+    print(f"AES-256 key {pool_key.key_id} from the {threat_level} QKD key pool "
+          f"(QBER {pool_key.qber:.4f}).")
+
+    # The whole file is sealed with AES-256-GCM in the CONTAINER format;
+    # both work file to file, one chunk or segment per worker in memory
+
+    print("\nEncrypting anomaly logs...")
+
+    os.makedirs("secure_storage", exist_ok=True)
+
+    filename = f"secure_storage/encrypted_anomalies_{threat_level}.bin"
+
+    container = CONTAINERS[CONTAINER]
+
+    container.encrypt_file(aes_key, LOGS_PATH, filename)
+
+    pool.record_seal(pool_key, filename)
+
+    print("Encrypted file saved to:", filename)
+
+    # Every frame's or segment's tag is checked, no plaintext is kept
+    container.verify_file(aes_key, filename)
+
+    print("Decryption integrity verified.")
+
+    return filename
+
+
+def main(ai_detected_logs=None, grover_results=None, mdi_qkd_results=None):
+
+    if grover_results is None:
+        print("\nLoading Grover quantum results...")
+        grover_results = pd.read_csv(GROVER_RESULTS_PATH)
+
+    threat_level = classify_threat(grover_results)
+
+    if mdi_qkd_results is None:
+        print("\nLoading QKD results...")
+        mdi_qkd_results = pd.read_csv(QKD_RESULTS_PATH)
+
+    selected_row = select_qkd_scenario(mdi_qkd_results, threat_level)
+
+    if ROUTE_RECORDS:
+        artifacts = seal_records(mdi_qkd_results, selected_row)
+    else:
+        artifacts = seal_file(selected_row, threat_level)
 
-cipher = AES.new(aes_key, AES.MODE_GCM, nonce=nonce)
-decrypted = cipher.decrypt_and_verify(ciphertext, tag)
+    print("\nAdaptive Quantum Security Pipeline Completed.\n")
 
-print("Decryption integrity verified.")
+    return artifacts
 
-print("\nAdaptive Quantum Security Pipeline Completed.\n")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
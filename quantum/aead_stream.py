@@ -0,0 +1,211 @@
+import os
+import struct
+import argparse
+
+from Crypto.Cipher import AES
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+
+# Plaintext bytes per frame; only one frame is held in memory at a time
+CHUNK_SIZE = 1 << 20
+
+MAGIC = b"QAES"
+VERSION = 1
+
+# ============================================================
+# FORMAT
+# ============================================================
+
+# header | frame 0 | frame 1 | ... | final frame
+#
+# header: magic, version, chunk size, 8-byte random nonce prefix
+# frame:  flags (1 = final), ciphertext length, ciphertext, 16-byte tag
+#
+# Frame i is sealed with AES-GCM under nonce = prefix || uint32(i) and
+# AAD = header || uint64(i) || flags, so frames cannot be reordered,
+# dropped, moved between files or relabelled as final. A stream that
+# ends without its final frame is rejected (truncation).
+
+HEADER = struct.Struct(">4sBI8s")
+FRAME = struct.Struct(">BI")
+AAD = struct.Struct(">QB")
+
+FINAL = 1
+TAG_SIZE = 16
+
+# 4-byte counter in the nonce
+MAX_CHUNKS = 1 << 32
+
+
+def chunk_nonce(prefix, index):
+
+    return prefix + struct.pack(">I", index)
+
+
+def _cipher(key, header, prefix, index, flags):
+
+    if index >= MAX_CHUNKS:
+        raise ValueError(f"Stream exceeds {MAX_CHUNKS} chunks")
+
+    cipher = AES.new(key, AES.MODE_GCM, nonce=chunk_nonce(prefix, index))
+    cipher.update(header + AAD.pack(index, flags))
+
+    return cipher
+
+
+def _read_exact(src, size):
+
+    data = src.read(size)
+
+    if len(data) != size:
+        raise ValueError("Truncated AES-GCM stream")
+
+    return data
+
+# ============================================================
+# ENCRYPTION
+# ============================================================
+
+def encrypt_stream(key, src, dst, chunk_size=CHUNK_SIZE):
+    # src, dst: binary file objects. Returns the plaintext byte count.
+
+    prefix = os.urandom(8)
+    header = HEADER.pack(MAGIC, VERSION, chunk_size, prefix)
+
+    dst.write(header)
+
+    total = 0
+    index = 0
+
+    chunk = src.read(chunk_size)
+
+    while True:
+
+        # One chunk of read-ahead: the last chunk (possibly empty) is
+        # only known to be final once the next read comes back empty
+        following = src.read(chunk_size) if len(chunk) == chunk_size else b""
+
+        flags = 0 if following else FINAL
+
+        ciphertext, tag = _cipher(key, header, prefix, index, flags).encrypt_and_digest(chunk)
+
+        dst.write(FRAME.pack(flags, len(ciphertext)))
+        dst.write(ciphertext)
+        dst.write(tag)
+
+        total += len(chunk)
+
+        if flags & FINAL:
+            return total
+
+        chunk = following
+        index += 1
+
+# ============================================================
+# DECRYPTION
+# ============================================================
+
+def iter_decrypt(key, src):
+    # Yields authenticated plaintext chunks; raises ValueError on a bad
+    # header, a forged or reordered frame, or a missing final frame.
+
+    header = _read_exact(src, HEADER.size)
+
+    magic, version, chunk_size, prefix = HEADER.unpack(header)
+
+    if magic != MAGIC:
+        raise ValueError("Not an AES-GCM stream")
+
+    if version != VERSION:
+        raise ValueError(f"Unsupported AES-GCM stream version {version}")
+
+    index = 0
+
+    while True:
+
+        flags, length = FRAME.unpack(_read_exact(src, FRAME.size))
+
+        if length > chunk_size:
+            raise ValueError(f"Frame {index} larger than the chunk size")
+
+        ciphertext = _read_exact(src, length)
+        tag = _read_exact(src, TAG_SIZE)
+
+        yield _cipher(key, header, prefix, index, flags).decrypt_and_verify(ciphertext, tag)
+
+        if flags & FINAL:
+            break
+
+        index += 1
+
+    if src.read(1):
+        raise ValueError("Data after the final frame")
+
+
+def decrypt_stream(key, src, dst=None):
+    # Writes each chunk only after its tag verified; dst=None verifies
+    # without keeping any plaintext. Returns the plaintext byte count.
+
+    total = 0
+
+    for chunk in iter_decrypt(key, src):
+
+        if dst is not None:
+            dst.write(chunk)
+
+        total += len(chunk)
+
+    return total
+
+# ============================================================
+# FILES
+# ============================================================
+
+def encrypt_file(key, input_path, output_path, chunk_size=CHUNK_SIZE):
+
+    with open(input_path, "rb") as src, open(output_path, "wb") as dst:
+        return encrypt_stream(key, src, dst, chunk_size)
+
+
+def decrypt_file(key, input_path, output_path=None):
+
+    with open(input_path, "rb") as src:
+
+        if output_path is None:
+            return decrypt_stream(key, src)
+
+        with open(output_path, "wb") as dst:
+            return decrypt_stream(key, src, dst)
+
+
+def verify_file(key, input_path):
+
+    return decrypt_file(key, input_path)
+
+# ============================================================
+# MAIN
+# ============================================================
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Chunked AES-256-GCM stream encryption")
+    parser.add_argument("action", choices=["encrypt", "decrypt", "verify"])
+    parser.add_argument("input")
+    parser.add_argument("output", nargs="?")
+    parser.add_argument("--key-hex", required=True, help="64 hex digits (AES-256)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+
+    args = parser.parse_args()
+
+    key = bytes.fromhex(args.key_hex)
+
+    if args.action == "encrypt":
+        size = encrypt_file(key, args.input, args.output, args.chunk_size)
+    elif args.action == "decrypt":
+        size = decrypt_file(key, args.input, args.output)
+    else:
+        size = verify_file(key, args.input)
+
+    print(f"{args.action}: {size:,} plaintext bytes")
@@ -0,0 +1,199 @@
+import numpy as np
+
+# ============================================================
+# POPCOUNT
+# ============================================================
+
+if hasattr(np, "bitwise_count"):
+    popcount = np.bitwise_count
+else:
+    _POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def popcount(packed):
+        return _POPCOUNT_TABLE[packed]
+
+
+def tail_mask(length):
+
+    # Last-byte mask keeping the first length % 8 bits (big-endian order)
+    return np.uint8((0xFF << (8 - length % 8)) & 0xFF) if length % 8 else np.uint8(0xFF)
+
+# ============================================================
+# PACKED BIT ARRAY
+# ============================================================
+
+# Bits are stored 8 per byte in np.packbits order (first bit = most
+# significant bit of byte 0). Padding bits in the last byte are kept at
+# zero, so popcounts and byte output never depend on them.
+
+
+class PackedBits:
+
+    __slots__ = ("data", "length")
+
+    def __init__(self, data, length):
+
+        self.data = np.asarray(data, dtype=np.uint8)
+        self.length = length
+
+        if len(self.data) != (length + 7) // 8:
+            raise ValueError(f"{len(self.data)} bytes cannot hold exactly {length} bits")
+
+        if length % 8:
+            self.data[-1] &= tail_mask(length)
+
+    # --------------------------------------------------------
+    # Construction / conversion
+    # --------------------------------------------------------
+
+    @classmethod
+    def from_bits(cls, bits):
+
+        bits = np.asarray(bits)
+
+        return cls(np.packbits(bits.astype(bool)), len(bits))
+
+    @classmethod
+    def from_bytes(cls, data, length=None):
+
+        data = np.frombuffer(data, dtype=np.uint8).copy()
+
+        return cls(data, len(data) * 8 if length is None else length)
+
+    @classmethod
+    def zeros(cls, length):
+
+        return cls(np.zeros((length + 7) // 8, dtype=np.uint8), length)
+
+    @classmethod
+    def random(cls, length, rng=None):
+
+        rng = rng or np.random.default_rng()
+
+        return cls(rng.integers(0, 256, (length + 7) // 8, dtype=np.uint8), length)
+
+    @classmethod
+    def bernoulli(cls, length, probability, rng):
+
+        # Legacy RandomState or Generator: both provide rand-style floats
+        draws = rng.random(length) if hasattr(rng, "integers") else rng.rand(length)
+
+        return cls.from_bits(draws < probability)
+
+    def unpack(self):
+
+        return np.unpackbits(self.data, count=self.length).astype(bool)
+
+    def tobytes(self):
+
+        return self.data.tobytes()
+
+    # --------------------------------------------------------
+    # Bitwise operations (byte-wide, never unpacked)
+    # --------------------------------------------------------
+
+    def _check(self, other):
+
+        if not isinstance(other, PackedBits):
+            raise TypeError(f"Expected PackedBits, got {type(other).__name__}")
+
+        if other.length != self.length:
+            raise ValueError(f"Length mismatch: {self.length} vs {other.length}")
+
+    def __xor__(self, other):
+
+        self._check(other)
+
+        return PackedBits(self.data ^ other.data, self.length)
+
+    def __and__(self, other):
+
+        self._check(other)
+
+        return PackedBits(self.data & other.data, self.length)
+
+    def __or__(self, other):
+
+        self._check(other)
+
+        return PackedBits(self.data | other.data, self.length)
+
+    def __invert__(self):
+
+        # The constructor clears the inverted padding bits again
+        return PackedBits(~self.data, self.length)
+
+    def __eq__(self, other):
+
+        if not isinstance(other, PackedBits):
+            return NotImplemented
+
+        return self.length == other.length and np.array_equal(self.data, other.data)
+
+    def count(self):
+
+        return int(popcount(self.data).sum(dtype=np.int64))
+
+    def hamming_distance(self, other):
+
+        return (self ^ other).count()
+
+    # --------------------------------------------------------
+    # Indexing
+    # --------------------------------------------------------
+
+    def __len__(self):
+
+        return self.length
+
+    def __getitem__(self, index):
+
+        if isinstance(index, slice):
+
+            start, stop, step = index.indices(self.length)
+
+            if step != 1:
+                raise ValueError("PackedBits slices must be contiguous")
+
+            return self._range(start, max(0, stop - start))
+
+        if index < 0:
+            index += self.length
+
+        if not 0 <= index < self.length:
+            raise IndexError(index)
+
+        return int(self.data[index >> 3] >> (7 - (index & 7))) & 1
+
+    def _range(self, start, length):
+
+        offset, shift = divmod(start, 8)
+        num_bytes = (length + 7) // 8
+
+        if shift == 0:
+            return PackedBits(self.data[offset:offset + num_bytes].copy(), length)
+
+        # Unaligned start: each output byte is made of the tail of one
+        # input byte and the head of the next
+        chunk = np.zeros(num_bytes + 1, dtype=np.uint8)
+        source = self.data[offset:offset + num_bytes + 1]
+        chunk[:len(source)] = source
+
+        data = (chunk[:-1] << shift) | (chunk[1:] >> (8 - shift))
+
+        return PackedBits(data, length)
+
+    def compress(self, mask):
+
+        # Keeps the bits where mask is set (e.g. sifting). Selecting a
+        # scattered subset has no byte-wide form, so this one step
+        # unpacks temporarily.
+        self._check(mask)
+
+        selected = np.unpackbits(self.data, count=self.length)[mask.unpack()]
+
+        return PackedBits(np.packbits(selected), len(selected))
+
+    def __repr__(self):
+
+        return f"PackedBits(length={self.length}, ones={self.count()})"
@@ -0,0 +1,79 @@
+import os
+import json
+from hashlib import sha256
+
+import qiskit
+from qiskit import qpy, transpile
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+
+CACHE_DIR = ".circuit_cache"
+
+# Bump to invalidate every persisted circuit after a layout change
+CACHE_VERSION = 1
+
+# ============================================================
+# TRANSPILED CIRCUIT CACHE
+# ============================================================
+
+# Parameterized circuits are transpiled once per key and reused by
+# binding parameters. Transpiled circuits are written as QPY files, so
+# later runs load them instead of transpiling again. The Qiskit version
+# is part of the key because QPY output and transpiler passes change
+# between releases.
+
+
+class CircuitCache:
+
+    def __init__(self, cache_dir=CACHE_DIR, persist=True):
+
+        self.cache_dir = cache_dir
+        self.persist = persist
+        self._circuits = {}
+
+    def _path(self, key):
+
+        digest = sha256(json.dumps({
+            "version": CACHE_VERSION,
+            "qiskit": qiskit.__version__,
+            "key": key
+        }, sort_keys=True, default=str).encode()).hexdigest()
+
+        return os.path.join(self.cache_dir, f"{digest}.qpy")
+
+    def get(self, key, build, backend):
+        # key must be JSON-serializable and cover everything build()
+        # and the backend contribute to the transpiled circuit
+
+        path = self._path(key)
+
+        if path in self._circuits:
+            return self._circuits[path]
+
+        if self.persist and os.path.exists(path):
+            with open(path, "rb") as f:
+                circuit = qpy.load(f)[0]
+        else:
+            circuit = transpile(build(), backend)
+            if self.persist:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                # Per-process temp file: pool workers may build the same key
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    qpy.dump(circuit, f)
+                os.replace(tmp_path, path)
+
+        self._circuits[path] = circuit
+
+        return circuit
+
+    def clear(self):
+
+        self._circuits.clear()
+
+        if os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".qpy"):
+                    os.remove(os.path.join(self.cache_dir, name))
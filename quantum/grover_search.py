@@ -1,113 +1,255 @@
 import os
+import time
+import argparse
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-from math import ceil, log2, pi, sqrt
-
-from qiskit import QuantumCircuit, transpile
+from math import asin, ceil, isclose, log2, pi, sqrt
+from matplotlib.figure import Figure
+
+from qiskit import QuantumCircuit
+from qiskit.circuit import ParameterVector
+from qiskit.circuit.library import XGate
+from qiskit.transpiler import PassManager
+from qiskit.transpiler.passes import Optimize1qGatesDecomposition
 from qiskit_aer import AerSimulator
-from qiskit_aer.noise import NoiseModel, depolarizing_error
+from qiskit_aer.noise import NoiseModel, ReadoutError, depolarizing_error
+
+from data.storage import iter_logs, read_logs
+from quantum import grover_statevector
+from quantum.circuit_cache import CircuitCache
 
 
 # ============================================================
-# LOAD AI DETECTED ANOMALIES (LIMITED FOR STABLE SIMULATION)
+# CONFIGURATION
 # ============================================================
 
-print("\nLoading AI detected anomalies...")
-
-df_logs = pd.read_csv("data/ai_detected_logs.csv").head(512)
+INPUT_PATH = "data/ai_detected_logs.parquet"
 
-N = len(df_logs)
+# Limited for stable simulation
+MAX_RECORDS = 512
 
-print("Total anomalies used:", N)
+csv_main   = "evaluation/grover_results.csv"
+csv_noise  = "evaluation/grover_noise_results.csv"
+plot_main  = "evaluation/grover_success_plot.png"
+plot_noise = "evaluation/grover_noise_plot.png"
 
-n = int(ceil(log2(N)))
+# Block search: the full record set is split into blocks of
+# 2**BLOCK_QUBITS records, each searched on its own. Larger blocks mean
+# fewer, deeper circuits and a larger state vector per worker.
+BLOCK_QUBITS = 9
+BLOCK_WORKERS = os.cpu_count() or 1
 
-print("Qubits required:", n)
-print("Quantum search space:", 2**n)
+csv_blocks = "evaluation/grover_block_results.csv"
+csv_hits   = "evaluation/grover_block_hits.csv"
 
 
 # ============================================================
-# TARGET SELECTION
+# BACKENDS
 # ============================================================
 
-target_random = np.random.randint(0, N)
+# Ideal runs: "aer" simulates the circuit, "statevector" evaluates the
+# same search with NumPy (quantum.grover_statevector). Noisy runs always
+# use Aer, the only backend that models gate errors.
+BACKENDS = ["aer", "statevector"]
+BACKEND = "aer"
 
-if 'anomaly_score' in df_logs.columns:
-    target_max = df_logs['anomaly_score'].idxmax()
-else:
-    target_max = 0
+# "targets": one single-target search per selected target.
+# "threshold": one search whose oracle marks every record scoring below
+# SCORE_THRESHOLD. IsolationForest scores are negative for anomalies, so
+# the default marks exactly the rows the model flagged.
+SEARCH_MODES = ["targets", "threshold"]
+SEARCH_MODE = "targets"
+SCORE_THRESHOLD = 0.0
 
-target_pattern = 0
+# Threshold mode: take the iteration count from the number of marked
+# records, or treat that number as unknown and use exponential search
+COUNT_KNOWN = True
 
-targets = list(set([
-    target_random,
-    target_max,
-    target_pattern
-]))
+ideal_backend = AerSimulator()
 
-targets_binary = [format(t, f'0{n}b')[::-1] for t in targets]
+ERROR_1Q = 0.002
+ERROR_2Q = 0.01
 
-print("Targets selected:", targets)
-print("Binary targets:", targets_binary)
 
+def build_noise_model(error_1q, error_2q, readout=0.0):
 
-# ============================================================
-# OUTPUT DIRECTORY
-# ============================================================
+    noise_model = NoiseModel()
 
-os.makedirs("evaluation", exist_ok=True)
+    err1 = depolarizing_error(error_1q, 1)
+    err2 = depolarizing_error(error_2q, 2)
 
-csv_main   = "evaluation/grover_results.csv"
-csv_noise  = "evaluation/grover_noise_results.csv"
-plot_main  = "evaluation/grover_success_plot.png"
-plot_noise = "evaluation/grover_noise_plot.png"
+    noise_model.add_all_qubit_quantum_error(err1, ['h', 'x'])
+    noise_model.add_all_qubit_quantum_error(err2, ['cx'])
 
+    if readout:
+        noise_model.add_all_qubit_readout_error(
+            ReadoutError([[1 - readout, readout], [readout, 1 - readout]]))
 
-# ============================================================
-# BACKENDS
-# ============================================================
+    return noise_model
 
-ideal_backend = AerSimulator()
 
-noise_model = NoiseModel()
+noise_model = build_noise_model(ERROR_1Q, ERROR_2Q)
 
-err1 = depolarizing_error(0.002, 1)
-err2 = depolarizing_error(0.01, 2)
+noisy_backend = AerSimulator(noise_model=noise_model)
 
-noise_model.add_all_qubit_quantum_error(err1, ['h', 'x'])
-noise_model.add_all_qubit_quantum_error(err2, ['cx'])
+# Identifies each backend's noise model in circuit cache keys
+# (NoiseModel objects carry random ids and do not hash stably)
+NOISE_KEYS = {
+    id(ideal_backend): None,
+    id(noisy_backend): {"ERROR_1Q": ERROR_1Q, "ERROR_2Q": ERROR_2Q}
+}
 
-noisy_backend = AerSimulator(noise_model=noise_model)
+circuit_cache = CircuitCache()
 
 base_shots = 2048
 finite_shots = [256, 512, 1024, 2048]
 
+# Circuits go to Aer as batched jobs; Aer spreads the experiments of a
+# job over its own thread pool (0 = as many as it sees fit).
+MAX_PARALLEL_EXPERIMENTS = 0
+
+# Run only max(finite_shots) and take the smaller shot counts as
+# prefixes of the recorded per-shot memory. The shot-count results are
+# then nested samples rather than independent runs.
+SUBSAMPLE_SHOTS = False
+
 
 # ============================================================
-# ORACLE
+# TARGET SELECTION
 # ============================================================
 
-def oracle(qc, target):
+def select_targets(df_logs, n):
+
+    N = len(df_logs)
+
+    target_random = np.random.randint(0, N)
+
+    if 'anomaly_score' in df_logs.columns:
+        target_max = df_logs['anomaly_score'].idxmax()
+    else:
+        target_max = 0
 
-    for i, bit in enumerate(target):
-        if bit == '0':
-            qc.x(i)
+    target_pattern = 0
+
+    targets = list(set([
+        target_random,
+        target_max,
+        target_pattern
+    ]))
+
+    targets_binary = [target_string(t, n) for t in targets]
+
+    return targets, targets_binary
+
+
+def select_marked(df_logs, threshold=None):
+
+    threshold = SCORE_THRESHOLD if threshold is None else threshold
+
+    return np.flatnonzero(df_logs['anomaly_score'].to_numpy() < threshold)
+
+
+def target_string(index, n):
+
+    return format(index, f'0{n}b')[::-1]
+
+
+def measured_key(target):
+
+    # Target strings list qubit 0 first; Qiskit count keys put it last
+    return target[::-1]
+
+
+# ============================================================
+# ORACLE
+# ============================================================
+
+# Single target: the target enters the circuit only through the X-gate
+# mask around the multi-controlled Z. The mask is expressed as
+# RX(mask[i]) rotations so one transpiled circuit serves every target:
+# binding mask[i] = π gives an X gate (up to global phase), 0 gives the
+# identity.
+#
+# Several marked records: one phase oracle flips the sign of every
+# record satisfying the threshold predicate (score < threshold), so its
+# cost does not depend on how many records are marked. A ±1 diagonal is
+# a sum of parity terms: (-1)^f(x) = exp(iπ f(x)) and f(x) expands into
+# Walsh coefficients f̂(s)(-1)^(s·x). Each term is an RZ on a qubit
+# holding the parity s·x; walking the subsets in Gray-code order moves
+# from one parity to the next with a single CNOT. That gives 2**n - 1
+# RZ(phase[s]) and about 2**n CNOTs for any marked set (a masked flip
+# costs about 2**(n-1) once decomposed, so this pays off from M = 2).
+# As with the mask, the marked set is bound into one transpiled
+# template as RZ angles.
+
+def oracle(qc, mask, n):
+
+    for i in range(n):
+        qc.rx(mask[i], i)
 
     qc.h(n-1)
     qc.mcx(list(range(n-1)), n-1)
     qc.h(n-1)
 
-    for i, bit in enumerate(target):
-        if bit == '0':
-            qc.x(i)
+    for i in range(n):
+        qc.rx(mask[i], i)
+
+
+def mask_values(targets):
+
+    return [pi if bit == '0' else 0.0 for target in targets for bit in target]
+
+
+def phase_oracle(qc, phase, n):
+    # phase[s - 1]: RZ angle of the parity of the qubits in bitmask s
+
+    for k in range(n):
+
+        # Subsets s = {k} ∪ gray, gray ⊆ qubits below k; the parity
+        # accumulates on qubit k
+        previous = 0
+
+        for step in range(2**k):
+
+            gray = step ^ (step >> 1)
+
+            if gray != previous:
+                qc.cx((gray ^ previous).bit_length() - 1, k)
+
+            qc.rz(phase[(gray | 1 << k) - 1], k)
+
+            previous = gray
+
+        # The Gray code ends on the single qubit k - 1
+        if previous:
+            qc.cx(previous.bit_length() - 1, k)
+
+
+def phase_values(indices, n):
+
+    # λ_s = -2π f̂(s): RZ(λ) on parity p applies exp(-iλ/2 (-1)^p).
+    # f̂ by fast Walsh-Hadamard transform; s = 0 is a global phase.
+    f = np.zeros(2**n)
+    f[np.asarray(indices, dtype=np.int64)] = 1
+
+    half = 1
+
+    while half < len(f):
+        f = f.reshape(-1, 2, half)
+        f = np.stack([f[:, 0] + f[:, 1], f[:, 0] - f[:, 1]], axis=1).reshape(-1)
+        half *= 2
+
+    return (-2 * pi * f[1:] / 2**n).tolist()
 
 
 # ============================================================
 # DIFFUSER
 # ============================================================
 
-def diffuser(qc):
+def diffuser(qc, n):
 
     qc.h(range(n))
     qc.x(range(n))
@@ -124,31 +266,94 @@ def diffuser(qc):
 # GROVER CIRCUIT
 # ============================================================
 
-def build_grover_circuit(target):
+def grover_iterations(N, num_marked=1):
+
+    # Optimal count floor(π / 4θ), sin θ = sqrt(M/N); ≈ π/4·sqrt(N) for M = 1
+    return int(pi / (4 * asin(sqrt(num_marked / N))))
+
+
+def build_grover_circuit(n, iterations, oracle_kind="mask"):
 
     qc = QuantumCircuit(n, n)
 
     qc.h(range(n))
 
-    iterations = int(pi/4 * sqrt(N))
+    if oracle_kind == "phase":
+        phase = ParameterVector("phase", 2**n - 1)
+    else:
+        mask = ParameterVector("mask", n)
 
     for _ in range(iterations):
-        oracle(qc, target)
-        diffuser(qc)
+        if oracle_kind == "phase":
+            phase_oracle(qc, phase, n)
+        else:
+            oracle(qc, mask, n)
+        diffuser(qc, n)
 
     qc.measure(range(n), range(n))
 
-    return qc, iterations
+    return qc
+
+
+def grover_template(n, iterations, backend, oracle_kind="mask"):
+
+    key = {
+        "circuit": "grover",
+        "n": n,
+        "iterations": iterations,
+        "oracle": oracle_kind,
+        "backend": backend.name,
+        "noise": NOISE_KEYS.get(id(backend))
+    }
+
+    return circuit_cache.get(key, lambda: build_grover_circuit(n, iterations, oracle_kind), backend)
+
+
+def bind_targets(template, targets, backend):
+
+    return bind(template, mask_values(targets), backend)
+
+
+def bind(template, values, backend):
+
+    # A zero-iteration circuit has no oracle and nothing to bind
+    bound = template.assign_parameters(values) \
+        if template.num_parameters else template
+
+    # Restore plain X gates, then let the 1-qubit peephole pass merge
+    # them as transpile() would have: gates, depth and gate noise match
+    # a circuit transpiled for this target directly.
+    qc = bound.copy_empty_like()
+
+    for instruction in bound.data:
+        if instruction.operation.name == "rx":
+            if isclose(float(instruction.operation.params[0]), 0.0, abs_tol=1e-12):
+                continue
+            instruction = instruction.replace(operation=XGate())
+        qc.append(instruction)
+
+    return PassManager([Optimize1qGatesDecomposition(target=backend.target)]).run(qc)
+
+
+def marked_circuit(indices, n, iterations, backend):
+    # Transpiled Grover circuit marking indices: the masked single-target
+    # oracle for one record, the phase oracle for several
+
+    if len(indices) == 1:
+        return bind_targets(grover_template(n, iterations, backend),
+                            [target_string(int(indices[0]), n)], backend)
+
+    return bind(grover_template(n, iterations, backend, "phase"),
+                phase_values(indices, n), backend)
 
 
 # ============================================================
 # RUN FUNCTION
 # ============================================================
 
-def run(qc, backend, shots):
-
-    tqc = transpile(qc, backend)
+def run(tqc, backend, shots):
 
+    # tqc must already be transpiled for backend (see grover_template)
     depth = tqc.depth()
 
     job = backend.run(tqc, shots=shots)
@@ -158,104 +363,524 @@ def run(qc, backend, shots):
     return counts, depth
 
 
+def submit_batch(tqcs, backend, shots, memory=False, **options):
+
+    # Returns immediately; Aer jobs execute asynchronously. options are
+    # Aer run options, e.g. a noise_model overriding the backend's own.
+    return backend.run(list(tqcs), shots=shots, memory=memory,
+                       max_parallel_experiments=MAX_PARALLEL_EXPERIMENTS, **options)
+
+
+def run_finite_shots(tqcs, backend, shot_counts, subsample=None, **options):
+    # Returns {shots: [counts per circuit]} for every shot count
+
+    subsample = SUBSAMPLE_SHOTS if subsample is None else subsample
+
+    if subsample:
+        result = submit_batch(tqcs, backend, max(shot_counts), memory=True, **options).result()
+        memories = [result.get_memory(i) for i in range(len(tqcs))]
+        return {shots: [dict(Counter(memory[:shots])) for memory in memories]
+                for shots in shot_counts}
+
+    # One job per shot count, all submitted before waiting on any
+    jobs = {shots: submit_batch(tqcs, backend, shots, **options) for shots in shot_counts}
+
+    return {shots: [job.result().get_counts(i) for i in range(len(tqcs))]
+            for shots, job in jobs.items()}
+
+
+def run_statevector(indices, n, iterations, shots):
+
+    counts, _ = grover_statevector.run(n, np.asarray(indices), iterations, shots)
+
+    return counts
+
+
 # ============================================================
-# EXECUTION
+# EXPONENTIAL SEARCH
 # ============================================================
 
-results = []
-noise_results = []
+# Give up after this many oracle queries per sqrt(N) when nothing marked
+# is found (BBHT needs about 4.5·sqrt(N/M) on average)
+MAX_QUERY_FACTOR = 9
 
-print("\nRunning Grover search...\n")
 
-for s in targets_binary:
+def measure_once(indices, n, iterations, backend):
 
-    print("Processing target:", s)
+    # A single shot of a Grover circuit; returns the measured index
+    if backend == "statevector":
+        counts = run_statevector(indices, n, iterations, 1)
+    else:
+        counts, _ = run(marked_circuit(indices, n, iterations, ideal_backend), ideal_backend, 1)
 
-    qc, iterations = build_grover_circuit(s)
+    return int(next(iter(counts)), 2)
 
-    counts, depth = run(qc, ideal_backend, base_shots)
 
-    success = counts.get(s, 0) / base_shots
+def exponential_search(indices, n, backend, rng=None):
+    # Boyer-Brassard-Høyer-Tapp: finds a marked record without knowing
+    # how many are marked by drawing the iteration count at random from
+    # a range that grows by 6/5 per miss. Each measured index is checked
+    # classically. Returns (index or None, last iterations, total queries).
 
-    results.append({
-        "target": s,
-        "iterations": iterations,
-        "success": success,
-        "depth": depth
-    })
+    rng = rng or np.random.default_rng()
 
-    for shots in finite_shots:
+    marked = set(int(i) for i in indices)
 
-        qc_noise, _ = build_grover_circuit(s)
+    N = 2**n
 
-        counts_noise, _ = run(qc_noise, noisy_backend, shots)
+    m = 1.0
+    queries = 0
+    iterations = 0
 
-        success_noise = counts_noise.get(s, 0) / shots
+    while queries < MAX_QUERY_FACTOR * sqrt(N):
 
-        noise_results.append({
-            "target": s,
-            "shots": shots,
-            "success": success_noise
+        iterations = int(rng.integers(0, int(m)))
+
+        index = measure_once(indices, n, iterations, backend)
+
+        queries += iterations
+
+        if index in marked:
+            return index, iterations, queries
+
+        m = min(6 / 5 * m, sqrt(N))
+
+    return None, iterations, queries
+
+
+# ============================================================
+# CROSS-VALIDATION
+# ============================================================
+
+def validate_statevector(qubits=range(2, 7), shots=8192, seed=7):
+
+    # Exact NumPy probabilities must agree with Aer sampling within
+    # binomial error; a mismatch points at bit-order or oracle bugs.
+    rng = np.random.default_rng(seed)
+
+    rows = []
+
+    for n in qubits:
+
+        N = 2**n
+
+        index = int(rng.integers(N))
+        target = target_string(index, n)
+
+        iterations = grover_iterations(N)
+
+        template = grover_template(n, iterations, ideal_backend)
+
+        tqc = bind_targets(template, [target], ideal_backend)
+
+        counts, _ = run(tqc, ideal_backend, shots)
+
+        aer = counts.get(measured_key(target), 0) / shots
+        exact = grover_statevector.analytic_success(N, 1, iterations)
+        statevector = grover_statevector.probabilities(n, index, iterations)[index]
+
+        tolerance = 5 * sqrt(exact * (1 - exact) / shots) + 1e-9
+
+        rows.append({
+            "qubits": n,
+            "target": target,
+            "iterations": iterations,
+            "aer": aer,
+            "statevector": statevector,
+            "analytic": exact,
+            "ok": abs(aer - statevector) <= tolerance and abs(statevector - exact) < 1e-9
         })
 
+    df = pd.DataFrame(rows)
+
+    print(df.to_string(index=False))
+
+    if not df["ok"].all():
+        raise AssertionError("Statevector backend disagrees with Aer")
+
+    print("Statevector backend agrees with Aer")
+
+    return df
+
 
 # ============================================================
-# SAVE RESULTS
+# BLOCK SEARCH
 # ============================================================
 
-df1 = pd.DataFrame(results)
-df1.to_csv(csv_main, index=False)
+_block_backend = None
+
+
+def _init_block_worker():
+
+    global _block_backend
+
+    # One simulator per worker process, single-threaded so the pool
+    # rather than Aer decides how many cores are busy
+    _block_backend = AerSimulator(max_parallel_threads=1)
+
+
+def search_block(block, start, scores, backend, threshold, shots):
+    # Threshold search over one block; hits are global record indices
+
+    block_start = time.time()
+
+    N = len(scores)
+    n = max(2, int(ceil(log2(N))))
+
+    marked = np.flatnonzero(scores < threshold)
+
+    row = {
+        "block": block,
+        "start": start,
+        "records": N,
+        "marked": len(marked),
+        "iterations": 0,
+        "success": np.nan,
+        "found": 0,
+        "depth": 0
+    }
+
+    hits = []
+
+    # Nothing to find: no circuit is needed
+    if len(marked):
+
+        # The last block may be partial; the diffuser still spans 2**n
+        iterations = grover_iterations(2**n, len(marked))
+
+        if backend == "statevector":
+            counts = run_statevector(marked, n, iterations, shots)
+            depth = np.nan
+        else:
+            simulator = _block_backend or ideal_backend
+            counts, depth = run(marked_circuit(marked, n, iterations, simulator), simulator, shots)
+
+        found = [i for i in marked if counts.get(format(i, f'0{n}b'), 0)]
+
+        hits = [start + int(i) for i in found]
+
+        row.update({
+            "iterations": iterations,
+            "success": marked_hits(counts, marked, n)[0] / shots,
+            "found": len(found),
+            "depth": depth
+        })
+
+    row["seconds"] = time.time() - block_start
+
+    return row, hits
+
+
+def search_blocks(ai_detected_logs=None, block_qubits=None, workers=None,
+                  backend=None, threshold=None, shots=None):
+
+    block_qubits = block_qubits or BLOCK_QUBITS
+    workers = workers or BLOCK_WORKERS
+    backend = backend or BACKEND
+    threshold = SCORE_THRESHOLD if threshold is None else threshold
+    shots = shots or base_shots
+
+    if ai_detected_logs is None or isinstance(ai_detected_logs, str):
+        print("\nLoading AI detected anomalies...")
+        ai_detected_logs = read_logs(ai_detected_logs or INPUT_PATH, columns=["anomaly_score"])
+
+    scores = ai_detected_logs["anomaly_score"].to_numpy()
+
+    block_size = 2**block_qubits
+
+    starts = range(0, len(scores), block_size)
+
+    print(f"Records: {len(scores)} | Blocks: {len(starts)} of {block_size} | "
+          f"Workers: {workers} | Backend: {backend}")
+
+    wall_start = time.time()
+
+    args = [(block, start, scores[start:start + block_size], backend, threshold, shots)
+            for block, start in enumerate(starts)]
+
+    if workers <= 1:
+        outcomes = [search_block(*a) for a in args]
+    else:
+        with ProcessPoolExecutor(workers, initializer=_init_block_worker) as pool:
+            outcomes = list(pool.map(search_block, *zip(*args)))
+
+    wall_time = time.time() - wall_start
 
-df2 = pd.DataFrame(noise_results)
-df2.to_csv(csv_noise, index=False)
+    df_blocks = pd.DataFrame([row for row, _ in outcomes])
 
-print("\nSaved:", csv_main)
-print("Saved:", csv_noise)
+    hits = sorted(i for _, block_hits in outcomes for i in block_hits)
+
+    df_hits = pd.DataFrame({"record": hits, "anomaly_score": scores[hits]})
+
+    os.makedirs("evaluation", exist_ok=True)
+
+    df_blocks.to_csv(csv_blocks, index=False)
+    df_hits.to_csv(csv_hits, index=False)
+
+    print(df_blocks.to_string(index=False))
+
+    print(f"\nMarked records: {int(df_blocks['marked'].sum())} | "
+          f"Found: {len(hits)} | Wall time: {wall_time:.2f}s "
+          f"(block time sum: {df_blocks['seconds'].sum():.2f}s)")
+
+    print("Saved:", csv_blocks)
+    print("Saved:", csv_hits)
+
+    return df_blocks, df_hits
 
 
 # ============================================================
-# PLOT IDEAL SUCCESS
+# PLOTS
 # ============================================================
 
-plt.figure()
+def plot_results(df1, df2):
+
+    fig = Figure()
+    ax = fig.add_subplot()
+
+    ax.bar(df1["target"], df1["success"])
+
+    ax.set_title("Grover Success Probability (Ideal)")
+    ax.set_xlabel("Target state")
+    ax.set_ylabel("Success")
+
+    fig.tight_layout()
+    fig.savefig(plot_main)
+
+    print("Saved:", plot_main)
+
+    fig = Figure()
+    ax = fig.add_subplot()
+
+    for t in df2["target"].unique():
+
+        sub = df2[df2["target"] == t]
 
-plt.bar(df1["target"], df1["success"])
+        ax.plot(sub["shots"], sub["success"], marker="o", label=t)
 
-plt.title("Grover Success Probability (Ideal)")
-plt.xlabel("Target state")
-plt.ylabel("Success")
+    ax.set_xscale("log", base=2)
 
-plt.tight_layout()
-plt.savefig(plot_main)
-plt.close()
+    ax.set_xlabel("Shots")
+    ax.set_ylabel("Success")
+    ax.set_title("Grover Performance Under Noise")
 
-print("Saved:", plot_main)
+    ax.legend()
+
+    fig.tight_layout()
+    fig.savefig(plot_noise)
+
+    print("Saved:", plot_noise)
 
 
 # ============================================================
-# PLOT NOISE PERFORMANCE
+# SEARCH PLANNING
 # ============================================================
 
-plt.figure()
+def plan_searches(df_logs, n, mode, backend):
+    # Each search: display label, marked record indices, iterations.
+    # The diffuser spans all 2**n states, not just the populated ones,
+    # so the iteration count is taken over the full search space.
+
+    N = 2**n
+
+    searches = []
+
+    if mode == "threshold":
+
+        marked = select_marked(df_logs)
+
+        print(f"Records scoring below {SCORE_THRESHOLD}:", len(marked))
+
+        if len(marked) == 0:
+            print("No marked records; falling back to single-target searches")
+            mode = "targets"
+
+    if mode == "threshold":
+
+        if COUNT_KNOWN:
+            iterations = grover_iterations(N, len(marked))
+        else:
+            index, iterations, queries = exponential_search(marked, n, backend)
+            print(f"Exponential search: found {index} after {queries} oracle queries "
+                  f"(last round: {iterations} iterations)")
+
+        searches.append({
+            "target": f"score<{SCORE_THRESHOLD}",
+            "indices": marked,
+            "iterations": iterations
+        })
+
+    else:
+
+        targets, targets_binary = select_targets(df_logs, n)
+
+        print("Targets selected:", targets)
+        print("Binary targets:", targets_binary)
+
+        searches.extend({
+            "target": s,
+            "indices": [t],
+            "iterations": grover_iterations(N)
+        } for t, s in zip(targets, targets_binary))
+
+    return searches
+
+
+def bind_searches(searches, n, backend):
+
+    # Transpiled once per (oracle, iterations), or loaded from disk; the
+    # searches' marked records are bound in
+    return [marked_circuit(search["indices"], n, search["iterations"], backend)
+            for search in searches]
+
+
+def marked_hits(counts, indices, n):
+
+    # Shots landing on any marked record, and distinct records seen
+    hits = [counts.get(format(i, f'0{n}b'), 0) for i in indices]
+
+    return sum(hits), int(np.count_nonzero(hits))
+
+
+# ============================================================
+# EXECUTION
+# ============================================================
 
-for t in df2["target"].unique():
+def main(ai_detected_logs=None, backend=None, mode=None):
 
-    sub = df2[df2["target"] == t]
+    backend = backend or BACKEND
+    mode = mode or SEARCH_MODE
 
-    plt.plot(sub["shots"], sub["success"], marker="o", label=t)
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown Grover backend: {backend}")
 
-plt.xscale("log", base=2)
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"Unknown Grover search mode: {mode}")
 
-plt.xlabel("Shots")
-plt.ylabel("Success")
-plt.title("Grover Performance Under Noise")
+    if ai_detected_logs is None or isinstance(ai_detected_logs, str):
+        print("\nLoading AI detected anomalies...")
+        # Only the first MAX_RECORDS scores are read
+        batches = iter_logs(ai_detected_logs or INPUT_PATH, columns=["anomaly_score"],
+                            batch_size=MAX_RECORDS)
+        ai_detected_logs = next(batches, pd.DataFrame(columns=["anomaly_score"]))
 
-plt.legend()
+    df_logs = ai_detected_logs.head(MAX_RECORDS)
 
-plt.tight_layout()
-plt.savefig(plot_noise)
-plt.close()
+    N = len(df_logs)
 
-print("Saved:", plot_noise)
+    print("Total anomalies used:", N)
+
+    n = int(ceil(log2(N)))
+
+    print("Qubits required:", n)
+    print("Quantum search space:", 2**n)
+
+    searches = plan_searches(df_logs, n, mode, backend)
+
+    os.makedirs("evaluation", exist_ok=True)
+
+    results = []
+    noise_results = []
+
+    print(f"\nRunning Grover search ({backend} backend)...\n")
+
+    ideal_circuits = bind_searches(searches, n, ideal_backend)
+    noisy_circuits = bind_searches(searches, n, noisy_backend)
+
+    # All ideal circuits go out as one job, running while the noisy
+    # jobs (which dominate the cost) are submitted and simulated
+    if backend == "aer":
+        ideal_job = submit_batch(ideal_circuits, ideal_backend, base_shots)
+
+    noisy_counts = run_finite_shots(noisy_circuits, noisy_backend, finite_shots) \
+        if finite_shots else {}
+
+    if backend == "aer":
+        ideal_result = ideal_job.result()
+        ideal_counts = [ideal_result.get_counts(i) for i in range(len(ideal_circuits))]
+    else:
+        ideal_counts = [run_statevector(search["indices"], n, search["iterations"], base_shots)
+                        for search in searches]
+
+    for i, search in enumerate(searches):
+
+        print("Processing target:", search["target"])
+
+        hits, found = marked_hits(ideal_counts[i], search["indices"], n)
+
+        results.append({
+            "target": search["target"],
+            "marked": len(search["indices"]),
+            "iterations": search["iterations"],
+            "success": hits / base_shots,
+            "found": found,
+            "depth": ideal_circuits[i].depth()
+        })
+
+        for shots in finite_shots:
+
+            hits_noise, _ = marked_hits(noisy_counts[shots][i], search["indices"], n)
+
+            noise_results.append({
+                "target": search["target"],
+                "shots": shots,
+                "success": hits_noise / shots
+            })
+
+    # ========================================================
+    # SAVE RESULTS
+    # ========================================================
+
+    df1 = pd.DataFrame(results)
+    df1.to_csv(csv_main, index=False)
+
+    df2 = pd.DataFrame(noise_results)
+    df2.to_csv(csv_noise, index=False)
+
+    print("\nSaved:", csv_main)
+    print("Saved:", csv_noise)
+
+    plot_results(df1, df2)
+
+    print("\nGrover layer completed successfully.\n")
+
+    return df1, df2
+
+
+# ============================================================
+# MAIN
+# ============================================================
 
-print("\nGrover layer completed successfully.\n")
\ No newline at end of file
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Grover search over anomaly indices")
+    parser.add_argument("--backend", choices=BACKENDS, default=BACKEND,
+                        help="simulator for the ideal runs")
+    parser.add_argument("--mode", choices=SEARCH_MODES, default=SEARCH_MODE,
+                        help="single-target searches, or one search marking every record "
+                             "scoring below --threshold")
+    parser.add_argument("--threshold", type=float, default=SCORE_THRESHOLD)
+    parser.add_argument("--unknown-count", action="store_true",
+                        help="threshold mode: use exponential search instead of the marked count")
+    parser.add_argument("--blocks", type=int, nargs="?", const=BLOCK_QUBITS, metavar="K",
+                        help="search all records in blocks of 2**K (default K: "
+                             f"{BLOCK_QUBITS}) instead of the first {MAX_RECORDS}")
+    parser.add_argument("--workers", type=int, default=BLOCK_WORKERS,
+                        help="block search processes")
+    parser.add_argument("--subsample-shots", action="store_true",
+                        help="simulate max(finite_shots) once and subsample smaller shot counts")
+    parser.add_argument("--validate", action="store_true",
+                        help="cross-check the statevector backend against Aer and exit")
+
+    args = parser.parse_args()
+
+    SUBSAMPLE_SHOTS = SUBSAMPLE_SHOTS or args.subsample_shots
+    SCORE_THRESHOLD = args.threshold
+    COUNT_KNOWN = COUNT_KNOWN and not args.unknown_count
+
+    if args.validate:
+        validate_statevector()
+    elif args.blocks:
+        search_blocks(block_qubits=args.blocks, workers=args.workers, backend=args.backend)
+    else:
+        main(backend=args.backend, mode=args.mode)
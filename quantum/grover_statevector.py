@@ -0,0 +1,61 @@
+import numpy as np
+from math import asin, sin, sqrt
+
+# ============================================================
+# NUMPY STATEVECTOR GROVER BACKEND
+# ============================================================
+
+# Ideal Grover search never leaves the span of "marked" and "unmarked"
+# basis states, so it needs no circuit: the oracle is a sign flip on
+# the marked amplitudes and the diffuser an inversion about the mean.
+# Basis index i corresponds to Qiskit's count key format(i, f"0{n}b").
+
+
+def grover_statevector(n, marked, iterations):
+
+    N = 2**n
+
+    amplitudes = np.full(N, 1 / sqrt(N))
+
+    for _ in range(iterations):
+        # Oracle: phase flip on the marked states
+        amplitudes[marked] *= -1
+
+        # Diffuser: inversion about the mean
+        amplitudes = 2 * amplitudes.mean() - amplitudes
+
+    return amplitudes
+
+
+def analytic_success(N, num_marked, iterations):
+
+    # Closed form: P(marked) = sin²((2k+1)θ), sin θ = sqrt(M/N)
+    theta = asin(sqrt(num_marked / N))
+
+    return sin((2 * iterations + 1) * theta) ** 2
+
+
+def probabilities(n, marked, iterations):
+
+    probs = grover_statevector(n, marked, iterations) ** 2
+
+    return probs / probs.sum()
+
+
+def sample_counts(probs, shots, n, rng=None):
+
+    rng = rng or np.random.default_rng()
+
+    samples = rng.multinomial(shots, probs)
+
+    nonzero = np.flatnonzero(samples)
+
+    return {format(i, f"0{n}b"): int(samples[i]) for i in nonzero}
+
+
+def run(n, marked, iterations, shots, rng=None):
+    # Same contract as the Aer path: measurement counts keyed like Qiskit
+
+    probs = probabilities(n, marked, iterations)
+
+    return sample_counts(probs, shots, n, rng), float(probs[marked].sum())
@@ -0,0 +1,282 @@
+import os
+import json
+import uuid
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+
+import numpy as np
+
+from quantum import mdi_qkd
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+
+KEY_BITS = 256
+
+# Keys buffered per tier; the refill thread tops a tier up to POOL_SIZE
+# whenever it drops below LOW_WATER
+POOL_SIZE = 64
+LOW_WATER = 16
+
+# A handed-out key is reused until it has sealed MAX_USES artifacts,
+# then the tier rotates to the next buffered key
+MAX_USES = 100
+
+# Pulses simulated per refill round (≈ 20 keys per 10^4 pulses at low QBER)
+REFILL_PULSES = 100_000
+
+# Key IDs and their use, never key material
+REGISTRY_PATH = "secure_storage/key_registry.jsonl"
+
+# ============================================================
+# KEY POOL
+# ============================================================
+
+# Keys are cut from MDI-QKD secure keys (already reconciled and privacy
+# amplified, so every 256-bit slice is directly usable as an AES-256
+# key). Each threat tier is fed by its own (noise, attack) scenario.
+
+
+@dataclass
+class PoolKey:
+
+    key_id: str
+    tier: str
+    qber: float
+    key: bytes = field(repr=False)
+    created: str
+    uses: int = 0
+
+
+class KeyPool:
+
+    def __init__(self, scenarios, pool_size=POOL_SIZE, low_water=LOW_WATER,
+                 max_uses=MAX_USES, refill_pulses=REFILL_PULSES,
+                 registry_path=REGISTRY_PATH, seed=None):
+
+        # scenarios: {tier: (noise, attack_probability)}; max_uses is one
+        # limit for all tiers or {tier: limit}
+        self.scenarios = dict(scenarios)
+        self.pool_size = pool_size
+        self.low_water = low_water
+        self.max_uses = max_uses
+        self.refill_pulses = refill_pulses
+        self.registry_path = registry_path
+
+        self._rng = np.random.RandomState(seed)
+        self._buffers = {tier: deque() for tier in self.scenarios}
+        self._current = dict.fromkeys(self.scenarios)
+        self._condition = threading.Condition()
+        self._registry_lock = threading.Lock()
+        self._thread = None
+        self._stopping = False
+        self._error = None
+
+        self.counters = {tier: {"generated": 0, "issued": 0, "uses": 0, "rotations": 0}
+                         for tier in self.scenarios}
+
+    # --------------------------------------------------------
+    # Background refill
+    # --------------------------------------------------------
+
+    def start(self):
+
+        if self._thread is None:
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="qkd-key-pool", daemon=True)
+            self._thread.start()
+
+        return self
+
+    def stop(self):
+
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+        with self._condition:
+            self._raise_error()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, *exc_info):
+        try:
+            self.stop()
+        except Exception:
+            # Already reported by acquire() if the block is failing
+            if exc_type is None:
+                raise
+
+    def _low_tiers(self):
+        return [tier for tier, buffer in self._buffers.items() if len(buffer) < self.low_water]
+
+    def _run(self):
+
+        while True:
+
+            with self._condition:
+                self._condition.wait_for(lambda: self._stopping or self._low_tiers())
+                if self._stopping:
+                    return
+                tiers = self._low_tiers()
+
+            try:
+                for tier in tiers:
+                    while len(self._buffers[tier]) < self.pool_size and not self._stopping:
+                        self.refill(tier)
+            except Exception as error:
+                # Handed to the next acquire() / stop() instead of the
+                # thread dying silently
+                with self._condition:
+                    self._error = error
+                    self._condition.notify_all()
+                return
+
+    def _raise_error(self):
+
+        # Caller holds the lock
+        if self._error is not None:
+            raise self._error
+
+    def refill(self, tier):
+
+        noise, attack = self.scenarios[tier]
+
+        # Simulation runs outside the lock; handouts continue meanwhile
+        secure_key, qber = mdi_qkd.generate_secure_key(noise, attack, self._rng,
+                                                       self.refill_pulses)
+
+        created = datetime.now().isoformat()
+
+        keys = [PoolKey(uuid.uuid4().hex, tier, qber,
+                        secure_key[start:start + KEY_BITS].tobytes(), created)
+                for start in range(0, len(secure_key) - KEY_BITS + 1, KEY_BITS)]
+
+        if not keys:
+            raise RuntimeError(f"Scenario {self.scenarios[tier]} for tier {tier} "
+                               "yields no secure key")
+
+        with self._condition:
+            self._buffers[tier].extend(keys)
+            self.counters[tier]["generated"] += len(keys)
+            self._condition.notify_all()
+
+        self._register([{"event": "generated", "key_id": k.key_id, "tier": tier,
+                         "qber": qber, "time": created} for k in keys])
+
+        return len(keys)
+
+    # --------------------------------------------------------
+    # Handout
+    # --------------------------------------------------------
+
+    def acquire(self, tier, timeout=30):
+
+        with self._condition:
+
+            key = self._current[tier]
+
+            if key is None or key.uses >= self._max_uses(tier):
+                key = self._rotate(tier, timeout)
+
+            key.uses += 1
+            self.counters[tier]["uses"] += 1
+
+            return key
+
+    def _max_uses(self, tier):
+
+        if isinstance(self.max_uses, dict):
+            return self.max_uses.get(tier, MAX_USES)
+
+        return self.max_uses
+
+    def _rotate(self, tier, timeout):
+
+        # Caller holds the lock
+        buffer = self._buffers[tier]
+        stale = self._current[tier]
+
+        if not buffer:
+            if self._thread is None:
+                # No refill thread: refill synchronously
+                self._condition.release()
+                try:
+                    self.refill(tier)
+                finally:
+                    self._condition.acquire()
+            else:
+                self._raise_error()
+                self._condition.notify_all()
+                if not self._condition.wait_for(lambda: buffer or self._error, timeout):
+                    raise TimeoutError(f"No {tier} key available after {timeout}s")
+                if not buffer:
+                    self._raise_error()
+
+            # Another caller may have rotated while the lock was released
+            current = self._current[tier]
+            if current is not stale and current.uses < self._max_uses(tier):
+                return current
+
+        key = buffer.popleft()
+
+        if self._current[tier] is not None:
+            self.counters[tier]["rotations"] += 1
+
+        self._current[tier] = key
+        self.counters[tier]["issued"] += 1
+
+        if len(buffer) < self.low_water:
+            self._condition.notify_all()
+
+        self._register([{"event": "issued", "key_id": key.key_id, "tier": tier,
+                         "time": datetime.now().isoformat()}])
+
+        return key
+
+    def record_seal(self, key, artifact):
+
+        # Ties an encrypted artifact to the key that sealed it
+        self._register([{"event": "sealed", "key_id": key.key_id, "tier": key.tier,
+                         "use": key.uses, "artifact": artifact,
+                         "time": datetime.now().isoformat()}])
+
+    def available(self, tier):
+        return len(self._buffers[tier])
+
+    # --------------------------------------------------------
+    # Registry
+    # --------------------------------------------------------
+
+    def _register(self, events):
+
+        if self.registry_path is None:
+            return
+
+        with self._registry_lock:
+            os.makedirs(os.path.dirname(self.registry_path) or ".", exist_ok=True)
+            with open(self.registry_path, "a") as f:
+                for event in events:
+                    f.write(json.dumps(event) + "\n")
+
+
+def sealing_key(registry_path, artifact):
+
+    # Latest key_id recorded as sealing the given artifact
+    key_id = None
+
+    with open(registry_path) as f:
+        for line in f:
+            event = json.loads(line)
+            if event["event"] == "sealed" and event["artifact"] == artifact:
+                key_id = event["key_id"]
+
+    return key_id
@@ -1,7 +1,14 @@
 import os
+import time
+import argparse
+from itertools import product
+
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+
+from quantum.bitarray import PackedBits, popcount
+from quantum.qkd_postprocessing import estimated_leak, postprocess, secure_key_length
 
 # ============================================================
 # CONFIGURATION
@@ -11,150 +18,285 @@ NUM_BITS = 10000
 NOISE_LEVELS = [0.0, 0.02, 0.05, 0.1]
 ATTACK_PROBABILITIES = [0.0, 0.1, 0.25, 0.5]
 
-np.random.seed(42)
+SEED = 42
+
+# "batch" simulates every (noise, attack) scenario at once on bit-packed
+# (scenarios x bits) blocks; "loop" runs run_simulation per scenario.
+ENGINES = ["batch", "loop"]
+ENGINE = "batch"
+
+# Random values held per block (scenarios x bits); bounds peak memory
+# at about 5 bytes per element, independent of NUM_BITS.
+CHUNK_ELEMENTS = 1 << 24
 
-os.makedirs("evaluation", exist_ok=True)
+OUTPUT_PATH = "evaluation/mdi_qkd_results.csv"
+QBER_PLOT_PATH = "evaluation/mdi_qkd_qber_plot.png"
+KEYRATE_PLOT_PATH = "evaluation/mdi_qkd_keyrate_plot.png"
 
 # ============================================================
 # CORE PROTOCOL LOGIC (CORRECTED)
 # ============================================================
 
-def generate_bits(n):
-    return np.random.randint(0, 2, n)
+# Every helper draws from an explicit RandomState so the simulation
+# stays reproducible when other stages run in the same process. Bits,
+# bases and masks are PackedBits (8 per byte); the draws are the same
+# as with plain int arrays, so results are unchanged.
 
-def generate_bases(n):
-    return np.random.randint(0, 2, n)  # 0 = Z, 1 = X
+def generate_bits(n, rng):
+    return PackedBits.from_bits(rng.randint(0, 2, n))
 
-def apply_noise(bits, noise_level):
-    flip_mask = np.random.rand(len(bits)) < noise_level
-    noisy = np.copy(bits)
-    noisy[flip_mask] ^= 1
-    return noisy
+def generate_bases(n, rng):
+    return PackedBits.from_bits(rng.randint(0, 2, n))  # 0 = Z, 1 = X
 
-def intercept_resend_attack(bits, attack_prob):
-    attack_mask = np.random.rand(len(bits)) < attack_prob
-    attacked = np.copy(bits)
-    random_bits = np.random.randint(0, 2, len(bits))
-    attacked[attack_mask] = random_bits[attack_mask]
-    return attacked
+def apply_noise(bits, noise_level, rng):
+    flip_mask = PackedBits.bernoulli(len(bits), noise_level, rng)
+    return bits ^ flip_mask
 
-def calculate_qber(a, b):
-    return np.sum(a != b) / len(a)
+def intercept_resend_attack(bits, attack_prob, rng):
+    attack_mask = PackedBits.bernoulli(len(bits), attack_prob, rng)
+    random_bits = generate_bits(len(bits), rng)
+    return (bits & ~attack_mask) | (random_bits & attack_mask)
 
-def privacy_amplification(key, qber):
-    reduction_factor = max(0, 1 - 2*qber)
-    new_length = int(len(key) * reduction_factor)
-    return key[:new_length]
+def calculate_qber(a, b):
+    return a.hamming_distance(b) / len(a)
 
 # ============================================================
 # MDI-QKD SIMULATION
 # ============================================================
 
-def run_simulation(noise, attack_prob):
+def generate_secure_key(noise, attack_prob, rng, num_bits=None):
+    # Returns the shared secure key (PackedBits) and the sifted QBER
+
+    num_bits = num_bits or NUM_BITS
 
     # Alice prepares bits + bases
-    alice_bits = generate_bits(NUM_BITS)
-    alice_bases = generate_bases(NUM_BITS)
+    alice_bits = generate_bits(num_bits, rng)
+    alice_bases = generate_bases(num_bits, rng)
 
     # Bob prepares bases
-    bob_bases = generate_bases(NUM_BITS)
+    bob_bases = generate_bases(num_bits, rng)
 
     # In honest MDI, Bob reconstructs Alice’s bit
-    bob_bits = np.copy(alice_bits)
+    bob_bits = alice_bits
 
     # Attack occurs before noise
-    bob_bits = intercept_resend_attack(bob_bits, attack_prob)
+    bob_bits = intercept_resend_attack(bob_bits, attack_prob, rng)
 
     # Channel noise
-    bob_bits = apply_noise(bob_bits, noise)
+    bob_bits = apply_noise(bob_bits, noise, rng)
 
     # Sifting (keep only matching bases)
-    sift_mask = alice_bases == bob_bases
+    sift_mask = ~(alice_bases ^ bob_bases)
 
-    sifted_alice = alice_bits[sift_mask]
-    sifted_bob = bob_bits[sift_mask]
+    sifted_alice = alice_bits.compress(sift_mask)
+    sifted_bob = bob_bits.compress(sift_mask)
 
     if len(sifted_alice) == 0:
-        return 0, 0, 0
+        return PackedBits.zeros(0), 0
 
     qber = calculate_qber(sifted_alice, sifted_bob)
 
-    secure_key = privacy_amplification(sifted_alice, qber)
+    # Cascade reconciliation + Toeplitz privacy amplification; Alice and
+    # Bob end up with the same key (quantum.qkd_postprocessing)
+    post_rng = np.random.default_rng(rng.randint(2**31))
+
+    secure_key, _, _ = postprocess(sifted_alice, sifted_bob, qber, post_rng)
+
+    return secure_key, qber
+
+
+def run_simulation(noise, attack_prob, rng):
+
+    secure_key, qber = generate_secure_key(noise, attack_prob, rng)
 
     key_rate = len(secure_key) / NUM_BITS
 
     return qber, key_rate, len(secure_key)
 
 # ============================================================
-# MAIN EXECUTION
+# BATCHED MDI-QKD SIMULATION
 # ============================================================
 
-results = []
+# Bits are packed 8 per byte (uint8) along the bit axis, the 2-D
+# counterpart of PackedBits: XOR/AND act on 8 pulses at a time and
+# error/sift counts are popcounts.
+
+def random_bits(rng, scenarios, num_bytes):
+    return rng.integers(0, 256, (scenarios, num_bytes), dtype=np.uint8)
+
+
+def bernoulli_bits(rng, probabilities, num_bits):
+    # Packed bits set with a per-scenario probability; scenarios with
+    # probability 0 (e.g. no attack) draw nothing
+    packed = np.zeros((len(probabilities), (num_bits + 7) // 8), dtype=np.uint8)
+
+    rows = np.flatnonzero(probabilities > 0)
+
+    if len(rows):
+        draws = rng.random((len(rows), num_bits), dtype=np.float32)
+        packed[rows] = np.packbits(draws < probabilities[rows, None], axis=1)
+
+    return packed
+
+
+def simulate_grid(noise_levels, attack_probabilities, num_bits, rng,
+                  chunk_elements=CHUNK_ELEMENTS):
+
+    grid = list(product(noise_levels, attack_probabilities))
+
+    noise = np.array([g[0] for g in grid], dtype=np.float32)
+    attack = np.array([g[1] for g in grid], dtype=np.float32)
+
+    scenarios = len(grid)
+
+    chunk_bits = max(8, chunk_elements // scenarios // 8 * 8)
+
+    sifted = np.zeros(scenarios, dtype=np.int64)
+    errors = np.zeros(scenarios, dtype=np.int64)
+
+    for start in range(0, num_bits, chunk_bits):
+
+        bits = min(chunk_bits, num_bits - start)
+        num_bytes = (bits + 7) // 8
+
+        # Padding bits of a partial last byte never count as sifted
+        valid = np.packbits(np.ones(bits, dtype=bool))
+
+        alice_bits = random_bits(rng, scenarios, num_bytes)
 
-print("\nRunning Corrected Research-Grade MDI-QKD Simulation...\n")
+        # Sifting: Alice's and Bob's bases match
+        sift_mask = ~(random_bits(rng, scenarios, num_bytes)
+                      ^ random_bits(rng, scenarios, num_bytes)) & valid
 
-for noise in NOISE_LEVELS:
-    for attack in ATTACK_PROBABILITIES:
+        # Intercept-resend replaces attacked bits with random ones
+        attacked = bernoulli_bits(rng, attack, bits)
+        bob_bits = (alice_bits & ~attacked) | (random_bits(rng, scenarios, num_bytes) & attacked)
 
-        qber, key_rate, key_length = run_simulation(noise, attack)
+        # Channel noise
+        bob_bits ^= bernoulli_bits(rng, noise, bits)
 
-        print(f"Noise: {noise} | Attack: {attack} | QBER: {qber:.4f} | Key Rate: {key_rate:.4f}")
+        sifted += popcount(sift_mask).sum(axis=1, dtype=np.int64)
+        errors += popcount((alice_bits ^ bob_bits) & sift_mask).sum(axis=1, dtype=np.int64)
+
+    results = []
+
+    for (noise_level, attack_prob), n_sifted, n_errors in zip(grid, sifted, errors):
+
+        qber = float(n_errors / n_sifted) if n_sifted else 0
+
+        # Keys are not materialized here, so reconciliation leakage is
+        # estimated rather than measured by running Cascade
+        key_length = secure_key_length(n_sifted, qber, estimated_leak(n_sifted, qber)) \
+            if n_sifted else 0
 
         results.append({
-            "noise": noise,
-            "attack_probability": attack,
+            "noise": noise_level,
+            "attack_probability": attack_prob,
             "qber": qber,
-            "key_rate": key_rate,
+            "key_rate": key_length / num_bits,
             "secure_key_length": key_length
         })
 
+    return results
+
 # ============================================================
-# SAVE RESULTS
+# PLOTS
 # ============================================================
 
-df = pd.DataFrame(results)
-df.to_csv("evaluation/mdi_qkd_results.csv", index=False)
+def plot_metric(df, column, ylabel, title, path):
+
+    fig = Figure()
+    ax = fig.add_subplot()
+
+    for noise in NOISE_LEVELS:
+        subset = df[df["noise"] == noise]
+        ax.plot(subset["attack_probability"], subset[column], marker="o", label=f"Noise={noise}")
+
+    ax.set_xlabel("Attack Probability")
+    ax.set_ylabel(ylabel)
+    ax.set_title(title)
+    ax.legend()
+    fig.tight_layout()
+    fig.savefig(path)
 
-print("\nSaved: evaluation/mdi_qkd_results.csv")
+    print("Saved:", path)
 
 # ============================================================
-# PLOT QBER
+# MAIN EXECUTION
 # ============================================================
 
-plt.figure()
+def run_loop(rng):
 
-for noise in NOISE_LEVELS:
-    subset = df[df["noise"] == noise]
-    plt.plot(subset["attack_probability"], subset["qber"], marker="o", label=f"Noise={noise}")
+    results = []
 
-plt.xlabel("Attack Probability")
-plt.ylabel("QBER")
-plt.title("QBER vs Attack Probability (MDI-QKD)")
-plt.legend()
-plt.tight_layout()
-plt.savefig("evaluation/mdi_qkd_qber_plot.png")
-plt.close()
+    for noise in NOISE_LEVELS:
+        for attack in ATTACK_PROBABILITIES:
 
-print("Saved: evaluation/mdi_qkd_qber_plot.png")
+            qber, key_rate, key_length = run_simulation(noise, attack, rng)
 
-# ============================================================
-# PLOT KEY RATE
-# ============================================================
+            results.append({
+                "noise": noise,
+                "attack_probability": attack,
+                "qber": qber,
+                "key_rate": key_rate,
+                "secure_key_length": key_length
+            })
+
+    return results
+
+
+def main(engine=None, chunk_elements=None):
+
+    engine = engine or ENGINE
+    chunk_elements = chunk_elements or CHUNK_ELEMENTS
+
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown MDI-QKD engine: {engine}")
+
+    os.makedirs("evaluation", exist_ok=True)
+
+    print("\nRunning Corrected Research-Grade MDI-QKD Simulation...\n")
+
+    start_time = time.time()
+
+    if engine == "batch":
+        results = simulate_grid(NOISE_LEVELS, ATTACK_PROBABILITIES, NUM_BITS,
+                                np.random.default_rng(SEED), chunk_elements)
+    else:
+        results = run_loop(np.random.RandomState(SEED))
+
+    elapsed = time.time() - start_time
+
+    for row in results:
+        print(f"Noise: {row['noise']} | Attack: {row['attack_probability']} | "
+              f"QBER: {row['qber']:.4f} | Key Rate: {row['key_rate']:.4f}")
+
+    pulses = NUM_BITS * len(results)
+
+    print(f"\nEngine: {engine} | {pulses:,} pulses in {elapsed:.2f}s "
+          f"({pulses / elapsed if elapsed > 0 else 0:,.0f} pulses/sec)")
+
+    df = pd.DataFrame(results)
+    df.to_csv(OUTPUT_PATH, index=False)
+
+    print("\nSaved:", OUTPUT_PATH)
+
+    plot_metric(df, "qber", "QBER", "QBER vs Attack Probability (MDI-QKD)", QBER_PLOT_PATH)
+    plot_metric(df, "key_rate", "Secure Key Rate", "Key Rate vs Attack Probability (MDI-QKD)", KEYRATE_PLOT_PATH)
+
+    print("\nCorrected MDI-QKD Simulation Completed Successfully.\n")
+
+    return df
 
-plt.figure()
+if __name__ == "__main__":
 
-for noise in NOISE_LEVELS:
-    subset = df[df["noise"] == noise]
-    plt.plot(subset["attack_probability"], subset["key_rate"], marker="o", label=f"Noise={noise}")
+    parser = argparse.ArgumentParser(description="MDI-QKD simulation over the noise x attack grid")
+    parser.add_argument("--engine", choices=ENGINES, default=ENGINE)
+    parser.add_argument("--bits", type=int, default=NUM_BITS, help="pulses per scenario")
+    parser.add_argument("--chunk-elements", type=int, default=CHUNK_ELEMENTS)
 
-plt.xlabel("Attack Probability")
-plt.ylabel("Secure Key Rate")
-plt.title("Key Rate vs Attack Probability (MDI-QKD)")
-plt.legend()
-plt.tight_layout()
-plt.savefig("evaluation/mdi_qkd_keyrate_plot.png")
-plt.close()
+    args = parser.parse_args()
 
-print("Saved: evaluation/mdi_qkd_keyrate_plot.png")
+    NUM_BITS = args.bits
 
-print("\nCorrected MDI-QKD Simulation Completed Successfully.\n")
\ No newline at end of file
+    main(args.engine, args.chunk_elements)
@@ -0,0 +1,176 @@
+import os
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from itertools import product
+from math import ceil, log2
+
+import pandas as pd
+from matplotlib.figure import Figure
+
+from data.storage import read_logs
+from quantum import grover_search
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+
+ERROR_1Q_GRID = [0.0, 0.001, 0.002, 0.005]
+ERROR_2Q_GRID = [0.0, 0.001, 0.005, 0.01, 0.02]
+READOUT_GRID = [0.0, 0.02]
+
+SHOTS = [256, 1024, 2048]
+
+# "density_matrix" evolves the exact noisy state once per circuit, so the
+# cost does not grow with the shot count; "statevector" samples one
+# noisy trajectory per shot instead.
+METHODS = ["density_matrix", "statevector"]
+METHOD = "density_matrix"
+
+# Grid points simulated concurrently (Aer releases the GIL)
+WORKERS = min(4, os.cpu_count() or 1)
+
+OUTPUT_PATH = "evaluation/grover_noise_sweep.csv"
+PLOT_PATH = "evaluation/grover_noise_sweep_plot.png"
+
+# ============================================================
+# SWEEP
+# ============================================================
+
+# Every grid point shares the gate set of grover_search.noise_model, so
+# the searches are transpiled (or loaded from .circuit_cache/) and bound
+# once; each grid point is then one batched Aer job that overrides only
+# the noise model. Smaller shot counts are subsampled from the largest.
+
+
+def run_point(circuits, error_1q, error_2q, readout, shots, method, threads):
+
+    noise_model = grover_search.build_noise_model(error_1q, error_2q, readout)
+
+    point_start = time.time()
+
+    counts = grover_search.run_finite_shots(
+        circuits, grover_search.noisy_backend, shots, subsample=True,
+        noise_model=noise_model, method=method, max_parallel_threads=threads)
+
+    return counts, time.time() - point_start
+
+
+def sweep(ai_detected_logs=None, error_1q=None, error_2q=None, readout=None,
+          shots=None, method=None, mode=None, workers=None):
+
+    error_1q = error_1q or ERROR_1Q_GRID
+    error_2q = error_2q or ERROR_2Q_GRID
+    readout = readout or READOUT_GRID
+    shots = shots or SHOTS
+    method = method or METHOD
+    mode = mode or grover_search.SEARCH_MODE
+    workers = workers or WORKERS
+
+    if ai_detected_logs is None:
+        print("\nLoading AI detected anomalies...")
+        ai_detected_logs = read_logs(grover_search.INPUT_PATH, columns=["anomaly_score"])
+
+    df_logs = ai_detected_logs.head(grover_search.MAX_RECORDS)
+
+    n = int(ceil(log2(len(df_logs))))
+
+    searches = grover_search.plan_searches(df_logs, n, mode, "aer")
+
+    circuits = grover_search.bind_searches(searches, n, grover_search.noisy_backend)
+
+    grid = list(product(error_1q, error_2q, readout))
+
+    print(f"Noise grid: {len(grid)} points x {len(circuits)} circuits | "
+          f"Method: {method} | Workers: {workers}")
+
+    threads = max(1, (os.cpu_count() or 1) // workers)
+
+    sweep_start = time.time()
+
+    with ThreadPoolExecutor(workers) as pool:
+        outcomes = list(pool.map(
+            lambda point: run_point(circuits, *point, shots, method, threads), grid))
+
+    print(f"Sweep completed in {time.time() - sweep_start:.2f}s")
+
+    rows = []
+
+    for (p1, p2, ro), (counts, seconds) in zip(grid, outcomes):
+        for i, search in enumerate(searches):
+            for shot_count in shots:
+
+                hits, _ = grover_search.marked_hits(counts[shot_count][i], search["indices"], n)
+
+                rows.append({
+                    "error_1q": p1,
+                    "error_2q": p2,
+                    "readout": ro,
+                    "target": search["target"],
+                    "marked": len(search["indices"]),
+                    "shots": shot_count,
+                    "success": hits / shot_count,
+                    "seconds": seconds
+                })
+
+    df = pd.DataFrame(rows)
+
+    os.makedirs("evaluation", exist_ok=True)
+
+    df.to_csv(OUTPUT_PATH, index=False)
+
+    print("Saved:", OUTPUT_PATH)
+
+    plot_sweep(df)
+
+    return df
+
+
+# ============================================================
+# PLOTS
+# ============================================================
+
+def plot_sweep(df):
+
+    # Success at the largest shot count, averaged over targets
+    summary = (df[df["shots"] == df["shots"].max()]
+               .groupby(["error_1q", "readout", "error_2q"], as_index=False)["success"]
+               .mean())
+
+    fig = Figure()
+    ax = fig.add_subplot()
+
+    for (p1, ro), subset in summary.groupby(["error_1q", "readout"]):
+        ax.plot(subset["error_2q"], subset["success"], marker="o",
+                label=f"1q={p1}, readout={ro}")
+
+    ax.set_xlabel("2-qubit depolarizing error")
+    ax.set_ylabel("Success")
+    ax.set_title("Grover Success vs. Noise")
+    ax.legend(fontsize="small")
+    fig.tight_layout()
+    fig.savefig(PLOT_PATH)
+
+    print("Saved:", PLOT_PATH)
+
+
+# ============================================================
+# MAIN
+# ============================================================
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Grover success over a grid of noise models")
+    parser.add_argument("--error-1q", type=float, nargs="+", default=ERROR_1Q_GRID)
+    parser.add_argument("--error-2q", type=float, nargs="+", default=ERROR_2Q_GRID)
+    parser.add_argument("--readout", type=float, nargs="+", default=READOUT_GRID)
+    parser.add_argument("--shots", type=int, nargs="+", default=SHOTS)
+    parser.add_argument("--method", choices=METHODS, default=METHOD)
+    parser.add_argument("--mode", choices=grover_search.SEARCH_MODES,
+                        default=grover_search.SEARCH_MODE)
+    parser.add_argument("--workers", type=int, default=WORKERS)
+
+    args = parser.parse_args()
+
+    sweep(error_1q=args.error_1q, error_2q=args.error_2q, readout=args.readout,
+          shots=args.shots, method=args.method, mode=args.mode, workers=args.workers)
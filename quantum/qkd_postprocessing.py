@@ -0,0 +1,311 @@
+import os
+import time
+import argparse
+from math import ceil, log2
+
+import numpy as np
+import pandas as pd
+
+from quantum.bitarray import PackedBits
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+
+# Cascade: first-pass block size ≈ 0.73 / QBER, doubled every pass
+CASCADE_PASSES = 4
+CASCADE_FIRST_BLOCK = 0.73
+
+# Bits disclosed to confirm Alice and Bob hold the same key afterwards
+VERIFY_TAG_BITS = 64
+
+# Privacy amplification failure probability; costs 2·log2(1/ε) bits
+PA_EPSILON = 1e-10
+
+OUTPUT_PATH = "evaluation/qkd_postprocessing.csv"
+
+# ============================================================
+# HELPERS
+# ============================================================
+
+def binary_entropy(p):
+
+    if p <= 0 or p >= 1:
+        return 0.0
+
+    return float(-p * np.log2(p) - (1 - p) * np.log2(1 - p))
+
+
+def prefix_parity(bits):
+
+    # parity(bits[lo:hi]) == prefix[hi] ^ prefix[lo]
+    prefix = np.zeros(len(bits) + 1, dtype=np.uint8)
+    np.bitwise_xor.accumulate(bits, out=prefix[1:])
+
+    return prefix
+
+
+def secure_key_length(sifted_length, qber, leaked_bits, epsilon=PA_EPSILON):
+
+    # Phase errors estimated by the bit error rate; every bit disclosed
+    # during reconciliation and verification is subtracted as well
+    length = sifted_length * (1 - binary_entropy(qber)) - leaked_bits \
+        - 2 * log2(1 / epsilon)
+
+    return max(0, int(length))
+
+# ============================================================
+# CASCADE RECONCILIATION
+# ============================================================
+
+# Bits are handled unpacked (one uint8 per bit) while reconciling: the
+# bisection reads parities of arbitrary permuted ranges, which prefix
+# parity arrays answer in O(1). All odd-parity blocks of a pass are
+# bisected together, one vectorized halving step at a time.
+
+
+class _Pass:
+
+    def __init__(self, alice, permutation, block_size):
+
+        self.permutation = permutation
+        self.inverse = np.argsort(permutation)
+        self.block_size = block_size
+        self.alice_prefix = prefix_parity(alice[permutation])
+
+    def odd_blocks(self, bob, blocks=None):
+        # Blocks whose Bob parity differs from Alice's; Alice's block
+        # parities are disclosed once per pass, by the caller
+
+        self.bob_prefix = prefix_parity(bob[self.permutation])
+
+        n = len(self.permutation)
+
+        if blocks is None:
+            blocks = np.arange(ceil(n / self.block_size))
+
+        lo = blocks * self.block_size
+        hi = np.minimum(lo + self.block_size, n)
+
+        differ = (self.alice_prefix[hi] ^ self.alice_prefix[lo]) \
+            != (self.bob_prefix[hi] ^ self.bob_prefix[lo])
+
+        return lo[differ], hi[differ]
+
+    def bisect(self, lo, hi):
+        # Returns the erroneous positions (original order) and the number
+        # of parities Alice disclosed
+
+        disclosed = 0
+
+        active = hi - lo > 1
+
+        while active.any():
+
+            mid = (lo + hi) // 2
+
+            left_differs = (self.alice_prefix[mid] ^ self.alice_prefix[lo]) \
+                != (self.bob_prefix[mid] ^ self.bob_prefix[lo])
+
+            disclosed += int(active.sum())
+
+            hi = np.where(active & left_differs, mid, hi)
+            lo = np.where(active & ~left_differs, mid, lo)
+
+            active = hi - lo > 1
+
+        return self.permutation[lo], disclosed
+
+    def blocks_of(self, positions):
+
+        return np.unique(self.inverse[positions] // self.block_size)
+
+
+def cascade(alice, bob, qber, passes=CASCADE_PASSES, rng=None):
+    # alice, bob: PackedBits of equal length. Returns Bob's corrected
+    # key and the number of bits disclosed over the public channel.
+
+    rng = rng or np.random.default_rng()
+
+    n = len(alice)
+
+    alice_bits = np.unpackbits(alice.data, count=n)
+    bob_bits = np.unpackbits(bob.data, count=n)
+
+    if n == 0:
+        return PackedBits.zeros(0), 0
+
+    block_size = max(4, int(CASCADE_FIRST_BLOCK / qber)) if qber > 0 else n
+
+    leaked = 0
+
+    done = []
+
+    for index in range(passes):
+
+        permutation = np.arange(n) if index == 0 else rng.permutation(n)
+
+        current = _Pass(alice_bits, permutation, min(block_size, n))
+
+        leaked += ceil(n / current.block_size)
+
+        lo, hi = current.odd_blocks(bob_bits)
+        corrected, disclosed = current.bisect(lo, hi)
+
+        leaked += disclosed
+
+        bob_bits[corrected] ^= 1
+
+        done.append(current)
+
+        # Cascade: each correction flips the parity of the blocks holding
+        # that bit in every other pass, exposing errors hidden there
+        while len(corrected):
+
+            found = []
+
+            for other in done:
+
+                lo, hi = other.odd_blocks(bob_bits, other.blocks_of(corrected))
+
+                if len(lo) == 0:
+                    continue
+
+                positions, disclosed = other.bisect(lo, hi)
+
+                leaked += disclosed
+
+                bob_bits[positions] ^= 1
+
+                found.append(positions)
+
+            corrected = np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+
+        block_size *= 2
+
+    return PackedBits.from_bits(bob_bits), leaked
+
+# ============================================================
+# TOEPLITZ PRIVACY AMPLIFICATION
+# ============================================================
+
+def toeplitz_hash(key, output_length, seed):
+    # Multiplies key (n bits) by the output_length x n binary Toeplitz
+    # matrix T[i, j] = seed[i - j + n - 1] over GF(2). The matrix-vector
+    # product is a convolution, computed with FFTs in O(n log n).
+
+    n = len(key)
+
+    if output_length == 0:
+        return PackedBits.zeros(0)
+
+    if len(seed) != n + output_length - 1:
+        raise ValueError(f"Toeplitz seed needs {n + output_length - 1} bits, got {len(seed)}")
+
+    x = np.unpackbits(key.data, count=n).astype(np.float64)
+    t = np.unpackbits(seed.data, count=len(seed)).astype(np.float64)
+
+    size = 1 << (n + len(seed) - 1 - 1).bit_length()
+
+    convolution = np.fft.irfft(np.fft.rfft(t, size) * np.fft.rfft(x, size), size)
+
+    window = convolution[n - 1:n - 1 + output_length]
+
+    return PackedBits.from_bits(np.rint(window).astype(np.int64) & 1)
+
+# ============================================================
+# POST-PROCESSING
+# ============================================================
+
+def postprocess(alice, bob, qber, rng=None):
+    # Reconciles Bob's sifted key to Alice's and compresses both with
+    # the same Toeplitz hash. Returns (alice_key, bob_key, stats).
+
+    rng = rng or np.random.default_rng()
+
+    n = len(alice)
+
+    stats = {"sifted_bits": n, "qber": qber}
+
+    step_start = time.time()
+    reconciled, leaked = cascade(alice, bob, qber, rng=rng)
+    stats["reconciliation_seconds"] = time.time() - step_start
+
+    # Verification: compare a short hash; in the simulation the residual
+    # error count is read off directly
+    leaked += VERIFY_TAG_BITS
+
+    stats["leaked_bits"] = leaked
+    stats["residual_errors"] = alice.hamming_distance(reconciled) if n else 0
+
+    output_length = secure_key_length(n, qber, leaked)
+
+    seed = PackedBits.random(n + output_length - 1, rng) if output_length else None
+
+    step_start = time.time()
+    alice_key = toeplitz_hash(alice, output_length, seed)
+    bob_key = toeplitz_hash(reconciled, output_length, seed)
+    stats["amplification_seconds"] = (time.time() - step_start) / 2
+
+    stats["secure_bits"] = output_length
+    stats["keys_match"] = alice_key == bob_key
+
+    for step in ["reconciliation", "amplification"]:
+        seconds = stats[f"{step}_seconds"]
+        stats[f"{step}_bits_per_sec"] = n / seconds if seconds > 0 else 0
+
+    return alice_key, bob_key, stats
+
+
+def estimated_leak(sifted_length, qber, passes=CASCADE_PASSES):
+    # Disclosure of cascade() without running it: roughly 1.2x the
+    # Shannon limit n·h(Q) at the first-pass block size used above
+    return int(1.2 * sifted_length * binary_entropy(qber)) + VERIFY_TAG_BITS
+
+# ============================================================
+# BENCHMARK
+# ============================================================
+
+def benchmark(sizes=(10**6,), qbers=(0.01, 0.03, 0.05), seed=42):
+
+    rng = np.random.default_rng(seed)
+
+    rows = []
+
+    for n in sizes:
+        for qber in qbers:
+
+            alice = PackedBits.random(n, rng)
+            bob = alice ^ PackedBits.from_bits(rng.random(n) < qber)
+
+            _, _, stats = postprocess(alice, bob, alice.hamming_distance(bob) / n, rng)
+
+            rows.append(stats)
+
+            print(f"{n:,} bits | QBER {stats['qber']:.4f} | leaked {stats['leaked_bits']:,} | "
+                  f"residual {stats['residual_errors']} | secure {stats['secure_bits']:,} | "
+                  f"cascade {stats['reconciliation_bits_per_sec']:,.0f} bits/s | "
+                  f"toeplitz {stats['amplification_bits_per_sec']:,.0f} bits/s")
+
+    df = pd.DataFrame(rows)
+
+    os.makedirs("evaluation", exist_ok=True)
+    df.to_csv(OUTPUT_PATH, index=False)
+
+    print("Saved:", OUTPUT_PATH)
+
+    return df
+
+# ============================================================
+# MAIN
+# ============================================================
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Cascade + Toeplitz QKD post-processing throughput")
+    parser.add_argument("--bits", type=int, nargs="+", default=[10**6])
+    parser.add_argument("--qber", type=float, nargs="+", default=[0.01, 0.03, 0.05])
+
+    args = parser.parse_args()
+
+    benchmark(args.bits, args.qber)
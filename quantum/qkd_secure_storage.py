@@ -1,9 +1,8 @@
 import os
-import numpy as np
 import pandas as pd
-from hashlib import sha256
-from Crypto.Cipher import AES
-from Crypto.Random import get_random_bytes
+
+from quantum import aead_stream
+from quantum.key_pool import KeyPool
 
 # ============================================================
 # LOAD MDI-QKD RESULTS
@@ -23,39 +22,28 @@ print(best_row)
 # GENERATE FINAL KEY FROM QKD OUTPUT
 # ============================================================
 
-secure_key_length = int(best_row["secure_key_length"])
-
-# Simulate extracted secure key bits
-secure_bits = np.random.randint(0, 2, secure_key_length)
-
-# Convert bits → bytes
-bit_string = ''.join(map(str, secure_bits))
-byte_key = sha256(bit_string.encode()).digest()[:32]  # AES-256 key
+# 256-bit keys cut from the scenario's reconciled, amplified QKD output
+pool = KeyPool({"HIGH": (float(best_row["noise"]), float(best_row["attack_probability"]))})
 
-print("Derived AES-256 key from QKD.")
-
-# ============================================================
-# LOAD AI DETECTED LOGS
-# ============================================================
+pool_key = pool.acquire("HIGH")
 
-print("\nLoading AI anomaly logs...")
+byte_key = pool_key.key  # AES-256 key
 
-data = open("data/ai_detected_logs.csv", "rb").read()
+print("AES-256 key from QKD key pool:", pool_key.key_id)
 
 # ============================================================
 # AES ENCRYPTION
 # ============================================================
 
-cipher = AES.new(byte_key, AES.MODE_GCM)
-
-ciphertext, tag = cipher.encrypt_and_digest(data)
-
-encrypted_package = cipher.nonce + tag + ciphertext
+print("\nEncrypting AI anomaly logs...")
 
 os.makedirs("secure_storage", exist_ok=True)
 
-with open("secure_storage/encrypted_anomalies.bin", "wb") as f:
-    f.write(encrypted_package)
+# Streamed file to file in AES-GCM frames (quantum/aead_stream.py)
+aead_stream.encrypt_file(byte_key, "data/ai_detected_logs.parquet",
+                         "secure_storage/encrypted_anomalies.bin")
+
+pool.record_seal(pool_key, "secure_storage/encrypted_anomalies.bin")
 
 print("Encrypted file saved to: secure_storage/encrypted_anomalies.bin")
 
@@ -63,15 +51,7 @@ print("Encrypted file saved to: secure_storage/encrypted_anomalies.bin")
 # DECRYPTION TEST (Integrity Verification)
 # ============================================================
 
-nonce = encrypted_package[:16]
-tag = encrypted_package[16:32]
-ciphertext = encrypted_package[32:]
-
-cipher = AES.new(byte_key, AES.MODE_GCM, nonce=nonce)
-
-decrypted = cipher.decrypt_and_verify(ciphertext, tag)
-
-with open("secure_storage/decrypted_test.csv", "wb") as f:
-    f.write(decrypted)
+aead_stream.decrypt_file(byte_key, "secure_storage/encrypted_anomalies.bin",
+                         "secure_storage/decrypted_test.parquet")
 
 print("Decryption verified successfully.")
@@ -0,0 +1,378 @@
+import os
+import time
+import struct
+import argparse
+import tempfile
+import threading
+from math import ceil
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+from Crypto.Cipher import AES
+from Crypto.Hash import SHA256
+from Crypto.Protocol.KDF import HKDF
+
+from quantum import aead_stream
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+
+# Plaintext bytes per independently sealed segment
+SEGMENT_SIZE = 8 << 20
+
+# AES-GCM releases the GIL, so segments are sealed on a thread pool
+WORKERS = os.cpu_count() or 1
+
+MAGIC = b"QSEG"
+VERSION = 1
+
+THROUGHPUT_PATH = "evaluation/encryption_throughput.csv"
+
+# ============================================================
+# FORMAT
+# ============================================================
+
+# header | segment index | segment 0 ciphertext | segment 1 ciphertext | ...
+#
+# header: magic, version, segment size, plaintext length, segment count,
+#         16-byte random salt
+# index:  one (file offset, ciphertext length, tag) entry per segment
+#
+# Segment i is sealed with its own AES-256 key and nonce, both derived
+# by HKDF-SHA256 from the master key, the salt and i; its AAD is the
+# header plus i. GCM keeps ciphertext and plaintext the same length, so
+# every offset is known up front: workers pread their plaintext and
+# pwrite ciphertext and index entry straight into place, in any order.
+# The header fixes the segment count, so dropped segments and
+# truncation are detected.
+
+HEADER = struct.Struct(">4sBQQI16s")
+INDEX_ENTRY = struct.Struct(">QQ16s")
+
+SEGMENT_CONTEXT = b"segmented-aead segment"
+
+
+def _segment_cipher(key, header, salt, index):
+
+    derived = HKDF(key, 44, salt, SHA256, context=SEGMENT_CONTEXT + struct.pack(">Q", index))
+
+    cipher = AES.new(derived[:32], AES.MODE_GCM, nonce=derived[32:])
+    cipher.update(header + struct.pack(">Q", index))
+
+    return cipher
+
+
+# os.pread/os.pwrite are POSIX-only. Elsewhere (Windows) positioned I/O
+# falls back to lseek + read/write, serialized by a lock since the
+# workers share one descriptor and its file position.
+POSITIONED_IO = hasattr(os, "pread") and hasattr(os, "pwrite")
+
+_seek_lock = threading.Lock()
+
+# Without it Windows translates line endings
+O_BINARY = getattr(os, "O_BINARY", 0)
+
+
+def _write_at(fd, data, offset):
+
+    if POSITIONED_IO:
+        return os.pwrite(fd, data, offset)
+
+    with _seek_lock:
+        os.lseek(fd, offset, os.SEEK_SET)
+        return os.write(fd, data)
+
+
+def _read_at(fd, size, offset):
+
+    if POSITIONED_IO:
+        return os.pread(fd, size, offset)
+
+    with _seek_lock:
+        os.lseek(fd, offset, os.SEEK_SET)
+        return os.read(fd, size)
+
+
+def _pwrite(fd, data, offset):
+
+    view = memoryview(data)
+
+    while view:
+        written = _write_at(fd, view, offset)
+        view = view[written:]
+        offset += written
+
+
+def _pread(fd, size, offset):
+
+    data = _read_at(fd, size, offset)
+
+    if len(data) != size:
+        raise ValueError("Truncated segmented container")
+
+    return data
+
+
+def segment_count(length, segment_size=SEGMENT_SIZE):
+
+    # An empty input still gets one (empty) authenticated segment
+    return max(1, ceil(length / segment_size))
+
+
+def read_index(fd):
+    # Returns (header bytes, header fields, index entries)
+
+    header = _pread(fd, HEADER.size, 0)
+
+    magic, version, segment_size, length, segments, salt = HEADER.unpack(header)
+
+    if magic != MAGIC:
+        raise ValueError("Not a segmented AES-GCM container")
+
+    if version != VERSION:
+        raise ValueError(f"Unsupported segmented container version {version}")
+
+    if segment_size == 0 or segments != segment_count(length, segment_size):
+        raise ValueError("Inconsistent segmented container header")
+
+    raw = _pread(fd, segments * INDEX_ENTRY.size, HEADER.size)
+
+    entries = list(INDEX_ENTRY.iter_unpack(raw))
+
+    fields = {
+        "segment_size": segment_size,
+        "length": length,
+        "segments": segments,
+        "salt": salt
+    }
+
+    return header, fields, entries
+
+# ============================================================
+# ENCRYPTION
+# ============================================================
+
+def encrypt_file(key, input_path, output_path, segment_size=SEGMENT_SIZE, workers=WORKERS):
+    # Returns the plaintext byte count
+
+    length = os.path.getsize(input_path)
+    segments = segment_count(length, segment_size)
+
+    salt = os.urandom(16)
+    header = HEADER.pack(MAGIC, VERSION, segment_size, length, segments, salt)
+
+    data_start = HEADER.size + segments * INDEX_ENTRY.size
+
+    in_fd = os.open(input_path, os.O_RDONLY | O_BINARY)
+    out_fd = os.open(output_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | O_BINARY, 0o644)
+
+    def seal(index):
+
+        offset = index * segment_size
+
+        plaintext = _pread(in_fd, min(segment_size, length - offset), offset)
+
+        ciphertext, tag = _segment_cipher(key, header, salt, index).encrypt_and_digest(plaintext)
+
+        _pwrite(out_fd, ciphertext, data_start + offset)
+        _pwrite(out_fd, INDEX_ENTRY.pack(data_start + offset, len(ciphertext), tag),
+                HEADER.size + index * INDEX_ENTRY.size)
+
+        return len(plaintext)
+
+    try:
+        os.ftruncate(out_fd, data_start + length)
+
+        _pwrite(out_fd, header, 0)
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            total = sum(pool.map(seal, range(segments)))
+
+    finally:
+        os.close(in_fd)
+        os.close(out_fd)
+
+    return total
+
+# ============================================================
+# DECRYPTION
+# ============================================================
+
+def _open_segment(key, fd, header, fields, entries, index):
+
+    offset, size, tag = entries[index]
+
+    expected = min(fields["segment_size"], fields["length"] - index * fields["segment_size"])
+
+    if size != expected:
+        raise ValueError(f"Segment {index} has length {size}, expected {expected}")
+
+    ciphertext = _pread(fd, size, offset)
+
+    return _segment_cipher(key, header, fields["salt"], index).decrypt_and_verify(ciphertext, tag)
+
+
+def read_segment(key, input_path, index):
+    # Random access: decrypts one segment without touching the others
+
+    fd = os.open(input_path, os.O_RDONLY | O_BINARY)
+
+    try:
+        header, fields, entries = read_index(fd)
+
+        if not 0 <= index < fields["segments"]:
+            raise IndexError(f"Segment {index} out of range ({fields['segments']} segments)")
+
+        return _open_segment(key, fd, header, fields, entries, index)
+
+    finally:
+        os.close(fd)
+
+
+def decrypt_file(key, input_path, output_path=None, workers=WORKERS):
+    # output_path=None only verifies every segment. On any failure the
+    # partial output is removed. Returns the plaintext byte count.
+
+    in_fd = os.open(input_path, os.O_RDONLY | O_BINARY)
+    out_fd = None
+
+    try:
+        header, fields, entries = read_index(in_fd)
+
+        if output_path is not None:
+            out_fd = os.open(output_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | O_BINARY, 0o644)
+            os.ftruncate(out_fd, fields["length"])
+
+        def open_segment(index):
+
+            plaintext = _open_segment(key, in_fd, header, fields, entries, index)
+
+            if out_fd is not None:
+                _pwrite(out_fd, plaintext, index * fields["segment_size"])
+
+            return len(plaintext)
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            total = sum(pool.map(open_segment, range(fields["segments"])))
+
+    except Exception:
+        if out_fd is not None:
+            os.close(out_fd)
+            out_fd = None
+            os.remove(output_path)
+        raise
+
+    finally:
+        os.close(in_fd)
+        if out_fd is not None:
+            os.close(out_fd)
+
+    return total
+
+
+def verify_file(key, input_path, workers=WORKERS):
+
+    return decrypt_file(key, input_path, workers=workers)
+
+# ============================================================
+# BENCHMARK
+# ============================================================
+
+def benchmark(size_mb=1024, worker_counts=(1, 2, 4), segment_size=SEGMENT_SIZE):
+    # GB/s of the segmented container per worker count, against the
+    # single-stream chunked format as the serial reference
+
+    key = os.urandom(32)
+
+    results = []
+
+    with tempfile.TemporaryDirectory() as directory:
+
+        plain = os.path.join(directory, "plain")
+        sealed = os.path.join(directory, "sealed")
+        opened = os.path.join(directory, "opened")
+
+        with open(plain, "wb") as f:
+            for _ in range(size_mb):
+                f.write(os.urandom(1 << 20))
+
+        length = os.path.getsize(plain)
+
+        def measure(container, workers, encrypt, decrypt):
+
+            start = time.time()
+            encrypt()
+            encrypt_seconds = time.time() - start
+
+            start = time.time()
+            decrypt()
+            decrypt_seconds = time.time() - start
+
+            results.append({
+                "container": container,
+                "workers": workers,
+                "bytes": length,
+                "encrypt_seconds": encrypt_seconds,
+                "decrypt_seconds": decrypt_seconds,
+                "encrypt_gb_per_sec": length / encrypt_seconds / 1e9,
+                "decrypt_gb_per_sec": length / decrypt_seconds / 1e9
+            })
+
+        measure("stream", 1,
+                lambda: aead_stream.encrypt_file(key, plain, sealed),
+                lambda: aead_stream.decrypt_file(key, sealed, opened))
+
+        for workers in worker_counts:
+            measure("segmented", workers,
+                    lambda: encrypt_file(key, plain, sealed, segment_size, workers),
+                    lambda: decrypt_file(key, sealed, opened, workers))
+
+    df = pd.DataFrame(results)
+
+    os.makedirs("evaluation", exist_ok=True)
+    df.to_csv(THROUGHPUT_PATH, index=False)
+
+    print("\nEncryption throughput by worker count:")
+    print(df.to_string(index=False))
+    print("Saved:", THROUGHPUT_PATH)
+
+    return df
+
+# ============================================================
+# MAIN
+# ============================================================
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Parallel segmented AES-256-GCM container")
+    parser.add_argument("action", choices=["encrypt", "decrypt", "verify", "benchmark"])
+    parser.add_argument("input", nargs="?")
+    parser.add_argument("output", nargs="?")
+    parser.add_argument("--key-hex", help="64 hex digits (AES-256)")
+    parser.add_argument("--segment-size", type=int, default=SEGMENT_SIZE)
+    parser.add_argument("--workers", type=int, nargs="+", default=[WORKERS],
+                        help="thread count (benchmark: one run per count)")
+    parser.add_argument("--size-mb", type=int, default=1024, help="benchmark input size")
+
+    args = parser.parse_args()
+
+    if args.action == "benchmark":
+        benchmark(args.size_mb, args.workers, args.segment_size)
+    else:
+        if args.key_hex is None or args.input is None:
+            parser.error(f"{args.action} needs an input file and --key-hex")
+
+        if args.action in ("encrypt", "decrypt") and args.output is None:
+            parser.error(f"{args.action} needs an output file")
+
+        key = bytes.fromhex(args.key_hex)
+
+        if args.action == "encrypt":
+            size = encrypt_file(key, args.input, args.output, args.segment_size, args.workers[0])
+        elif args.action == "decrypt":
+            size = decrypt_file(key, args.input, args.output, args.workers[0])
+        else:
+            size = verify_file(key, args.input, args.workers[0])
+
+        print(f"{args.action}: {size:,} plaintext bytes")
@@ -1,64 +1,152 @@
-import subprocess
 import time
 import sys
+import argparse
 from datetime import datetime
 
+from pipeline.graph import Stage, StageFailed, run_graph
+from pipeline.cache import StageCache
+
+from bigdata import log_filter
+from ai import anomaly_detection
+from quantum import grover_search, mdi_qkd, adaptive_security_pipeline
+from classical import classical_search
+from evaluation import comparison
+
 # ============================================================
 # PIPELINE CONFIGURATION
 # ============================================================
 
-STEPS = [
-    ("Big Data Processing", "python bigdata/spark_processing.py"),
-    ("AI Anomaly Detection", "python ai/anomaly_detection.py"),
-    ("Quantum Grover Search", "python quantum/grover_search.py"),
-    ("MDI-QKD Simulation", "python quantum/mdi_qkd.py"),
-    ("Adaptive Quantum Encryption", "python quantum/adaptive_security_pipeline.py"),
-    ("Evaluation & Comparison", "python evaluation/comparison.py")
+# Stages run in-process; artifacts are handed over in memory and
+# independent stages (e.g. MDI-QKD vs. Grover) run concurrently.
+# Each stage is fingerprinted from its code, config and input files
+# and skipped when a matching cached result exists.
+
+STAGES = [
+    Stage("Big Data Processing", log_filter.main,
+          key="spark",
+          sources=[log_filter.default_input_path()],
+          outputs={"suspicious_logs": log_filter.output_path()},
+          config=lambda: {
+              "WRITE_MODE": log_filter.WRITE_MODE
+          },
+          code=["bigdata/spark_processing.py", "data/storage.py",
+                "data/encrypted_store.py", "security/ecc_hybrid.py"]),
+    Stage("AI Anomaly Detection", anomaly_detection.main,
+          key="ai",
+          inputs=["suspicious_logs"],
+          outputs={"ai_detected_logs": anomaly_detection.OUTPUT_PATH},
+          code=["ai/features.py"],
+          config=lambda: {
+              "model": anomaly_detection.latest_model_path()
+          }),
+    Stage("Quantum Grover Search", grover_search.main,
+          key="grover",
+          inputs=["ai_detected_logs"],
+          outputs={"grover_results": grover_search.csv_main,
+                   "grover_noise_results": grover_search.csv_noise},
+          code=["quantum/grover_statevector.py", "quantum/circuit_cache.py"],
+          config=lambda: {
+              "MAX_RECORDS": grover_search.MAX_RECORDS,
+              "BACKEND": grover_search.BACKEND,
+              "SEARCH_MODE": grover_search.SEARCH_MODE,
+              "SCORE_THRESHOLD": grover_search.SCORE_THRESHOLD,
+              "COUNT_KNOWN": grover_search.COUNT_KNOWN,
+              "base_shots": grover_search.base_shots,
+              "finite_shots": grover_search.finite_shots,
+              "SUBSAMPLE_SHOTS": grover_search.SUBSAMPLE_SHOTS,
+              "ERROR_1Q": grover_search.ERROR_1Q,
+              "ERROR_2Q": grover_search.ERROR_2Q
+          }),
+    Stage("Classical Search", classical_search.main,
+          key="classical",
+          inputs=["ai_detected_logs"],
+          outputs={"classical_results": classical_search.OUTPUT_PATH}),
+    Stage("MDI-QKD Simulation", mdi_qkd.main,
+          key="qkd",
+          outputs={"mdi_qkd_results": mdi_qkd.OUTPUT_PATH},
+          code=["quantum/bitarray.py", "quantum/qkd_postprocessing.py"],
+          config=lambda: {
+              "NUM_BITS": mdi_qkd.NUM_BITS,
+              "NOISE_LEVELS": mdi_qkd.NOISE_LEVELS,
+              "ATTACK_PROBABILITIES": mdi_qkd.ATTACK_PROBABILITIES,
+              "SEED": mdi_qkd.SEED,
+              "ENGINE": mdi_qkd.ENGINE
+          }),
+    Stage("Adaptive Quantum Encryption", adaptive_security_pipeline.main,
+          key="encryption",
+          inputs=["ai_detected_logs", "grover_results", "mdi_qkd_results"],
+          outputs={"encrypted_anomalies": None},
+          code=["quantum/key_pool.py", "quantum/mdi_qkd.py", "quantum/bitarray.py",
+                "quantum/qkd_postprocessing.py", "quantum/aead_stream.py",
+                "quantum/segmented_aead.py", "data/encrypted_store.py", "data/storage.py"],
+          config=lambda: {
+              "ROUTE_RECORDS": adaptive_security_pipeline.ROUTE_RECORDS,
+              "STRONG_SCORE_MARGIN": adaptive_security_pipeline.STRONG_SCORE_MARGIN,
+              "STRONG_REKEY_ROWS": adaptive_security_pipeline.STRONG_REKEY_ROWS,
+              "CONTAINER": adaptive_security_pipeline.CONTAINER
+          }),
+    Stage("Evaluation & Comparison", comparison.main,
+          key="evaluation",
+          inputs=["classical_results", "grover_results"],
+          outputs={"final_comparison": comparison.OUTPUT_PATH})
 ]
 
+MAX_WORKERS = 4
+
 # ============================================================
 # EXECUTION
 # ============================================================
 
-def run_pipeline():
+def on_start(stage):
 
-    print("\n" + "="*60)
-    print("QUANTUM-SECURE LOG ANALYSIS PIPELINE")
-    print("Started at:", datetime.now())
-    print("="*60 + "\n")
+    print(f"\n>>> Running Stage: {stage.name}")
+    print("-"*50)
 
-    total_start = time.time()
-    results_summary = []
 
-    for step_name, command in STEPS:
+def on_complete(stage, duration):
 
-        print(f"\n>>> Running Stage: {step_name}")
-        print("-"*50)
+    if duration is None:
+        print(f"⏭️  Stage Skipped: {stage.name} (inputs unchanged, cached outputs reused)")
+    else:
+        print(f"✅ Stage Completed: {stage.name} ({duration} seconds)")
 
-        start_time = time.time()
 
-        result = subprocess.run(command, shell=True)
+def run_pipeline(force=(), use_cache=True):
+
+    print("\n" + "="*60)
+    print("QUANTUM-SECURE LOG ANALYSIS PIPELINE")
+    print("Started at:", datetime.now())
+    print("="*60 + "\n")
 
-        end_time = time.time()
-        duration = round(end_time - start_time, 2)
+    total_start = time.time()
 
-        if result.returncode != 0:
-            print(f"\n❌ Stage Failed: {step_name}")
-            print("Pipeline aborted.\n")
-            sys.exit(1)
+    cache = StageCache() if use_cache else None
 
-        print(f"✅ Stage Completed: {step_name} ({duration} seconds)")
-        results_summary.append((step_name, duration))
+    try:
+        _, timings = run_graph(STAGES, max_workers=MAX_WORKERS,
+                               cache=cache, force=force,
+                               on_start=on_start, on_complete=on_complete)
+    except StageFailed as failure:
+        print(f"\n❌ Stage Failed: {failure.stage.name}")
+        print("Error:", failure.error)
+        print("Pipeline aborted.\n")
+        sys.exit(1)
 
     total_end = time.time()
     total_duration = round(total_end - total_start, 2)
 
+    order = [stage.name for stage in STAGES]
+    results_summary = sorted(timings, key=lambda item: order.index(item[0]))
+
     print("\n" + "="*60)
     print("PIPELINE EXECUTION SUMMARY")
     print("="*60)
 
     for name, duration in results_summary:
-        print(f"{name:<35} : {duration} sec")
+        if duration is None:
+            print(f"{name:<35} : skipped (cached)")
+        else:
+            print(f"{name:<35} : {duration} sec")
 
     print("-"*60)
     print(f"{'Total Execution Time':<35} : {total_duration} sec")
@@ -70,5 +158,28 @@ def run_pipeline():
 # MAIN
 # ============================================================
 
+def parse_args():
+
+    parser = argparse.ArgumentParser(description="Quantum-secure log analysis pipeline")
+
+    parser.add_argument(
+        "--force",
+        action="append",
+        default=[],
+        choices=[stage.key for stage in STAGES],
+        metavar="STAGE",
+        help="re-run STAGE and everything downstream of it (repeatable); "
+             "one of: " + ", ".join(stage.key for stage in STAGES)
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="ignore the stage cache and recompute every stage"
+    )
+
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    run_pipeline()
\ No newline at end of file
+    args = parse_args()
+    run_pipeline(force=args.force, use_cache=not args.no_cache)
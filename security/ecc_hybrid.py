@@ -0,0 +1,195 @@
+import os
+import struct
+import hashlib
+import argparse
+
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.keywrap import aes_key_wrap, aes_key_unwrap, InvalidUnwrap
+
+from data.encrypted_store import EncryptedLogStore, read_key_info
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+
+PUBLIC_KEY_PATH = "security/public_key.pem"
+PRIVATE_KEY_PATH = "security/private_key.pem"
+
+HKDF_INFO = b"log encryption"
+
+# ============================================================
+# KEY HEADER FORMAT
+# ============================================================
+
+# Binary, fixed-layout header carried as the encrypted store's key info
+# (so it sits at a known offset right after the store header):
+#
+# magic, version, curve id, KDF id, 16-byte KDF salt,
+# ephemeral public key (compressed SEC1 point), recipient count,
+# then per recipient: 8-byte key fingerprint, wrapped data key
+#
+# The logs are sealed under a random AES-256 data key. For each
+# recipient, ECDH(ephemeral, recipient) -> HKDF-SHA256(salt, info ||
+# fingerprint) gives a key-encryption key that wraps the data key
+# (RFC 3394). Parsing is O(1): fixed offsets, no marker scanning.
+
+MAGIC = b"QECC"
+VERSION = 1
+
+CURVES = {1: ec.SECP256R1}
+CURVE_IDS = {curve: number for number, curve in CURVES.items()}
+
+KDF_HKDF_SHA256 = 1
+
+KEY_HEADER = struct.Struct(">4sBBB16s33sH")
+RECIPIENT = struct.Struct(">8s40s")
+
+# ============================================================
+# KEYS
+# ============================================================
+
+def load_public_key(path=PUBLIC_KEY_PATH):
+
+    with open(path, "rb") as f:
+        return serialization.load_pem_public_key(f.read())
+
+
+def load_private_key(path=PRIVATE_KEY_PATH):
+
+    with open(path, "rb") as f:
+        return serialization.load_pem_private_key(f.read(), password=None)
+
+
+def compressed_point(public_key):
+
+    return public_key.public_bytes(
+        encoding=serialization.Encoding.X962,
+        format=serialization.PublicFormat.CompressedPoint
+    )
+
+
+def fingerprint(public_key):
+
+    return hashlib.sha256(compressed_point(public_key)).digest()[:8]
+
+
+def derive_kek(shared_key, salt, recipient):
+
+    return HKDF(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=salt,
+        info=HKDF_INFO + recipient
+    ).derive(shared_key)
+
+# ============================================================
+# ECC HYBRID DATA KEYS
+# ============================================================
+
+def new_data_key(recipient_public_keys):
+    # One public key or a list; returns (AES-256 data key, key header)
+
+    if not isinstance(recipient_public_keys, (list, tuple)):
+        recipient_public_keys = [recipient_public_keys]
+
+    curve = type(recipient_public_keys[0].curve)
+
+    if curve not in CURVE_IDS:
+        raise ValueError(f"Unsupported curve {curve.name}")
+
+    data_key = os.urandom(32)
+    salt = os.urandom(16)
+
+    ephemeral_private_key = ec.generate_private_key(curve())
+
+    recipients = []
+
+    for public_key in recipient_public_keys:
+
+        if not isinstance(public_key.curve, curve):
+            raise ValueError("All recipients must use the same curve")
+
+        shared_key = ephemeral_private_key.exchange(ec.ECDH(), public_key)
+        recipient = fingerprint(public_key)
+
+        recipients.append(RECIPIENT.pack(
+            recipient, aes_key_wrap(derive_kek(shared_key, salt, recipient), data_key)))
+
+    header = KEY_HEADER.pack(MAGIC, VERSION, CURVE_IDS[curve], KDF_HKDF_SHA256, salt,
+                             compressed_point(ephemeral_private_key.public_key()),
+                             len(recipients))
+
+    return data_key, header + b"".join(recipients)
+
+
+def parse_key_header(data):
+
+    if len(data) < KEY_HEADER.size:
+        raise ValueError("Truncated ECC key header")
+
+    magic, version, curve_id, kdf, salt, point, count = KEY_HEADER.unpack_from(data)
+
+    if magic != MAGIC:
+        raise ValueError("Not an ECC key header")
+
+    if version != VERSION:
+        raise ValueError(f"Unsupported ECC key header version {version}")
+
+    if curve_id not in CURVES or kdf != KDF_HKDF_SHA256:
+        raise ValueError(f"Unsupported curve {curve_id} or KDF {kdf}")
+
+    if len(data) != KEY_HEADER.size + count * RECIPIENT.size:
+        raise ValueError("ECC key header length does not match its recipient count")
+
+    return {
+        "version": version,
+        "curve": CURVES[curve_id],
+        "salt": salt,
+        "ephemeral_public_key": ec.EllipticCurvePublicKey.from_encoded_point(CURVES[curve_id](), point),
+        "recipients": dict(RECIPIENT.iter_unpack(data[KEY_HEADER.size:]))
+    }
+
+
+def recover_data_key(receiver_private_key, key_header):
+
+    header = parse_key_header(key_header)
+
+    recipient = fingerprint(receiver_private_key.public_key())
+
+    if recipient not in header["recipients"]:
+        raise ValueError("This private key is not a recipient of the store")
+
+    shared_key = receiver_private_key.exchange(ec.ECDH(), header["ephemeral_public_key"])
+
+    try:
+        return aes_key_unwrap(derive_kek(shared_key, header["salt"], recipient),
+                              header["recipients"][recipient])
+    except InvalidUnwrap:
+        raise ValueError("Wrapped data key failed to unwrap") from None
+
+
+def open_store(path, private_key_path=PRIVATE_KEY_PATH):
+
+    key = recover_data_key(load_private_key(private_key_path), read_key_info(path))
+
+    return EncryptedLogStore(path, key)
+
+# ============================================================
+# MAIN
+# ============================================================
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Show the ECC key header of an encrypted log store")
+    parser.add_argument("path")
+
+    args = parser.parse_args()
+
+    header = parse_key_header(read_key_info(args.path))
+
+    print(f"ECC key header v{header['version']} | curve {header['curve'].name} | HKDF-SHA256")
+    for recipient in header["recipients"]:
+        print("recipient", recipient.hex())
@@ -0,0 +1,300 @@
+import io
+import os
+import time
+import queue
+import socket
+import argparse
+import threading
+import numpy as np
+import pandas as pd
+
+from data.storage import iter_logs, write_logs
+from bigdata.log_filter import OUTPUT_COLUMNS, filter_frame
+from ai.anomaly_detection import LOG_COLUMNS, load_model, score_frame
+from ai.features import FeatureState
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+
+# A directory of Parquet parts, one per scored micro-batch, read back
+# as one dataset with data.storage.read_logs
+OUTPUT_PATH = "data/stream_scored_logs"
+LATENCY_PATH = "evaluation/stream_latency.csv"
+
+BATCH_SIZE = 5000       # close a micro-batch after this many events...
+BATCH_INTERVAL = 1.0    # ...or this many seconds after its first event
+
+POLL_INTERVAL = 0.1
+REPLAY_RATE = 20000     # events/sec pushed by the replay producer
+
+HEADER = ",".join(OUTPUT_COLUMNS)
+
+# ============================================================
+# SOURCES
+# ============================================================
+
+# Every source yields (arrival time, CSV line) per event, or None when
+# idle so the batcher can close a batch on time.
+
+def tail_file(path, poll_interval=POLL_INTERVAL, from_start=False):
+
+    with open(path) as f:
+
+        if not from_start:
+            f.seek(0, os.SEEK_END)
+
+        partial = ""
+
+        while True:
+            line = f.readline()
+            if not line:
+                yield None
+                time.sleep(poll_interval)
+                continue
+            partial += line
+            # Writer may be mid-line; wait for the newline
+            if not partial.endswith("\n"):
+                continue
+            yield time.time(), partial.rstrip("\n")
+            partial = ""
+
+
+def socket_source(address, poll_interval=POLL_INTERVAL):
+
+    host, port = address.rsplit(":", 1)
+
+    with socket.create_connection((host, int(port))) as conn:
+
+        conn.settimeout(poll_interval)
+        buffer = b""
+
+        while True:
+            try:
+                data = conn.recv(65536)
+            except socket.timeout:
+                yield None
+                continue
+            if not data:
+                return
+            arrival = time.time()
+            buffer += data
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                yield arrival, line.decode()
+
+
+def queue_source(events, poll_interval=POLL_INTERVAL):
+
+    # In-process stand-in for a message queue; a None item ends the stream
+    while True:
+        try:
+            item = events.get(timeout=poll_interval)
+        except queue.Empty:
+            yield None
+            continue
+        if item is None:
+            return
+        yield item
+
+
+def replay_into_queue(path, events, rate=REPLAY_RATE, chunk_rows=1000):
+
+    # Producer thread: replays an existing dataset as a live feed
+    for chunk in iter_logs(path, columns=OUTPUT_COLUMNS, batch_size=chunk_rows):
+        lines = chunk.to_csv(index=False, header=False).splitlines()
+        for line in lines:
+            events.put((time.time(), line))
+        time.sleep(len(lines) / rate)
+
+    events.put(None)
+
+# ============================================================
+# MICRO-BATCHING
+# ============================================================
+
+def micro_batches(source, batch_size=BATCH_SIZE, batch_interval=BATCH_INTERVAL):
+
+    batch = []
+    opened = None
+
+    for event in source:
+
+        if event is not None and event[1] and event[1] != HEADER:
+            if not batch:
+                opened = time.time()
+            batch.append(event)
+
+        if batch and (len(batch) >= batch_size or time.time() - opened >= batch_interval):
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+def parse_batch(batch):
+
+    text = "\n".join(line for _, line in batch)
+
+    df = pd.read_csv(io.StringIO(text), names=OUTPUT_COLUMNS, parse_dates=["timestamp"])
+
+    arrivals = np.array([arrival for arrival, _ in batch])
+
+    return df, arrivals
+
+def write_part(scored, output_path, run, number):
+
+    # Written under a hidden name and renamed, so readers of the dataset
+    # only ever see complete parts
+    name = f"part-{run}-{number:05d}.parquet"
+    tmp_path = os.path.join(output_path, f".{name}.tmp")
+
+    write_logs(scored.reset_index(drop=True), tmp_path)
+    os.replace(tmp_path, os.path.join(output_path, name))
+
+# ============================================================
+# LATENCY
+# ============================================================
+
+def latency_percentiles(latencies):
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+
+    return {
+        "p50_ms": p50,
+        "p95_ms": p95,
+        "p99_ms": p99,
+        "max_ms": latencies.max() * 1000
+    }
+
+# ============================================================
+# STREAMING PIPELINE
+# ============================================================
+
+def run_stream(source, model, output_path=OUTPUT_PATH,
+               batch_size=BATCH_SIZE, batch_interval=BATCH_INTERVAL,
+               max_batches=None, stats=None):
+    # Per-batch stats are appended to stats (if given) as batches
+    # complete, so the caller keeps them when the stream is interrupted
+
+    stats = [] if stats is None else stats
+
+    # Per-user / per-IP rolling features continue across batches
+    state = FeatureState()
+
+    # Parts are named by run, so earlier runs' results are kept
+    os.makedirs(output_path, exist_ok=True)
+    run = time.time_ns()
+
+    for number, batch in enumerate(micro_batches(source, batch_size, batch_interval), 1):
+
+        df, arrivals = parse_batch(batch)
+
+        suspicious = filter_frame(df)
+
+        if len(suspicious):
+            # Each batch's results are readable as soon as it is scored
+            scored = score_frame(suspicious[LOG_COLUMNS], model, state)
+            write_part(scored, output_path, run, number)
+            anomalies = int(scored["anomaly"].sum())
+        else:
+            anomalies = 0
+
+        # End-to-end: event arrival → scored result persisted
+        latency = latency_percentiles(time.time() - arrivals)
+
+        stats.append({
+            "batch": number,
+            "events": len(df),
+            "suspicious": len(suspicious),
+            "anomalies": anomalies,
+            **latency
+        })
+
+        print(f"Batch {number} | Events: {len(df)} | Suspicious: {len(suspicious)} | "
+              f"Anomalies: {anomalies} | Latency p50/p95/p99: "
+              f"{latency['p50_ms']:.1f}/{latency['p95_ms']:.1f}/{latency['p99_ms']:.1f} ms")
+
+        if max_batches and number >= max_batches:
+            break
+
+    return pd.DataFrame(stats)
+
+# ============================================================
+# MAIN
+# ============================================================
+
+def parse_args():
+
+    parser = argparse.ArgumentParser(description="Streaming log ingestion with micro-batch anomaly scoring")
+
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--tail", metavar="PATH", help="follow a CSV log file as it grows")
+    source.add_argument("--socket", metavar="HOST:PORT", help="read newline-delimited CSV events from a TCP socket")
+    source.add_argument("--replay", metavar="PATH", help="replay a dataset through an in-process queue")
+
+    parser.add_argument("--rate", type=float, default=REPLAY_RATE, help="replay rate in events/sec")
+    parser.add_argument("--from-start", action="store_true", help="with --tail, read the existing file first")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--batch-interval", type=float, default=BATCH_INTERVAL)
+    parser.add_argument("--max-batches", type=int, default=None)
+    parser.add_argument("--model", default=None,
+                        help="IsolationForest artifact to score with (default: latest version)")
+    parser.add_argument("--output", default=OUTPUT_PATH)
+
+    return parser.parse_args()
+
+
+def save_stats(stats, output_path):
+
+    if stats.empty:
+        print("No events received.")
+        return
+
+    os.makedirs("evaluation", exist_ok=True)
+    stats.to_csv(LATENCY_PATH, index=False)
+
+    print("\nBatches:", len(stats), "| Events:", stats["events"].sum(),
+          "| Anomalies:", stats["anomalies"].sum())
+    print("Median batch p95 latency (ms):", round(stats["p95_ms"].median(), 1))
+    print("Saved:", output_path)
+    print("Saved:", LATENCY_PATH)
+
+
+def main():
+
+    args = parse_args()
+
+    artifact = load_model(args.model)
+
+    print(f"Scoring with model v{artifact['version']} (trained {artifact['created']})")
+
+    if args.tail:
+        source = tail_file(args.tail, from_start=args.from_start)
+    elif args.socket:
+        source = socket_source(args.socket)
+    else:
+        events = queue.Queue()
+        producer = threading.Thread(target=replay_into_queue,
+                                    args=(args.replay, events, args.rate), daemon=True)
+        producer.start()
+        source = queue_source(events)
+
+    print("Streaming... (Ctrl+C to stop)\n")
+
+    batches = []
+
+    try:
+        run_stream(source, artifact["model"], args.output, args.batch_size,
+                   args.batch_interval, args.max_batches, batches)
+    except KeyboardInterrupt:
+        print("\nStream stopped.")
+    finally:
+        # Ctrl+C is the usual way to end a stream: the batches scored
+        # until then are still reported
+        save_stats(pd.DataFrame(batches), args.output)
+
+
+if __name__ == "__main__":
+    main()
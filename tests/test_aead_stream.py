@@ -0,0 +1,105 @@
+import io
+import os
+
+import pytest
+
+from quantum import aead_stream
+from quantum.aead_stream import FRAME, HEADER, TAG_SIZE
+
+CHUNK = 64
+
+KEY = bytes(range(32))
+
+
+def seal(plaintext, key=KEY):
+
+    dst = io.BytesIO()
+    aead_stream.encrypt_stream(key, io.BytesIO(plaintext), dst, CHUNK)
+
+    return dst.getvalue()
+
+
+def unseal(sealed, key=KEY):
+
+    dst = io.BytesIO()
+    aead_stream.decrypt_stream(key, io.BytesIO(sealed), dst)
+
+    return dst.getvalue()
+
+
+def frames(sealed):
+    # Splits a sealed stream into its header and raw frames
+
+    frames = []
+    position = HEADER.size
+
+    while position < len(sealed):
+        _, length = FRAME.unpack_from(sealed, position)
+        end = position + FRAME.size + length + TAG_SIZE
+        frames.append(sealed[position:end])
+        position = end
+
+    return sealed[:HEADER.size], frames
+
+
+@pytest.mark.parametrize("size", [0, 1, CHUNK, 3 * CHUNK, 3 * CHUNK + 5])
+def test_round_trip(size):
+
+    plaintext = os.urandom(size)
+
+    assert unseal(seal(plaintext)) == plaintext
+    assert aead_stream.decrypt_stream(KEY, io.BytesIO(seal(plaintext))) == size
+
+
+def test_file_round_trip(tmp_path):
+
+    plaintext = os.urandom(5 * CHUNK + 1)
+    (tmp_path / "plain").write_bytes(plaintext)
+
+    aead_stream.encrypt_file(KEY, tmp_path / "plain", tmp_path / "sealed", CHUNK)
+
+    assert aead_stream.verify_file(KEY, tmp_path / "sealed") == len(plaintext)
+    assert aead_stream.decrypt_file(KEY, tmp_path / "sealed", tmp_path / "opened") == len(plaintext)
+    assert (tmp_path / "opened").read_bytes() == plaintext
+
+
+def test_truncation_is_rejected():
+
+    header, parts = frames(seal(os.urandom(3 * CHUNK + 5)))
+
+    # Dropping the final frame, or cutting one short
+    with pytest.raises(ValueError):
+        unseal(header + b"".join(parts[:-1]))
+
+    with pytest.raises(ValueError, match="Truncated"):
+        unseal(header + b"".join(parts)[:-1])
+
+
+def test_reordered_frames_are_rejected():
+
+    header, parts = frames(seal(os.urandom(3 * CHUNK + 5)))
+
+    parts[0], parts[1] = parts[1], parts[0]
+
+    with pytest.raises(ValueError):
+        unseal(header + b"".join(parts))
+
+
+def test_tampering_is_rejected():
+
+    sealed = bytearray(seal(os.urandom(3 * CHUNK + 5)))
+
+    # A ciphertext bit, the final flag of frame 0, the nonce prefix
+    for position in [HEADER.size + FRAME.size + 3, HEADER.size, HEADER.size - 1]:
+
+        forged = bytearray(sealed)
+        forged[position] ^= 1
+
+        with pytest.raises(ValueError):
+            unseal(bytes(forged))
+
+    with pytest.raises(ValueError):
+        unseal(bytes(sealed), key=bytes(32))
+
+    with pytest.raises(ValueError, match="after the final frame"):
+        unseal(bytes(sealed) + b"\0")
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from quantum.bitarray import PackedBits
+
+
+@pytest.fixture
+def bits():
+
+    rng = np.random.default_rng(3)
+
+    return rng.integers(0, 2, 1003).astype(bool), rng.integers(0, 2, 1003).astype(bool)
+
+
+def test_round_trip_and_padding(bits):
+
+    a, _ = bits
+
+    packed = PackedBits.from_bits(a)
+
+    assert len(packed) == len(a)
+    assert np.array_equal(packed.unpack(), a)
+    assert PackedBits.from_bytes(packed.tobytes(), len(a)) == packed
+
+    # Inverting must not set the padding bits of the last byte
+    assert (~packed).count() == len(a) - packed.count()
+    assert np.array_equal((~packed).unpack(), ~a)
+
+
+def test_bitwise_operations_match_unpacked(bits):
+
+    a, b = bits
+    x, y = PackedBits.from_bits(a), PackedBits.from_bits(b)
+
+    assert np.array_equal((x ^ y).unpack(), a ^ b)
+    assert np.array_equal((x & y).unpack(), a & b)
+    assert np.array_equal((x | y).unpack(), a | b)
+    assert x.count() == a.sum()
+    assert x.hamming_distance(y) == (a != b).sum()
+
+
+def test_indexing_slicing_and_compress(bits):
+
+    a, b = bits
+    x = PackedBits.from_bits(a)
+
+    assert [x[i] for i in (0, 7, 8, 500, -1)] == [int(a[i]) for i in (0, 7, 8, 500, -1)]
+
+    for start, stop in [(0, 1003), (8, 64), (3, 1000), (13, 14), (997, 1003), (500, 500)]:
+        assert np.array_equal(x[start:stop].unpack(), a[start:stop])
+
+    assert np.array_equal(x.compress(PackedBits.from_bits(b)).unpack(), a[b])
+
+    with pytest.raises(IndexError):
+        x[1003]
+
+    with pytest.raises(ValueError):
+        x[::2]
+
+
+def test_length_mismatch_is_rejected():
+
+    with pytest.raises(ValueError, match="Length mismatch"):
+        PackedBits.zeros(16) ^ PackedBits.zeros(15)
+
+    with pytest.raises(ValueError):
+        PackedBits(np.zeros(3, dtype=np.uint8), 8)
@@ -0,0 +1,98 @@
+import pandas as pd
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+
+from data.encrypted_store import EncryptedLogWriter
+from security import ecc_hybrid
+from security.ecc_hybrid import KEY_HEADER, RECIPIENT
+
+
+@pytest.fixture(scope="module")
+def keys():
+
+    return [ec.generate_private_key(ec.SECP256R1()) for _ in range(3)]
+
+
+def test_every_recipient_recovers_the_data_key(keys):
+
+    alice, bob, _ = keys
+
+    data_key, header = ecc_hybrid.new_data_key([alice.public_key(), bob.public_key()])
+
+    assert len(data_key) == 32
+    assert len(header) == KEY_HEADER.size + 2 * RECIPIENT.size
+
+    parsed = ecc_hybrid.parse_key_header(header)
+
+    assert set(parsed["recipients"]) == {ecc_hybrid.fingerprint(alice.public_key()),
+                                         ecc_hybrid.fingerprint(bob.public_key())}
+
+    assert ecc_hybrid.recover_data_key(alice, header) == data_key
+    assert ecc_hybrid.recover_data_key(bob, header) == data_key
+
+
+def test_non_recipient_is_rejected(keys):
+
+    alice, _, eve = keys
+
+    _, header = ecc_hybrid.new_data_key(alice.public_key())
+
+    with pytest.raises(ValueError, match="not a recipient"):
+        ecc_hybrid.recover_data_key(eve, header)
+
+
+def test_malformed_headers_are_rejected(keys):
+
+    alice = keys[0]
+
+    _, header = ecc_hybrid.new_data_key(alice.public_key())
+
+    with pytest.raises(ValueError, match="Truncated"):
+        ecc_hybrid.parse_key_header(header[:KEY_HEADER.size - 1])
+
+    with pytest.raises(ValueError, match="Not an ECC key header"):
+        ecc_hybrid.parse_key_header(b"XECC" + header[4:])
+
+    with pytest.raises(ValueError, match="version"):
+        ecc_hybrid.parse_key_header(header[:4] + b"\x09" + header[5:])
+
+    with pytest.raises(ValueError, match="recipient count"):
+        ecc_hybrid.parse_key_header(header + bytes(RECIPIENT.size))
+
+    # A flipped bit in the wrapped key fails the RFC 3394 integrity check
+    forged = bytearray(header)
+    forged[-1] ^= 1
+
+    with pytest.raises(ValueError, match="failed to unwrap"):
+        ecc_hybrid.recover_data_key(alice, bytes(forged))
+
+    # So does a different salt, which changes the derived KEK
+    forged = bytearray(header)
+    forged[7] ^= 1
+
+    with pytest.raises(ValueError, match="failed to unwrap"):
+        ecc_hybrid.recover_data_key(alice, bytes(forged))
+
+
+def test_open_store_with_private_key_file(keys, tmp_path):
+
+    alice = keys[0]
+
+    key_path = tmp_path / "private_key.pem"
+    key_path.write_bytes(alice.private_bytes(serialization.Encoding.PEM,
+                                             serialization.PrivateFormat.PKCS8,
+                                             serialization.NoEncryption()))
+
+    logs = pd.DataFrame({"timestamp": pd.date_range("2026-10-01", periods=10, freq="h"),
+                         "label": ["normal", "attack"] * 5})
+
+    data_key, header = ecc_hybrid.new_data_key(alice.public_key())
+
+    with EncryptedLogWriter(str(tmp_path / "logs.enc"), data_key, header) as writer:
+        writer.write(logs)
+
+    store = ecc_hybrid.open_store(str(tmp_path / "logs.enc"), str(key_path))
+
+    assert store.rows == 10
+    assert list(store.read()["label"].astype(str)) == list(logs["label"])
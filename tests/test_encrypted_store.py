@@ -0,0 +1,146 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.encrypted_store import (ENTRY, FOOTER, TAG_SIZE, EncryptedLogStore,
+                                  EncryptedLogWriter, read_key_info)
+
+KEY = bytes(range(32))
+
+
+@pytest.fixture
+def logs():
+
+    rng = np.random.default_rng(4)
+    rows = 1000
+
+    return pd.DataFrame({
+        "timestamp": pd.Timestamp("2026-10-01") + pd.to_timedelta(np.arange(rows) * 60, unit="s"),
+        "user_id": rng.choice(["u1", "u2", "u3"], rows),
+        "event_type": rng.choice(["login", "logout"], rows),
+        "label": rng.choice(["normal", "attack"], rows)
+    })
+
+
+@pytest.fixture
+def store_path(tmp_path, logs):
+
+    path = str(tmp_path / "logs.enc")
+
+    with EncryptedLogWriter(path, KEY, b"key info", block_rows=128) as writer:
+        # Uneven chunks: blocks must still fill to block_rows
+        for start in range(0, len(logs), 300):
+            writer.write(logs.iloc[start:start + 300])
+
+    return path
+
+
+def assert_same(actual, expected):
+
+    actual = actual.astype({column: str for column in ["user_id", "event_type", "label"]})
+
+    pd.testing.assert_frame_equal(actual.reset_index(drop=True),
+                                  expected.reset_index(drop=True), check_dtype=False)
+
+
+def test_round_trip(store_path, logs):
+
+    store = EncryptedLogStore(store_path, KEY)
+
+    assert store.rows == len(logs)
+    assert [entry["rows"] for entry in store.entries] == [128] * 7 + [104]
+    assert read_key_info(store_path) == b"key info"
+
+    assert_same(store.read(), logs)
+
+
+def test_time_range_reads_only_overlapping_blocks(store_path, logs):
+
+    store = EncryptedLogStore(store_path, KEY)
+
+    start, end = pd.Timestamp("2026-10-01 05:00"), pd.Timestamp("2026-10-01 07:30")
+
+    assert [entry["block"] for entry in store.blocks_for(start, end)] == [2, 3]
+
+    expected = logs[(logs["timestamp"] >= start) & (logs["timestamp"] < end)]
+
+    assert_same(store.read(start, end), expected)
+    assert list(store.read(start, end, columns=["label"]).columns) == ["label"]
+    assert store.read(pd.Timestamp("2027-01-01")).empty
+
+
+def corrupt(path, position, mask=1):
+
+    with open(path, "r+b") as f:
+        f.seek(position, os.SEEK_END if position < 0 else os.SEEK_SET)
+        byte = f.read(1)[0]
+        f.seek(-1, os.SEEK_CUR)
+        f.write(bytes([byte ^ mask]))
+
+
+def test_tampered_block_is_rejected(store_path):
+
+    store = EncryptedLogStore(store_path, KEY)
+
+    corrupt(store_path, store.entries[3]["offset"] + 10)
+
+    with pytest.raises(ValueError):
+        EncryptedLogStore(store_path, KEY).read()
+
+    # Blocks outside the tampered one still decrypt
+    assert len(EncryptedLogStore(store_path, KEY).read(end=pd.Timestamp("2026-10-01 06:00"))) == 360
+
+
+def test_tampered_or_reordered_index_is_rejected(store_path):
+
+    store = EncryptedLogStore(store_path, KEY)
+    index_size = len(store.entries) * (ENTRY.size + TAG_SIZE)
+    index_start = -(FOOTER.size + TAG_SIZE + index_size)
+
+    # Block 0's last timestamp
+    corrupt(store_path, index_start + 4 + 8 + 7)
+
+    with pytest.raises(ValueError):
+        EncryptedLogStore(store_path, KEY)
+
+    corrupt(store_path, index_start + 4 + 8 + 7)
+
+    # Swap the index entries of blocks 0 and 1
+    with open(store_path, "r+b") as f:
+        f.seek(index_start, os.SEEK_END)
+        entry_0 = f.read(ENTRY.size + TAG_SIZE)
+        entry_1 = f.read(ENTRY.size + TAG_SIZE)
+        f.seek(index_start, os.SEEK_END)
+        f.write(entry_1 + entry_0)
+
+    with pytest.raises(ValueError):
+        EncryptedLogStore(store_path, KEY)
+
+
+def test_truncation_and_forged_footer_are_rejected(store_path, tmp_path):
+
+    with open(store_path, "rb") as f:
+        data = f.read()
+
+    truncated = tmp_path / "truncated.enc"
+    truncated.write_bytes(data[:-1])
+
+    with pytest.raises(ValueError, match="no index"):
+        EncryptedLogStore(str(truncated), KEY)
+
+    # A huge block count must be refused before the index is read
+    index_offset, _, magic = FOOTER.unpack(data[-FOOTER.size:])
+
+    forged = tmp_path / "forged.enc"
+    forged.write_bytes(data[:-FOOTER.size] + FOOTER.pack(index_offset, 2**32 - 1, magic))
+
+    with pytest.raises(ValueError, match="does not match its size"):
+        EncryptedLogStore(str(forged), KEY)
+
+
+def test_wrong_key_is_rejected(store_path):
+
+    with pytest.raises(ValueError):
+        EncryptedLogStore(store_path, bytes(32))
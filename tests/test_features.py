@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+
+from ai import features
+from ai.features import FeatureState, extract_features
+
+
+def make_logs(n=2000, users=20, ips=30, seed=0, span_seconds=6 * 3600):
+
+    rng = np.random.default_rng(seed)
+
+    start = pd.Timestamp("2026-01-01")
+
+    return pd.DataFrame({
+        "timestamp": start + pd.to_timedelta(np.sort(rng.integers(0, span_seconds, n)), unit="s"),
+        "user_id": [f"user_{i}" for i in rng.integers(0, users, n)],
+        "ip_address": [f"10.0.0.{i}" for i in rng.integers(0, ips, n)],
+        "location": rng.choice(["India", "USA", "Japan"], n),
+        "event_type": rng.choice(features.EVENT_TYPES, n)
+    })
+
+
+def naive_key_windows(keys, t_us, failures, window_us):
+
+    result = np.empty((len(keys), 3))
+
+    for i in range(len(keys)):
+
+        same = keys == keys[i]
+        earlier = same & (t_us <= t_us[i])
+        # ties in time: rows sorted before i by (key, time, input order)
+        earlier &= ~((t_us == t_us[i]) & (np.arange(len(keys)) > i))
+
+        inside = earlier & (t_us >= t_us[i] - window_us)
+
+        result[i, 0] = inside.sum()
+        result[i, 1] = failures[inside].sum() / inside.sum()
+
+        previous = t_us[earlier & (np.arange(len(keys)) != i)]
+        gap = (t_us[i] - previous.max()) / 1e6 if len(previous) else features.INTERARRIVAL_CAP
+        result[i, 2] = min(gap, features.INTERARRIVAL_CAP)
+
+    return result
+
+
+def test_key_windows_match_naive_loop():
+
+    rng = np.random.default_rng(1)
+
+    keys = rng.integers(0, 15, 600)
+    t_us = rng.integers(0, 4 * 3600, 600) * 1_000_000
+    failures = rng.integers(0, 2, 600)
+
+    result, _, _ = features._key_windows(keys, t_us, failures, 3600 * 1_000_000)
+
+    np.testing.assert_allclose(result, naive_key_windows(keys, t_us, failures, 3600 * 1_000_000))
+
+
+def test_key_windows_many_keys_long_span():
+
+    # Key codes up to 10^7 and a year of microseconds: a composite
+    # key * span + time would overflow int64
+    keys = np.repeat(np.arange(0, 10**7, 10**4, dtype=np.int64), 3)
+    t_us = np.tile(np.array([0, 1800, 7200]) * 1_000_000, 1000) \
+        + np.repeat(np.arange(1000), 3) * (365 * 86400 * 1_000_000 // 1000)
+    failures = np.zeros(3000, dtype=np.int64)
+
+    result, _, _ = features._key_windows(keys, t_us, failures, 3600 * 1_000_000)
+
+    np.testing.assert_array_equal(result[:, 0], np.tile([1, 2, 1], 1000))
+
+
+def test_feature_state_matches_full_extraction():
+
+    logs = make_logs()
+
+    state = FeatureState()
+
+    chunked = np.vstack([state.transform(logs.iloc[start:start + 250])
+                         for start in range(0, len(logs), 250)])
+
+    np.testing.assert_array_equal(chunked, extract_features(logs))
+
+
+def test_feature_state_forgets_idle_keys():
+
+    logs = make_logs(n=500, users=500, ips=500, span_seconds=60)
+
+    later = make_logs(n=10, users=5, ips=5, seed=3, span_seconds=60)
+    later["timestamp"] += pd.Timedelta(seconds=features.HISTORY_SECONDS + 3600)
+
+    state = FeatureState()
+    state.transform(logs)
+    state.transform(later)
+
+    assert len(state.history) <= len(later)
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+from qiskit.quantum_info import Statevector
+
+from quantum import grover_search, grover_statevector
+from quantum.circuit_cache import CircuitCache
+
+
+@pytest.fixture(autouse=True)
+def memory_cache(monkeypatch):
+
+    monkeypatch.setattr(grover_search, "circuit_cache", CircuitCache(persist=False))
+
+
+@pytest.mark.parametrize("n, num_marked", [(2, 2), (3, 3), (5, 2), (5, 7), (6, 20)])
+def test_phase_oracle_matches_statevector(n, num_marked):
+
+    rng = np.random.default_rng(n * num_marked)
+
+    marked = np.sort(rng.choice(2**n, num_marked, replace=False))
+    iterations = grover_search.grover_iterations(2**n, num_marked)
+
+    qc = grover_search.marked_circuit(marked, n, iterations, grover_search.ideal_backend)
+
+    probabilities = Statevector(qc.remove_final_measurements(inplace=False)).probabilities()
+
+    assert np.allclose(probabilities, grover_statevector.probabilities(n, marked, iterations),
+                       atol=1e-9)
+
+
+def test_phase_oracle_cost_does_not_depend_on_marked_count():
+
+    n = 6
+    rng = np.random.default_rng(1)
+
+    counts = [
+        grover_search.marked_circuit(np.sort(rng.choice(2**n, num_marked, replace=False)),
+                                     n, 1, grover_search.noisy_backend).count_ops()["cx"]
+        for num_marked in (2, 5, 17)
+    ]
+
+    assert len(set(counts)) == 1
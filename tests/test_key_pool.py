@@ -0,0 +1,38 @@
+import pytest
+
+from quantum.key_pool import KEY_BITS, KeyPool
+
+
+def test_keys_rotate_after_max_uses():
+
+    pool = KeyPool({"LOW": (0.0, 0.0)}, max_uses=2, refill_pulses=20_000,
+                   registry_path=None, seed=1)
+
+    keys = [pool.acquire("LOW") for _ in range(5)]
+
+    assert [key.key_id for key in keys].count(keys[0].key_id) == 2
+    assert len({key.key_id for key in keys}) == 3
+    assert all(len(key.key) * 8 == KEY_BITS for key in keys)
+
+
+def test_per_tier_max_uses():
+
+    pool = KeyPool({"STRONG": (0.0, 0.0), "BULK": (0.0, 0.0)}, max_uses={"STRONG": 1},
+                   refill_pulses=20_000, registry_path=None, seed=1)
+
+    assert len({pool.acquire("STRONG").key_id for _ in range(3)}) == 3
+    assert len({pool.acquire("BULK").key_id for _ in range(3)}) == 1
+
+
+def test_refill_thread_failure_reaches_acquire_and_stop():
+
+    # Full intercept-resend on a noisy link: no secure key at all
+    pool = KeyPool({"X": (0.5, 1.0)}, registry_path=None, seed=1)
+
+    pool.start()
+
+    with pytest.raises(RuntimeError, match="yields no secure key"):
+        pool.acquire("X", timeout=30)
+
+    with pytest.raises(RuntimeError, match="yields no secure key"):
+        pool.stop()
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+
+from ai import features
+from ai.anomaly_detection import train_model
+from bigdata.log_filter import OUTPUT_COLUMNS
+from data.storage import read_logs
+from streaming.log_stream import run_stream
+
+
+def make_logs(n=400, seed=0):
+
+    rng = np.random.default_rng(seed)
+
+    return pd.DataFrame({
+        "timestamp": pd.Timestamp("2026-10-01") + pd.to_timedelta(np.arange(n), unit="s"),
+        "user_id": [f"user_{i}" for i in rng.integers(0, 10, n)],
+        "ip_address": [f"10.0.0.{i}" for i in rng.integers(0, 20, n)],
+        "location": rng.choice(["India", "USA", "Japan"], n),
+        "event_type": rng.choice(features.EVENT_TYPES, n),
+        "label": rng.choice(["normal", "attack"], n)
+    })[OUTPUT_COLUMNS]
+
+
+def events(logs):
+
+    return [(0.0, line) for line in logs.to_csv(index=False, header=False).splitlines()]
+
+
+def test_runs_append_parts_to_one_dataset(tmp_path):
+
+    output = str(tmp_path / "scored")
+
+    first, second = make_logs(seed=1), make_logs(seed=2)
+    model = train_model(make_logs(seed=0))
+
+    run_stream(iter(events(first)), model, output, batch_size=100)
+
+    # Parts are readable as a dataset as soon as they are written
+    assert len(read_logs(output)) == (first["label"] == "attack").sum()
+
+    stats = run_stream(iter(events(second)), model, output, batch_size=100)
+
+    scored = read_logs(output)
+
+    assert list(stats["batch"]) == [1, 2, 3, 4]
+    assert len(scored) == (first["label"] == "attack").sum() + (second["label"] == "attack").sum()
+    assert set(scored["label"].astype(str)) == {"attack"}
+    assert {"anomaly_score", "anomaly"} <= set(scored.columns)
@@ -0,0 +1,150 @@
+import pytest
+
+from pipeline.cache import StageCache
+from pipeline.graph import Stage, run_graph, validate_graph
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "source.txt").write_text("a\n")
+
+    return tmp_path
+
+
+def make_stages(calls, settings):
+
+    def extract():
+        calls.append("extract")
+        with open("source.txt") as src, open("extracted.txt", "w") as dst:
+            dst.write(src.read().upper())
+        return "extracted.txt"
+
+    def report(extracted):
+        calls.append("report")
+        with open(extracted) as src, open("report.txt", "w") as dst:
+            dst.write(src.read() * settings["repeat"])
+        return "report.txt"
+
+    return [
+        Stage("Extract", extract, key="extract", outputs={"extracted": "extracted.txt"},
+              sources=["source.txt"]),
+        Stage("Report", report, key="report", inputs=["extracted"],
+              outputs={"report": "report.txt"}, config=lambda: dict(settings))
+    ]
+
+
+def test_fingerprint_tracks_config_sources_and_inputs(workdir):
+
+    cache = StageCache(str(workdir / "cache"))
+    settings = {"repeat": 1}
+    extract, report = make_stages([], settings)
+
+    (workdir / "extracted.txt").write_text("A\n")
+    inputs = {"extracted": "extracted.txt"}
+
+    base = cache.fingerprint(report, inputs)
+    assert cache.fingerprint(report, inputs) == base
+
+    settings["repeat"] = 2
+    assert cache.fingerprint(report, inputs) != base
+    settings["repeat"] = 1
+
+    (workdir / "extracted.txt").write_text("B\n")
+    assert cache.fingerprint(report, inputs) != base
+
+    before = cache.fingerprint(extract, {})
+    (workdir / "source.txt").write_text("b\n")
+    assert cache.fingerprint(extract, {}) != before
+
+
+def test_unchanged_stages_are_skipped(workdir):
+
+    calls = []
+    settings = {"repeat": 1}
+    cache = StageCache(str(workdir / "cache"))
+
+    run_graph(make_stages(calls, settings), cache=cache)
+    assert calls == ["extract", "report"]
+
+    artifacts, timings = run_graph(make_stages(calls, settings), cache=cache)
+    assert calls == ["extract", "report"]
+    assert [duration for _, duration in timings] == [None, None]
+    assert artifacts["report"] == "report.txt"
+
+    # A config change reruns only the stage it belongs to
+    settings["repeat"] = 3
+    run_graph(make_stages(calls, settings), cache=cache)
+    assert calls[2:] == ["report"]
+    assert (workdir / "report.txt").read_text() == "A\n" * 3
+
+    # A source change reruns the stage and, through its output, its consumer
+    (workdir / "source.txt").write_text("b\n")
+    run_graph(make_stages(calls, settings), cache=cache)
+    assert calls[3:] == ["extract", "report"]
+
+
+def test_force_and_missing_outputs_rerun(workdir):
+
+    calls = []
+    settings = {"repeat": 1}
+    cache = StageCache(str(workdir / "cache"))
+
+    run_graph(make_stages(calls, settings), cache=cache)
+
+    run_graph(make_stages(calls, settings), cache=cache, force={"extract"})
+    assert calls[2:] == ["extract", "report"]
+
+    (workdir / "report.txt").unlink()
+    run_graph(make_stages(calls, settings), cache=cache)
+    assert calls[4:] == ["report"]
+
+
+def test_graph_validation():
+
+    def noop(**kwargs):
+        return None
+
+    with pytest.raises(ValueError, match="no stage produces"):
+        validate_graph([Stage("A", noop, inputs=["missing"])])
+
+    with pytest.raises(ValueError, match="Cycle"):
+        validate_graph([Stage("A", noop, inputs=["b"], outputs={"a": None}),
+                        Stage("B", noop, inputs=["a"], outputs={"b": None})])
+
+    with pytest.raises(ValueError, match="produced by both"):
+        validate_graph([Stage("A", noop, outputs={"a": None}),
+                        Stage("B", noop, outputs={"a": None})])
+
+
+def test_returned_directory_output_is_cached(workdir):
+
+    calls = []
+    cache = StageCache(str(workdir / "cache"))
+
+    def seal():
+        # Like the encryption stage: several part files under one
+        # directory, whose path is the stage's artifact
+        calls.append("seal")
+        for name in ["strong/part-0.enc", "bulk/part-0.enc"]:
+            (workdir / "sealed" / name).parent.mkdir(parents=True, exist_ok=True)
+            (workdir / "sealed" / name).write_text(name)
+        return "sealed"
+
+    def stages():
+        return [Stage("Seal", seal, key="seal", outputs={"sealed": None},
+                      sources=["source.txt"])]
+
+    run_graph(stages(), cache=cache)
+    artifacts, timings = run_graph(stages(), cache=cache)
+
+    assert calls == ["seal"]
+    assert artifacts["sealed"] == "sealed"
+    assert timings == [("Seal", None)]
+
+    # A part removed from the directory is a cache miss
+    (workdir / "sealed" / "bulk" / "part-0.enc").unlink()
+    run_graph(stages(), cache=cache)
+
+    assert calls == ["seal", "seal"]
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from quantum.bitarray import PackedBits
+from quantum.qkd_postprocessing import binary_entropy, cascade, postprocess, toeplitz_hash
+
+
+def noisy_copy(alice, qber, rng):
+
+    return alice ^ PackedBits.bernoulli(len(alice), qber, rng)
+
+
+@pytest.mark.parametrize("qber", [0.01, 0.03, 0.05])
+def test_cascade_converges(qber):
+
+    rng = np.random.default_rng(11)
+
+    alice = PackedBits.random(50_000, rng)
+    bob = noisy_copy(alice, qber, rng)
+
+    reconciled, leaked = cascade(alice, bob, qber, rng=rng)
+
+    assert reconciled == alice
+    # Within a modest factor of the Shannon limit n·h(QBER)
+    assert leaked < 1.5 * len(alice) * binary_entropy(qber) + 2000
+
+
+def test_cascade_without_errors_only_leaks_block_parities():
+
+    rng = np.random.default_rng(5)
+    alice = PackedBits.random(4096, rng)
+
+    reconciled, leaked = cascade(alice, PackedBits.from_bytes(alice.tobytes(), 4096), 0.0, rng=rng)
+
+    assert reconciled == alice
+    assert leaked == 4
+
+
+@pytest.mark.parametrize("n, m", [(1, 1), (37, 5), (256, 100), (1001, 333)])
+def test_toeplitz_hash_matches_matrix_product(n, m):
+
+    rng = np.random.default_rng(n)
+
+    key = PackedBits.random(n, rng)
+    seed = PackedBits.random(n + m - 1, rng)
+
+    s = seed.unpack().astype(np.int64)
+    i, j = np.indices((m, n))
+    matrix = s[i - j + n - 1]
+
+    expected = matrix @ key.unpack().astype(np.int64) % 2
+
+    assert np.array_equal(toeplitz_hash(key, m, seed).unpack(), expected.astype(bool))
+
+
+def test_toeplitz_seed_length_is_checked():
+
+    with pytest.raises(ValueError, match="seed needs"):
+        toeplitz_hash(PackedBits.zeros(10), 4, PackedBits.zeros(12))
+
+
+def test_postprocess_yields_matching_keys():
+
+    rng = np.random.default_rng(2)
+
+    alice = PackedBits.random(40_000, rng)
+    bob = noisy_copy(alice, 0.02, rng)
+
+    alice_key, bob_key, stats = postprocess(alice, bob, 0.02, rng=rng)
+
+    assert stats["residual_errors"] == 0
+    assert stats["keys_match"]
+    assert alice_key == bob_key
+    assert 0 < len(alice_key) == stats["secure_bits"] < len(alice)
@@ -0,0 +1,123 @@
+import os
+
+import pytest
+
+from quantum import segmented_aead
+from quantum.segmented_aead import HEADER, INDEX_ENTRY
+
+SEGMENT = 256
+
+KEY = bytes(range(32))
+
+
+@pytest.fixture
+def container(tmp_path):
+
+    plaintext = os.urandom(5 * SEGMENT + 17)
+
+    plain = tmp_path / "plain"
+    sealed = tmp_path / "sealed"
+
+    plain.write_bytes(plaintext)
+    segmented_aead.encrypt_file(KEY, str(plain), str(sealed), SEGMENT, workers=3)
+
+    return plaintext, sealed
+
+
+def test_round_trip(container, tmp_path):
+
+    plaintext, sealed = container
+    opened = tmp_path / "opened"
+
+    assert segmented_aead.decrypt_file(KEY, str(sealed), str(opened), workers=3) == len(plaintext)
+    assert opened.read_bytes() == plaintext
+
+    assert segmented_aead.read_segment(KEY, str(sealed), 5) == plaintext[5 * SEGMENT:]
+
+
+@pytest.mark.parametrize("size", [0, SEGMENT])
+def test_edge_sizes(tmp_path, size):
+
+    plaintext = os.urandom(size)
+    (tmp_path / "plain").write_bytes(plaintext)
+
+    segmented_aead.encrypt_file(KEY, str(tmp_path / "plain"), str(tmp_path / "sealed"), SEGMENT)
+
+    assert segmented_aead.verify_file(KEY, str(tmp_path / "sealed")) == size
+
+
+def test_seek_fallback_without_pread(container, tmp_path, monkeypatch):
+
+    plaintext, sealed = container
+
+    monkeypatch.setattr(segmented_aead, "POSITIONED_IO", False)
+
+    segmented_aead.encrypt_file(KEY, str(tmp_path / "plain"), str(tmp_path / "resealed"),
+                                SEGMENT, workers=4)
+    segmented_aead.decrypt_file(KEY, str(tmp_path / "resealed"), str(tmp_path / "opened"),
+                                workers=4)
+
+    assert (tmp_path / "opened").read_bytes() == plaintext
+
+
+def test_truncation_is_rejected(container, tmp_path):
+
+    _, sealed = container
+
+    data = sealed.read_bytes()
+    sealed.write_bytes(data[:-1])
+
+    with pytest.raises(ValueError, match="Truncated"):
+        segmented_aead.verify_file(KEY, str(sealed))
+
+    # A failed decryption leaves no partial output behind
+    with pytest.raises(ValueError):
+        segmented_aead.decrypt_file(KEY, str(sealed), str(tmp_path / "opened"))
+
+    assert not (tmp_path / "opened").exists()
+
+
+def test_reordered_segments_are_rejected(container):
+
+    _, sealed = container
+
+    data = bytearray(sealed.read_bytes())
+
+    # Swap the ciphertexts and index entries of segments 0 and 1
+    start = HEADER.size + 6 * INDEX_ENTRY.size
+
+    first = data[start:start + SEGMENT]
+    data[start:start + SEGMENT] = data[start + SEGMENT:start + 2 * SEGMENT]
+    data[start + SEGMENT:start + 2 * SEGMENT] = first
+
+    offset_0, _, tag_0 = INDEX_ENTRY.unpack_from(data, HEADER.size)
+    offset_1, _, tag_1 = INDEX_ENTRY.unpack_from(data, HEADER.size + INDEX_ENTRY.size)
+
+    INDEX_ENTRY.pack_into(data, HEADER.size, offset_0, SEGMENT, tag_1)
+    INDEX_ENTRY.pack_into(data, HEADER.size + INDEX_ENTRY.size, offset_1, SEGMENT, tag_0)
+
+    sealed.write_bytes(bytes(data))
+
+    with pytest.raises(ValueError):
+        segmented_aead.verify_file(KEY, str(sealed))
+
+
+@pytest.mark.parametrize("position", [4, HEADER.size + 3, -1])
+def test_tampering_is_rejected(container, position):
+
+    _, sealed = container
+
+    data = bytearray(sealed.read_bytes())
+    data[position] ^= 1
+    sealed.write_bytes(bytes(data))
+
+    with pytest.raises(ValueError):
+        segmented_aead.verify_file(KEY, str(sealed))
+
+
+def test_wrong_key_is_rejected(container):
+
+    _, sealed = container
+
+    with pytest.raises(ValueError):
+        segmented_aead.verify_file(bytes(32), str(sealed))